@@ -1,8 +1,15 @@
 #! /usr/bin/env python
 import gc
+import os
+import subprocess
 import sys
+import tempfile
 from timeit import repeat
 
+import six
+from six import StringIO
+
+from fastidious import ParserError, ParseLimits, ParseSession
 from fastidious.parser import FastidiousParser, BaseParser, Parser
 from fastidious.fastidious_compiler import FastidiousCompiler
 from fastidious.bootstrap import _FastidiousParserBootstraper
@@ -55,6 +62,196 @@ class NotJSONParser(Parser):
     """
 
 
+class NDJSONParser(Parser):
+    # the documents are dropped once parsed
+    __grammar__ = r"""
+        documents <- document*
+        document <- value {on_document}
+    """ + NotJSONParser.__grammar__
+
+    def on_document(self, value):
+        return None
+
+
+class NotJSONIncrementalParser(BaseParser):
+    p_compiler = FastidiousCompiler(incremental=True)
+    __grammar__ = NotJSONParser.__grammar__
+
+
+class ScannedJSONParser(Parser):
+    # the strings and the comments are scanned char by char
+    __grammar__ = r"""
+        value <- _ (string / number / object / array / true_false_null) _
+        object <- "{" _ members _ "}"
+        members <- (pair (_ "," _ pair)*)?
+        pair <- string _ ":" value
+        array <- "[" _ elements _ "]"
+        elements <- (value (_ "," _ value)*)?
+        true_false_null <- "true" / "false" / "null"
+        string <- '"' (!'"' .)* '"' {p_flatten}
+        number <- "-"? [0-9]+ ("." [0-9]+)? {p_flatten}
+        _ <- (~"\\s+" / comment)*
+        comment <- "/*" (!"*/" .)* "*/"
+    """
+
+
+class StructuralJSONParser(Parser):
+    __structural__ = '"*\n'
+    __grammar__ = ScannedJSONParser.__grammar__
+
+
+class CharJSONParser(Parser):
+    # the strings, the numbers and the blanks are matched char by char
+    __grammar__ = r"""
+        value <- _ (STRING / NUMBER / object / array / true_false_null) _
+        object <- "{" _ members _ "}"
+        members <- (pair (_ "," _ pair)*)?
+        pair <- STRING _ ":" value
+        array <- "[" _ elements _ "]"
+        elements <- (value (_ "," _ value)*)?
+        true_false_null <- "true" / "false" / "null"
+        STRING <- '"' (!'"' .)* '"' {p_flatten}
+        NUMBER <- "-"? [0-9]+ ("." [0-9]+)? {p_flatten}
+        _ <- WS?
+        WS <- [ \t\r\n]+
+    """
+
+
+class TokenJSONParser(Parser):
+    __tokens__ = ("STRING", "NUMBER", "WS")
+    __grammar__ = CharJSONParser.__grammar__
+
+
+class CharJSONNoMemoizedParser(BaseParser):
+    p_compiler = FastidiousCompiler(memoize=False)
+    __grammar__ = CharJSONParser.__grammar__
+
+
+class TokenJSONNoMemoizedParser(BaseParser):
+    p_compiler = FastidiousCompiler(memoize=False)
+    __tokens__ = ("STRING", "NUMBER", "WS")
+    __grammar__ = CharJSONParser.__grammar__
+
+
+class SpacedOperators(Parser):
+    # the blanks are matched by `_` between the tokens
+    __grammar__ = r"""
+        eval <- :expr _ EOF {@expr}
+        expr <- first:term rest:(_ add_op _ term)* {on_operators}
+        term <- first:factor rest:(_ mult_op _ factor)* {on_operators}
+        add_op <- "+" / "-"
+        mult_op <- "*" / "/"
+        factor <- _ operand:(paren / integer) {@operand}
+        paren <- "(" :expr _ ")" {@expr}
+        integer <- "-"? [0-9]+ {on_integer}
+        _ <- [ \t\r\n]*
+        EOF <- !.
+    """
+
+    def on_operators(self, value, first, rest):
+        for operation in rest:
+            operator, operand = operation[-3], operation[-1]
+            if operator == "+":
+                first += operand
+            elif operator == "-":
+                first -= operand
+            elif operator == "*":
+                first *= operand
+            else:
+                first /= operand
+        return first
+
+    def on_integer(self, value):
+        return int(self.p_flatten(value))
+
+
+class TriviaOperators(Parser):
+    # the blanks are skipped by the terminals
+    __trivia__ = r"[ \t\r\n]+"
+    __grammar__ = r"""
+        eval <- :expr EOF {@expr}
+        expr <- first:term rest:(add_op term)* {on_operators}
+        term <- first:factor rest:(mult_op factor)* {on_operators}
+        add_op <- "+" / "-"
+        mult_op <- "*" / "/"
+        factor <- paren / integer
+        paren <- "(" :expr ")" {@expr}
+        `integer <- "-"? [0-9]+ {on_integer}
+        EOF <- !.
+    """
+    on_integer = SpacedOperators.__dict__["on_integer"]
+
+    def on_operators(self, value, first, rest):
+        for operator, operand in rest:
+            if operator == "+":
+                first += operand
+            elif operator == "-":
+                first -= operand
+            elif operator == "*":
+                first *= operand
+            else:
+                first /= operand
+        return first
+
+
+class SpacedOperatorsNoMemoized(BaseParser):
+    p_compiler = FastidiousCompiler(memoize=False)
+    __grammar__ = SpacedOperators.__grammar__
+    on_operators = SpacedOperators.__dict__["on_operators"]
+    on_integer = SpacedOperators.__dict__["on_integer"]
+
+
+class TriviaOperatorsNoMemoized(BaseParser):
+    p_compiler = FastidiousCompiler(memoize=False)
+    __trivia__ = TriviaOperators.__trivia__
+    __grammar__ = TriviaOperators.__grammar__
+    on_operators = TriviaOperators.__dict__["on_operators"]
+    on_integer = SpacedOperators.__dict__["on_integer"]
+
+
+# the letters of latin-1, listed in a class
+LATIN_LETTERS = "".join(
+    c for c in map(six.unichr, range(256)) if c.isalpha())
+
+
+class ListedWords(Parser):
+    __grammar__ = u"""
+        words <- word (" " word)*
+        word <- [_%s]+ {p_flatten}
+    """ % LATIN_LETTERS
+
+
+class RegexWords(Parser):
+    __grammar__ = r"""
+        words <- word (" " word)*
+        word <- (~"[^\\W\\d]|_")+ {p_flatten}
+    """
+
+
+class CategoryWords(Parser):
+    # the letters are looked up in the tables of the class
+    __grammar__ = r"""
+        words <- word (" " word)*
+        word <- [\p{L}_]+ {p_flatten}
+    """
+
+
+class ListedWordsNoCodeGen(BaseParser):
+    p_compiler = FastidiousCompiler(gen_code=False)
+    __grammar__ = ListedWords.__grammar__
+
+
+class CategoryWordsNoCodeGen(BaseParser):
+    p_compiler = FastidiousCompiler(gen_code=False)
+    __grammar__ = CategoryWords.__grammar__
+
+
+class NDJSONListParser(Parser):
+    __grammar__ = r"""
+        documents <- value*
+    """ + NotJSONParser.__grammar__
+
+
 if "--json-code" in sys.argv:
     for r in NotJSONParser.__rules__:
         print(r._py_code)
@@ -62,17 +259,144 @@ if "--json-code" in sys.argv:
     sys.exit(0)
 
 
+class DictFailures(BaseParser):
+    p_compiler = FastidiousCompiler(compact_failures=False)
+    __grammar__ = grammar
+
+
 class NotJSONNoCodeGenParser(BaseParser):
     # __code_gen__ = False
     p_compiler = FastidiousCompiler(gen_code=False)
     __grammar__ = NotJSONParser.__grammar__
 
 
+class NotJSONNoCodeGenNoMemoizedParser(BaseParser):
+    p_compiler = FastidiousCompiler(gen_code=False, memoize=False)
+    __grammar__ = NotJSONParser.__grammar__
+
+
 class NotJSONNoMemoizedParser(Parser):
     p_compiler = FastidiousCompiler(memoize=False)
     __grammar__ = NotJSONParser.__grammar__
 
 
+class NotJSONLazyErrorsParser(Parser):
+    # error tracking compiled out, until a parsing fails
+    p_compiler = FastidiousCompiler(lazy_errors=True)
+    __grammar__ = NotJSONParser.__grammar__
+
+
+class LazyErrors(BaseParser):
+    p_compiler = FastidiousCompiler(lazy_errors=True)
+    __grammar__ = grammar
+
+
+class NotJSONStacklessParser(Parser):
+    # the recursive rules run on a heap-allocated stack
+    p_compiler = FastidiousCompiler(stackless=True)
+    __grammar__ = NotJSONParser.__grammar__
+
+
+class Stackless(BaseParser):
+    p_compiler = FastidiousCompiler(stackless=True)
+    __grammar__ = grammar
+
+
+class NotJSONDeferredParser(Parser):
+    # the nested objects and arrays are parsed when read
+    __deferred__ = ("object", "array")
+    __grammar__ = NotJSONParser.__grammar__
+
+
+class NotJSONBinaryParser(Parser):
+    # parses bytes, without decoding
+    __binary__ = True
+    __grammar__ = NotJSONParser.__grammar__
+
+
+class NotJSONDictFailuresParser(Parser):
+    # memoize failures in the memo dict, as successes
+    p_compiler = FastidiousCompiler(compact_failures=False)
+    __grammar__ = NotJSONParser.__grammar__
+
+
+class LeftRecursiveOperators(Parser):
+    __grammar__ = r"""
+        expr <- expr op term / term
+        op <- "+" / "-" / "*"
+        term <- ~"[0-9]+"
+    """
+
+
+class IterativeOperators(Parser):
+    __grammar__ = r"""
+        expr <- term (op term)*
+        op <- "+" / "-" / "*"
+        term <- ~"[0-9]+"
+    """
+
+
+class URLs(Parser):
+    __grammar__ = r"""
+        url <- scheme "://" host path? {p_flatten}
+        scheme <- "https" / "http"
+        host <- [a-z0-9.]+
+        path <- "/" [a-z0-9/._]*
+    """
+
+
+class LogLines(BaseParser):
+    # no memo and tiny results: the memory used is the input's
+    p_compiler = FastidiousCompiler(memoize=False)
+    __binary__ = True
+    __grammar__ = r"""
+        log <- line* {on_log}
+        line <- ~"[^\n]*\n" {on_line}
+    """
+
+    def on_line(self, value):
+        return None
+
+    def on_log(self, value):
+        # the memory used while the input is still referenced
+        self.__class__.memory = rss()
+        return len(value)
+
+
+def log(kilobytes):
+    line = ("127.0.0.1 - - [10/Oct/2016:13:55:36] GET /index.html 200 "
+            "referer: http://www.example.com/start.html\n")
+    return line * int(kilobytes * 1024 / len(line))
+
+
+def searchit(klass, source, rule):
+    def naive():
+        # what p_finditer replaces: a fresh parser at every offset
+        pos, found = 0, 0
+        while pos < len(source):
+            p = klass(source)
+            p.pos = pos
+            if getattr(p, rule)() is p.NoMatch:
+                pos += 1
+            else:
+                pos, found = p.pos, found + 1
+        return found
+
+    def finditer():
+        return sum(1 for _ in klass.p_finditer(source, rule))
+
+    assert naive() == finditer()
+    kb = len(source) / 1024.0
+    for func in (naive, finditer):
+        seconds = min(repeat(func, repeat=3, number=1))
+        print('%-25s: %s scanned %.1fKB in %.3fs: %.0fKB/s' % (
+            klass.__name__, func.__name__, kb, seconds, kb / seconds))
+
+
+def operators(terms):
+    return "+".join(["12", "3*45"] * (terms // 2))
+
+
 father = """{
         "id" : 1,
         "married" : true,
@@ -129,18 +453,521 @@ def benchit(klass, source, entry_point, ref=None):
     return seconds_each
 
 
+def memit(klass, source, entry_point, ref=None):
+    import tracemalloc
+    gc.collect()
+    tracemalloc.start()
+    p = klass(source)
+    getattr(p, entry_point)()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert p.p_suffix() == ""
+    failures = sum(len(chunk) for f in p._p_failures.values()
+                   for chunk in f.values())
+    var = ""
+    if ref is not None:
+        var = "(%.1f%%)" % ((ref - peak) * 100.0 / ref)
+    print('%-25s: Peak %.1fMB to parse %.1fMB, %d memo entries, '
+          '%.1fKB of failure bitsets %s' % (
+              klass.__name__, peak / 1048576.0, len(source) / 1048576.0,
+              len(p._p_memoized), failures / 1024.0, var))
+    return peak
+
+
+def codegenit(klass):
+    # size of the standalone module, time to build the parser class
+    out = StringIO()
+    klass.p_compiler.gen_py_code(klass, out)
+    attrs = {"__grammar__": klass.__grammar__,
+             "p_compiler": klass.p_compiler}
+    seconds = min(repeat(lambda: type(klass.__name__, (BaseParser, ), attrs),
+                         repeat=5, number=1))
+    print('%-25s: %.1fKB module, class created in %.1fms' % (
+        klass.__name__, len(out.getvalue()) / 1024.0, seconds * 1000))
+
+
+def rejectit(klass, sources):
+    # validation: most inputs are rejected
+    def raising():
+        for source in sources:
+            try:
+                klass.p_parse(source)
+            except ParserError as e:
+                str(e)
+
+    def trying():
+        for source in sources:
+            klass.p_try_parse(source)
+
+    for func in (raising, trying):
+        seconds = min(repeat(func, repeat=5, number=1))
+        print('%-25s: %s rejected %d inputs in %.3fs: %.0f/s' % (
+            klass.__name__, func.__name__, len(sources), seconds,
+            len(sources) / seconds))
+
+
+def nested(depth):
+    return "[" * depth + "1" + "]" * depth
+
+
+def deepit(klass, depths):
+    # the max nesting depth, and the time to parse it
+    for depth in depths:
+        source = nested(depth)
+        try:
+            seconds = min(repeat(lambda: klass.p_parse(source),
+                                 repeat=3, number=1))
+        except RuntimeError:
+            print('%-25s: depth %d: recursion error' % (klass.__name__, depth))
+            return
+        print('%-25s: depth %d parsed in %.3fs' % (
+            klass.__name__, depth, seconds))
+
+
+def deferit(klass, source, ref=None):
+    # parse, and read one top-level member
+    def parse():
+        klass.p_parse(source)[1][1]
+    seconds = min(repeat(parse, repeat=5, number=1))
+    var = "" if ref is None else "(%.1f%%)" % ((ref - seconds) * 100 / ref)
+    print('%-25s: read one member in %.3fs %s' % (
+        klass.__name__, seconds, var))
+    return seconds
+
+
+def binaryit(source):
+    # decode and parse, or parse the bytes
+    data = source.encode("utf-8")
+    ref = None
+    for name, parse in (
+            ("decode", lambda: NotJSONParser.p_parse(data.decode("utf-8"))),
+            ("bytes", lambda: NotJSONBinaryParser.p_parse(data)),
+            ("memoryview", lambda: NotJSONBinaryParser.p_parse(
+                memoryview(data)))):
+        seconds = min(repeat(parse, repeat=5, number=1))
+        var = "" if ref is None else "(%.1f%%)" % ((ref - seconds) * 100 / ref)
+        print('%-25s: %-10s %.3fs %s' % ("NotJSONParser", name, seconds, var))
+        ref = ref or seconds
+
+
+def limitit(klass, source, entry_point):
+    # the cost of the limits checks, unlimited parsings pay nothing
+    limits = ParseLimits(steps=10 ** 9, timeout=3600, max_memo=10 ** 9,
+                         progress=lambda pos: None)
+    ref = None
+    for kwargs in ({}, {"limits": limits}):
+        def parse():
+            klass.p_parse(source, entry_point, **kwargs)
+        seconds = min(repeat(parse, repeat=5, number=1))
+        var = "" if ref is None else "(%.1f%%)" % ((ref - seconds) * 100 / ref)
+        print('%-25s: %-7s %.3fs %s' % (
+            klass.__name__, "limits" if kwargs else "none", seconds, var))
+        ref = seconds
+
+
+def rss():
+    # peak RSS, and current private (anonymous) RSS in kB
+    with open("/proc/self/status") as f:
+        status = dict(line.split(":", 1) for line in f)
+    return [int(status[k].split()[0]) for k in ("VmHWM", "RssAnon")]
+
+
+def mmapchild(mode, path):
+    if mode == "read":
+        with open(path, "rb") as f:
+            lines = LogLines.p_parse(f.read())
+    else:
+        lines = LogLines.p_parse_file(path)
+    print("%s %s %s" % tuple([lines] + LogLines.memory))
+
+
+def mmapit(megabytes):
+    # peak memory of the parse of a file, read or mapped, each in a fresh
+    # process. Mapped pages are shared with the page cache: they count in
+    # the peak RSS but the OS can drop them, unlike the private memory.
+    fd, path = tempfile.mkstemp()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            chunk = log(1024).encode("ascii")
+            for _ in range(int(megabytes)):
+                f.write(chunk)
+        size = os.path.getsize(path) // 1024
+        for mode in ("read", "mmap"):
+            out = subprocess.check_output([
+                sys.executable, __file__, "--mmap-child", mode, path])
+            lines, peak, anon = out.split()
+            print('%-25s: %-5s %dMB file, peak RSS %dMB, private %dMB' % (
+                "LogLines", mode, size // 1024, int(peak) // 1024,
+                int(anon) // 1024))
+    finally:
+        os.remove(path)
+
+
+class Repeat(object):
+    # a file-like object that repeats `text` without holding the result
+    def __init__(self, text, count):
+        self.text = text
+        self.count = count
+        self.pending = ""
+
+    def read(self, size):
+        while len(self.pending) < size and self.count:
+            self.pending += self.text
+            self.count -= 1
+        chunk, self.pending = self.pending[:size], self.pending[size:]
+        return chunk
+
+
+def streamit(megabytes):
+    # peak memory of the parse of a string, or of a stream
+    import tracemalloc
+    document = father.replace("\n", " ") + "\n"
+    count = int(megabytes * 1048576 / len(document)) or 1
+    for name in ("string", "stream"):
+        source = document * count if name == "string" else None
+        gc.collect()
+        tracemalloc.start()
+        if source is None:
+            NDJSONParser.p_parse_stream(Repeat(document, count))
+        else:
+            NDJSONParser.p_parse(source)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('%-25s: %-6s peak %.1fMB to parse %.1fMB' % (
+            "NDJSONParser", name, peak / 1048576.0,
+            count * len(document) / 1048576.0))
+
+
+def iterit(megabytes):
+    # peak memory and time to go through the documents, all parsed in a
+    # list or one at a time
+    import tracemalloc
+    document = father.replace("\n", " ") + "\n"
+    count = int(megabytes * 1048576 / len(document)) or 1
+    source = document * count
+    for name, parse in (
+            ("list", lambda: NDJSONListParser.p_parse(source)),
+            ("iter", lambda: list(
+                None for _ in NotJSONParser.p_iter(source, "value"))),
+            ("stream", lambda: list(None for _ in NotJSONParser.p_iter(
+                Repeat(document, count), "value")))):
+        seconds = min(repeat(parse, repeat=3, number=1))
+        gc.collect()
+        tracemalloc.start()
+        parse()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print('%-25s: %-6s %.3fs, peak %.1fMB to parse %.1fMB' % (
+            "NotJSONParser", name, seconds, peak / 1048576.0,
+            len(source) / 1048576.0))
+
+
+def incrementit(objects):
+    # the time to parse a document again after a one-char edit in its
+    # middle, from scratch or in a session
+    source = "[" + ",".join([father] * objects) + "]"
+    middle = source.index('"id" : 1', len(source) // 2) + len('"id" : ')
+    full = min(repeat(lambda: NotJSONParser.p_parse(source),
+                      repeat=3, number=1))
+    session = ParseSession(NotJSONIncrementalParser, source)
+    digits = iter("23456789" * 100)
+
+    def edit():
+        session.edit(middle, middle + 1, next(digits))
+    seconds = min(repeat(edit, repeat=5, number=10)) / 10
+    assert session.result == NotJSONParser.p_parse(session.text)
+    print('%-25s: %.1fKB, parse %.4fs, edit and parse again %.4fs '
+          '(%.1fx)' % ("NotJSONParser", len(source) / 1024.0, full,
+                       seconds, full / seconds))
+
+
+def asyncit(megabytes):
+    # the time to parse a document in an event loop, and the longest the
+    # loop waited meanwhile: parsed in the loop, or fed to a FeedParser
+    import asyncio
+    import time
+    from fastidious.aio import FeedParser
+    count = int(megabytes * 1048576 / (len(father) + 1)) or 1
+    source = "[" + ",".join([father] * count) + "]"
+
+    def blocking():
+        return NotJSONParser.p_parse(source)
+
+    async def fed():
+        parsing = FeedParser(NotJSONParser)
+        for start in range(0, len(source), 65536):
+            parsing.feed(source[start:start + 65536])
+        parsing.feed_eof()
+        return await parsing
+
+    async def ticker(gaps):
+        last = time.monotonic()
+        while 42:
+            await asyncio.sleep(0.001)
+            now = time.monotonic()
+            gaps.append(now - last)
+            last = now
+
+    async def measure(parse):
+        gaps = []
+        tick = asyncio.ensure_future(ticker(gaps))
+        await asyncio.sleep(0.01)
+        del gaps[:]
+        start = time.monotonic()
+        result = parse()
+        if asyncio.iscoroutine(result):
+            result = await result
+        seconds = time.monotonic() - start
+        await asyncio.sleep(0.002)
+        tick.cancel()
+        return seconds, max(gaps)
+
+    for name, parse in (("blocking", blocking), ("FeedParser", fed)):
+        seconds, gap = asyncio.run(measure(parse))
+        print('%-25s: %.1fMB, %-10s %.3fs, event loop blocked %.0fms at '
+              'most' % ("NotJSONParser", len(source) / 1048576.0, name,
+                        seconds, gap * 1000))
+
+
+def structuralit(megabytes):
+    # the time to parse, to recognize, and to find the line of the end of
+    # a document of long strings and comments, scanned a char at a time,
+    # or skipped through the structural index or the regex. The index is
+    # built over the whole input first: at 1MB it is no faster than the
+    # regex skips, it can only gain on the 4MB document
+    import fastidious.parser_base
+    record = ('{"id": 1, "text": "%s" /* %s */, "tags": ["a", "b"]}' % (
+        "lorem ipsum dolor sit amet " * 8, "comment " * 8))
+    count = int(megabytes * 1048576 / (len(record) + 2)) or 1
+    source = "[" + ",\n".join([record] * count) + "]"
+    numpy = fastidious.parser_base.numpy
+    variants = [("scanned", ScannedJSONParser, numpy)]
+    if numpy is not None:
+        variants.append(("numpy index", StructuralJSONParser, numpy))
+    variants.append(("regex skips", StructuralJSONParser, None))
+    for name, klass, module in variants:
+        fastidious.parser_base.numpy = module
+        try:
+            parse = min(repeat(lambda: klass.p_parse(source), number=1,
+                               repeat=3))
+            match = min(repeat(lambda: klass.p_match(source), number=1,
+                               repeat=3))
+
+            def line_col():
+                p = klass(source)
+                p.p_line_col(len(source))
+            lines = min(repeat(line_col, number=1, repeat=3))
+        finally:
+            fastidious.parser_base.numpy = numpy
+        print('%-25s: %.1fMB, %-11s parse %.3fs, match %.3fs, line of the '
+              'end %.4fs' % (klass.__name__, len(source) / 1048576.0, name,
+                             parse, match, lines))
+
+
+def tokenit(megabytes):
+    # the time to parse and to recognize a document, with the strings, the
+    # numbers and the blanks matched char by char, or lexed in one pass
+    record = ('{"id": 12345, "text": "%s", "score": -0.125,\n'
+              ' "tags": ["a", "b", 42]}' % ("lorem ipsum dolor " * 4))
+    count = int(megabytes * 1048576 / (len(record) + 2)) or 1
+    source = "[" + ",\n".join([record] * count) + "]"
+    pairs = [(CharJSONParser, TokenJSONParser),
+             (CharJSONNoMemoizedParser, TokenJSONNoMemoizedParser)]
+    for chars, tokens in pairs:
+        assert tokens.p_parse(source) == chars.p_parse(source)
+        for klass in (chars, tokens):
+            parse = min(repeat(lambda: klass.p_parse(source), number=1,
+                               repeat=3))
+            match = min(repeat(lambda: klass.p_match(source), number=1,
+                               repeat=3))
+            print('%-26s: %.1fMB, parse %.3fs, match %.3fs' % (
+                klass.__name__, len(source) / 1048576.0, parse, match))
+
+
+def triviait(kilobytes):
+    # the time to parse and to recognize arithmetic, with the blanks
+    # matched by `_` rules or skipped by the terminals
+    expression = "(1 * 2 - 3) / 4 * (5 + -6 * 7)"
+    count = int(kilobytes * 1024 / (len(expression) + 3)) or 1
+    source = " + ".join([expression] * count)
+    pairs = [(SpacedOperators, TriviaOperators),
+             (SpacedOperatorsNoMemoized, TriviaOperatorsNoMemoized)]
+    for spaced, trivia in pairs:
+        assert spaced.p_parse(source) == trivia.p_parse(source)
+        for klass in (spaced, trivia):
+            parse = min(repeat(lambda: klass.p_parse(source), number=1,
+                               repeat=5))
+            match = min(repeat(lambda: klass.p_match(source), number=1,
+                               repeat=5))
+            print('%-26s: %.0fKB, parse %.3fs, match %.3fs' % (
+                klass.__name__, len(source) / 1024.0, parse, match))
+
+
+def classit(kilobytes):
+    # the time to parse words of letters, matched by a class that lists the
+    # latin-1 letters, by a regex, or by the Unicode category of the
+    # letters (their table, and the bisection of the ranges above latin-1)
+    sentences = [
+        (u"Le coeur a ses raisons que la raison ne connaît point",
+         (ListedWords, RegexWords, CategoryWords, ListedWordsNoCodeGen,
+          CategoryWordsNoCodeGen)),
+        (u"Тише едешь дальше будешь",
+         (RegexWords, CategoryWords, CategoryWordsNoCodeGen)),
+    ]
+    for sentence, parsers in sentences:
+        count = int(kilobytes * 1024 / (len(sentence) + 1)) or 1
+        source = " ".join([sentence] * count)
+        expected = parsers[0].p_parse(source)
+        for klass in parsers:
+            assert klass.p_parse(source) == expected
+            parse = min(repeat(lambda: klass.p_parse(source), number=1,
+                               repeat=5))
+            print('%-26s: %.0fK chars, %s, parse %.3fs' % (
+                klass.__name__, len(source) / 1024.0, sentence[:4], parse))
+
+
+def memory_json(megabytes):
+    count = int(megabytes * 1048576 / (len(father) + 1)) or 1
+    return '{"fathers" : [' + ','.join([father] * count) + ']}'
+
+
+def memory_grammar(megabytes):
+    count = int(megabytes * 1048576 / (len(grammar) + 1)) or 1
+    return '\n'.join([grammar] * count)
+
+
 if __name__ == "__main__":
+    memory = [a for a in sys.argv if a.startswith("--memory")]
+    if memory:
+        # --memory[=MB] compares the peak memory used by the packrat memo
+        # on a large input (default 1MB, try --memory=10)
+        _, _, megabytes = memory[0].partition("=")
+        source = memory_json(float(megabytes or 1))
+        ref = memit(NotJSONDictFailuresParser, source, "value")
+        memit(NotJSONParser, source, "value", ref)
+        source = memory_grammar(float(megabytes or 1))
+        ref = memit(DictFailures, source, "grammar")
+        memit(Default, source, "grammar", ref)
+        sys.exit(0)
+
+    if "--mmap-child" in sys.argv:
+        index = sys.argv.index("--mmap-child")
+        mmapchild(*sys.argv[index + 1:index + 3])
+        sys.exit(0)
+
+    mapped = [a for a in sys.argv if a.startswith("--mmap")]
+    if mapped:
+        # --mmap[=MB] compares the memory used to parse a file read in
+        # memory, or mapped (default 100MB)
+        _, _, megabytes = mapped[0].partition("=")
+        mmapit(float(megabytes or 100))
+        sys.exit(0)
+
+    if "--stream" in sys.argv:
+        for megabytes in (1, 2, 4):
+            streamit(megabytes)
+        sys.exit(0)
+
+    if "--iter" in sys.argv:
+        for megabytes in (1, 4):
+            iterit(megabytes)
+        sys.exit(0)
+
+    if "--structural" in sys.argv:
+        for megabytes in (1, 4):
+            structuralit(megabytes)
+        sys.exit(0)
+
+    if "--tokens" in sys.argv:
+        for megabytes in (1, 4):
+            tokenit(megabytes)
+        sys.exit(0)
+
+    if "--trivia" in sys.argv:
+        for kilobytes in (100, 400):
+            triviait(kilobytes)
+        sys.exit(0)
+
+    if "--classes" in sys.argv:
+        for kilobytes in (100, 400):
+            classit(kilobytes)
+        sys.exit(0)
+
+    if "--async" in sys.argv:
+        for megabytes in (1, 4):
+            asyncit(megabytes)
+        sys.exit(0)
+
+    if "--incremental" in sys.argv:
+        for objects in (10, 100, 1000):
+            incrementit(objects)
+        sys.exit(0)
+
+    if "--left-recursion" in sys.argv:
+        # the parse rate of left recursive chains must not drop with their
+        # length
+        for terms in (1000, 2000, 4000, 8000):
+            source = operators(terms)
+            ref = benchit(IterativeOperators, source, "expr")
+            benchit(LeftRecursiveOperators, source, "expr", ref)
+        sys.exit(0)
+
+    if "--search" in sys.argv:
+        searchit(URLs, log(100), "url")
+        searchit(URLs, log(100), "host")
+        sys.exit(0)
+
+    if "--codegen" in sys.argv:
+        codegenit(NotJSONParser)
+        codegenit(Default)
+        sys.exit(0)
+
+    if "--stackless" in sys.argv:
+        ref = benchit(NotJSONParser, json, "value")
+        benchit(NotJSONStacklessParser, json, "value", ref)
+        ref = benchit(Default, grammar, "grammar")
+        benchit(Stackless, grammar, "grammar", ref)
+        deepit(NotJSONParser, (100, 1000, 10000))
+        deepit(NotJSONStacklessParser, (100, 1000, 10000, 100000))
+        sys.exit(0)
+
+    if "--deferred" in sys.argv:
+        ref = deferit(NotJSONParser, json)
+        deferit(NotJSONDeferredParser, json, ref)
+        sys.exit(0)
+
+    if "--binary" in sys.argv:
+        binaryit(json)
+        sys.exit(0)
+
+    if "--limits" in sys.argv:
+        limitit(NotJSONParser, json, "value")
+        limitit(NotJSONNoMemoizedParser, json, "value")
+        limitit(Default, grammar, "grammar")
+        sys.exit(0)
+
+    if "--rejections" in sys.argv:
+        truncated = [father[:i] for i in range(1, len(father))]
+        rejectit(NotJSONParser, truncated * 5)
+        sys.exit(0)
+
     ref = benchit(NotJSONParser, json, "value")
     if "--json-only" in sys.argv:
         sys.exit(0)
     benchit(NotJSONNoCodeGenParser, json, "value", ref)
+    benchit(NotJSONNoCodeGenNoMemoizedParser, json, "value", ref)
     benchit(NotJSONNoMemoizedParser, json, "value", ref)
+    benchit(NotJSONLazyErrorsParser, json, "value", ref)
     ref = benchit(FastidiousParser, grammar, "grammar", "(base)")
     benchit(_FastidiousParserBootstraper, grammar, "grammar", ref)
     ref = benchit(Default, grammar, "grammar", "(base)")
     benchit(NoCodeGen, grammar, "grammar", ref)
     benchit(NotMemoized, grammar, "grammar", ref)
+    benchit(LazyErrors, grammar, "grammar", ref)
 
     default = Default(grammar).grammar()
     nm = NotMemoized(grammar).grammar()
     assert default == nm
+    ncg = NoCodeGen(grammar).grammar()
+    assert default == ncg
+    assert default == LazyErrors(grammar).grammar()
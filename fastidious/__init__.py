@@ -1,4 +1,8 @@
 from .parser import Parser
-from .parser_base import ParserError
+from .parser_base import (ParserError, ParseFailure, ParseLimits,
+                          ParseLimitError, LazyResult, ParseSession)
 
-__all__ = [Parser, ParserError]
+__version__ = "0.1dev0"
+
+__all__ = [Parser, ParserError, ParseFailure, ParseLimits, ParseLimitError,
+           LazyResult, ParseSession]
@@ -1,9 +1,11 @@
 import sys
 import argparse
+from pprint import pprint
 
 
 from fastidious.parser import ParserMeta, Parser
 from fastidious.compilers import gendot
+from fastidious.diskcache import parse_file
 
 
 FASTIDIOUS_MAGIC = ["__grammar__", "__default__"]
@@ -57,6 +59,15 @@ def graph(klass):
     return dot
 
 
+def parse(klass, paths, cache_dir=None, methodname=None, parse_all=True):
+    parser = load_parser(klass)
+    for path in paths:
+        if cache_dir is None:
+            yield parser.p_parse_file(path, methodname, parse_all)
+        else:
+            yield parse_file(parser, path, cache_dir, methodname, parse_all)
+
+
 # pragma: nocover
 if __name__ == "__main__":
     def _generate(args):
@@ -65,6 +76,11 @@ if __name__ == "__main__":
     def _graph(args):
         print(graph(args.classname))
 
+    def _parse(args):
+        for result in parse(args.classname, args.files, args.cache_dir,
+                            args.rule, not args.partial):
+            pprint(result)
+
     # Global parser
     parser = argparse.ArgumentParser(
         prog="fastidious",
@@ -91,6 +107,26 @@ if __name__ == "__main__":
     parser_graph.add_argument('classname')
     parser_graph.set_defaults(func=_graph)
 
+    # parse subparser
+    parser_parse = subparsers.add_parser(
+        'parse',
+        help="Parse files and print the results")
+    parser_parse.add_argument("--cache-dir", "-c",
+                              default=None,
+                              help="Cache the results in this directory")
+    parser_parse.add_argument("--rule", "-r",
+                              default=None,
+                              help="Entry point (default rule if omitted)")
+    parser_parse.add_argument("--partial", "-p",
+                              default=False,
+                              action="store_true",
+                              help="Don't require the whole file to match")
+    parser_parse.add_argument("classname",
+                              help="Name of the parser class")
+    parser_parse.add_argument("files", nargs="+",
+                              help="Files to parse")
+    parser_parse.set_defaults(func=_parse)
+
     # run the subcommand
     args = parser.parse_args()
     args.func(args)
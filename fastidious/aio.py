@@ -0,0 +1,225 @@
+"""
+Parsing in an asyncio event loop (Python 3.7+).
+
+The parsing runs `ParserMixin.p_parse_stream` in a worker thread, so that it
+doesn't block the event loop. The data is fed from the event loop, and the
+parser waits for it when it reaches the end of what was fed. Every
+`time_slice` seconds, the parser also stops until the event loop has run
+the callbacks that were ready, so that they don't wait for the interpreter
+lock behind the parsing.
+"""
+import asyncio
+import codecs
+import collections
+import copy
+import threading
+import time
+
+from fastidious.parser_base import ParseLimits, ParseLimitError
+
+
+class _FedData(object):
+    """
+    The file-like object parsed by the worker thread: `read` returns the
+    data fed so far, and blocks until there's more
+    """
+    def __init__(self, hungry, binary):
+        self.chunks = collections.deque()
+        # the offset of the unread data in chunks[0]
+        self.offset = 0
+        self.eof = False
+        self.cancelled = False
+        self.hungry = hungry
+        self.binary = binary
+        self.condition = threading.Condition()
+
+    def feed(self, data):
+        with self.condition:
+            if self.eof:
+                raise ValueError("data fed after feed_eof()")
+            if data:
+                self.chunks.append(data)
+                self.condition.notify()
+
+    def feed_eof(self):
+        with self.condition:
+            self.eof = True
+            self.condition.notify()
+
+    def cancel(self):
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify()
+
+    def read(self, size):
+        with self.condition:
+            while not self.chunks and not self.eof:
+                if self.cancelled:
+                    raise ParseLimitError("Parsing cancelled", "cancelled")
+                self.hungry()
+                self.condition.wait()
+            if not self.chunks:
+                return b"" if self.binary else ""
+            chunk = self.chunks[0]
+            data = chunk[self.offset:self.offset + size]
+            self.offset += size
+            if self.offset >= len(chunk):
+                self.chunks.popleft()
+                self.offset = 0
+            return data
+
+
+class FeedParser(object):
+    """
+    Parse the data passed to `feed()` with `parser_class`, without blocking
+    the event loop. `feed_eof()` ends the input. Await `result()`, or the
+    `FeedParser` itself, to get the result of the parsing; it's the same as
+    `parser_class.p_parse(all_the_data, methodname, parse_all, limits)`,
+    or the same `ParserError`:
+
+    .. code-block:: python
+
+        parsing = FeedParser(JSON)
+        parsing.feed('{"id": ')
+        parsing.feed('1}')
+        parsing.feed_eof()
+        result = await parsing
+
+    The data is text, or bytes for the parsers of bytes (`__binary__`).
+    The parsing starts when the result is awaited, and needs the code
+    generation (see `p_parse_stream`). The parser stops every `time_slice`
+    seconds to let the event loop run; the time is checked every
+    `limits.check_every` rule calls. Cancelling the task that awaits the
+    result aborts the parsing.
+    """
+    def __init__(self, parser_class, methodname=None, parse_all=True,
+                 limits=None, time_slice=0.01, chunk_size=16384):
+        self.parser_class = parser_class
+        self.methodname = methodname
+        self.parse_all = parse_all
+        self.limits = limits
+        self.time_slice = time_slice
+        self.chunk_size = chunk_size
+        self._data = _FedData(self._hungry, parser_class.__binary__)
+        # set by result()
+        self._loop = None
+        self._events = None
+        self._resumed = threading.Event()
+        self._worker = None
+        self._reader = None
+        self._decoder = None
+
+    def feed(self, data):
+        "Add `data` to the input"
+        self._data.feed(data)
+
+    def feed_eof(self):
+        "End the input"
+        self._data.feed_eof()
+
+    def __await__(self):
+        return self.result().__await__()
+
+    async def result(self):
+        "Parse the data, and return the result"
+        if self._loop is not None:
+            raise RuntimeError("the result of a FeedParser is awaited once")
+        self._loop = asyncio.get_running_loop()
+        self._events = asyncio.Queue()
+        self._worker = worker = threading.Thread(target=self._parse)
+        worker.daemon = True
+        worker.start()
+        try:
+            while 42:
+                event, value = await self._events.get()
+                if event == "pause":
+                    # the callbacks that were ready before ran
+                    self._resumed.set()
+                elif event == "hungry":
+                    if self._reader is not None:
+                        await self._read()
+                elif event == "error":
+                    raise value
+                else:
+                    return value
+        finally:
+            if worker.is_alive():
+                # cancelled: stop the worker where it waits or at its next
+                # check
+                self._data.cancel()
+                self._resumed.set()
+
+    async def _read(self):
+        while 42:
+            data = await self._reader.read(self.chunk_size)
+            eof = not data
+            if self._decoder is not None:
+                # a chunk may end in the middle of a char
+                data = self._decoder.decode(data, eof)
+            if data:
+                self.feed(data)
+            if eof:
+                self.feed_eof()
+            if data or eof:
+                return
+
+    def _post(self, event, value=None):
+        # from the worker thread
+        try:
+            self._loop.call_soon_threadsafe(
+                self._events.put_nowait, (event, value))
+        except RuntimeError:
+            # the event loop is closed
+            pass
+
+    def _hungry(self):
+        self._post("hungry")
+        self._slice_start = time.monotonic()
+
+    def _tick(self, pos):
+        if self._data.cancelled:
+            raise ParseLimitError("Parsing cancelled", "cancelled")
+        now = time.monotonic()
+        if now - self._slice_start < self.time_slice:
+            return
+        self._resumed.clear()
+        self._post("pause")
+        self._resumed.wait()
+        self._slice_start = time.monotonic()
+
+    def _parse(self):
+        limits = copy.copy(self.limits) if self.limits else ParseLimits()
+        progress = limits.progress
+        if progress is None:
+            limits.progress = self._tick
+        else:
+            def both(pos):
+                progress(pos)
+                self._tick(pos)
+            limits.progress = both
+        self._slice_start = time.monotonic()
+        try:
+            result = self.parser_class.p_parse_stream(
+                self._data, self.methodname, self.parse_all, limits,
+                self.chunk_size)
+        except BaseException as e:
+            self._post("error", e)
+        else:
+            self._post("result", result)
+
+
+async def parse_stream(parser_class, reader, methodname=None, parse_all=True,
+                       limits=None, time_slice=0.01, chunk_size=16384,
+                       encoding="utf-8"):
+    """
+    Parse the data of the `asyncio.StreamReader` `reader` with a
+    `FeedParser`, and return the result. The chunks are read as the parser
+    needs them. Their bytes are decoded with `encoding`, except for the
+    parsers of bytes (`__binary__`).
+    """
+    parsing = FeedParser(parser_class, methodname, parse_all, limits,
+                         time_slice, chunk_size)
+    parsing._reader = reader
+    if not parser_class.__binary__:
+        parsing._decoder = codecs.getincrementaldecoder(encoding)()
+    return await parsing.result()
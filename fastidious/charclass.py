@@ -0,0 +1,165 @@
+"""
+The code points of the char classes that have code point ranges or Unicode
+categories (`[\\u0400-\\u04ff]`, `[\\p{L}_]`), and their lookup tables: a
+table of the first 256 code points, and the sorted bounds of the ranges
+above, searched by bisection.
+"""
+import sys
+import unicodedata
+
+try:
+    from functools import lru_cache
+except ImportError:
+    # Python 2
+    def lru_cache(maxsize=None):
+        def decorator(function):
+            cache = {}
+
+            def cached(*args):
+                if args not in cache:
+                    cache[args] = function(*args)
+                return cache[args]
+            return cached
+        return decorator
+
+import six
+
+
+# the general categories, by their first letter
+CATEGORIES = {
+    "C": ("Cc", "Cf", "Cn", "Co", "Cs"),
+    "L": ("Ll", "Lm", "Lo", "Lt", "Lu"),
+    "M": ("Mc", "Me", "Mn"),
+    "N": ("Nd", "Nl", "No"),
+    "P": ("Pc", "Pd", "Pe", "Pf", "Pi", "Po", "Ps"),
+    "S": ("Sc", "Sk", "Sm", "So"),
+    "Z": ("Zl", "Zp", "Zs"),
+}
+
+# the code points the table indexes, the others are in the bounds
+TABLE_SIZE = 256
+LAST_IN_TABLE = six.unichr(TABLE_SIZE - 1)
+
+
+class UnknownCategory(Exception):
+    pass
+
+
+def merge(ranges):
+    "Sort the (first, last) `ranges`, and merge those that touch"
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def complement(ranges):
+    "The ranges of the code points that aren't in the merged `ranges`"
+    others = []
+    start = 0
+    for first, last in ranges:
+        if first > start:
+            others.append((start, first - 1))
+        start = last + 1
+    if start <= sys.maxunicode:
+        others.append((start, sys.maxunicode))
+    return others
+
+
+@lru_cache(maxsize=None)
+def _category_runs():
+    "The ranges of the code points of each general category, in one pass"
+    runs = dict((c, []) for cs in CATEGORIES.values() for c in cs)
+    category = unicodedata.category
+    start, current = 0, category(six.unichr(0))
+    for cp in range(1, sys.maxunicode + 1):
+        c = category(six.unichr(cp))
+        if c != current:
+            runs[current].append((start, cp - 1))
+            start, current = cp, c
+    runs[current].append((start, sys.maxunicode))
+    return runs
+
+
+@lru_cache(maxsize=None)
+def category_ranges(name):
+    """
+    Return the merged ranges of the code points of the general category
+    `name`, like "Lu", or of the categories starting with `name`, like "L"
+    """
+    runs = _category_runs()
+    if name in runs:
+        return tuple(runs[name])
+    if name in CATEGORIES:
+        return tuple(merge(r for c in CATEGORIES[name] for r in runs[c]))
+    raise UnknownCategory("Unknown Unicode category `%s`" % name)
+
+
+def with_cases(ranges):
+    """
+    Add the other case of the code points of the merged `ranges`: only
+    their own code points are folded
+    """
+    extra = []
+    for first, last in ranges:
+        for cp in range(first, last + 1):
+            c = six.unichr(cp)
+            for other in (c.lower(), c.upper()):
+                if len(other) == 1 and other != c:
+                    extra.append((ord(other), ord(other)))
+    return merge(list(ranges) + extra)
+
+
+def class_ranges(chars, ranges=(), categories=(), ignorecase=False):
+    """
+    Return the merged ranges of the code points of a class: its `chars`,
+    its code point `ranges`, and its `categories` (negated by a leading
+    "^")
+    """
+    found = [(ord(c), ord(c)) for c in chars] + list(ranges)
+    for name in categories:
+        if name.startswith("^"):
+            found.extend(complement(category_ranges(name[1:])))
+        else:
+            found.extend(category_ranges(name))
+    found = merge(found)
+    if ignorecase:
+        found = with_cases(found)
+    return found
+
+
+def lookup_tables(ranges):
+    """
+    Return the lookup tables of the merged `ranges`: `table` has a 1 at
+    the index of each code point below TABLE_SIZE the ranges hold, and
+    `bounds` is the tuple `(first, last + 1, ...)` of the ranges above:
+    a code point is in a range if `bisect.bisect_right(bounds, cp)` is odd
+    """
+    table = bytearray(TABLE_SIZE)
+    bounds = []
+    for first, last in ranges:
+        for cp in range(first, min(last + 1, TABLE_SIZE)):
+            table[cp] = 1
+        if last >= TABLE_SIZE:
+            bounds.extend((max(first, TABLE_SIZE), last + 1))
+    return bytes(table), tuple(bounds)
+
+
+def table_chars(table):
+    """
+    The chars of the code points `table` holds: a text parser searches
+    them with `in`, faster than Python code indexes the table
+    """
+    return u"".join(six.unichr(cp) for cp, found in enumerate(table)
+                    if found)
+
+
+def escape(cp):
+    "The escape of the code point `cp` in a class of the grammar"
+    if cp > 0xFFFF:
+        return "\\U%08x" % cp
+    return "\\u%04x" % cp
@@ -1,5 +1,10 @@
-from .sanitize import check_rulenames, check_left_recursion
+from .sanitize import (check_rulenames, check_left_recursion,
+                       left_recursion_leaders, check_recover,
+                       check_deferred, check_binary)
 from .gendot import gendot
+from .first import search_hints
+from .tokens import token_lexer, trivia_prefix
+from .newlines import may_match_newline, failure_width
 
 
 def sanitize_rules(rules):
@@ -7,4 +12,6 @@ def sanitize_rules(rules):
     check_left_recursion()
 
 
-__all__ = [check_rulenames, gendot, sanitize_rules]
+__all__ = [check_rulenames, gendot, sanitize_rules, left_recursion_leaders,
+           check_recover, check_deferred, check_binary, search_hints,
+           token_lexer, trivia_prefix, may_match_newline, failure_width]
@@ -0,0 +1,168 @@
+"""
+FIRST sets and literal prefixes of the rules, used to skip quickly to the
+positions where a rule may match (see `ParserMixin.p_finditer`).
+"""
+from fastidious.compiler.astutils import Visitor
+from fastidious.expressions import LiteralExpr, LookAhead, Not
+
+
+class FirstChars(Visitor):
+    """
+    Compute the chars a rule can start with. `visit` returns
+    `(chars, nullable)` where `chars` is a set of chars, or None if the
+    expression may start with any char, and `nullable` tells if the
+    expression may match the empty string.
+    """
+    def __init__(self, rules):
+        self.rules = dict((r.name, r) for r in rules)
+        # the recursive rules converge from an empty FIRST set
+        self.firsts = dict((name, (set(), False)) for name in self.rules)
+        changed = True
+        while changed:
+            changed = False
+            for name, rule in self.rules.items():
+                first = self.visit(rule.expr)
+                if first != self.firsts[name]:
+                    self.firsts[name] = first
+                    changed = True
+
+    def visit_ruleexpr(self, node):
+        chars, nullable = self.firsts[node.rulename]
+        return (None if chars is None else set(chars)), nullable
+
+    def visit_literalexpr(self, node):
+        if not node.lit:
+            return set(), True
+        first = node.lit[0]
+        if node.ignorecase:
+            return set([first.lower(), first.upper()]), False
+        return set([first]), False
+
+    def visit_charrangeexpr(self, node):
+        if node.is_wide:
+            # too many chars to search for
+            return None, False
+        return set(node.chars), False
+
+    def visit_anycharexpr(self, node):
+        return None, False
+
+    def visit_regexexpr(self, node):
+        return None, True
+
+    def visit_seqexpr(self, node):
+        chars = set()
+        for expr in node.exprs:
+            first, nullable = self.visit(expr)
+            if first is None:
+                return None, nullable
+            chars |= first
+            if not nullable:
+                return chars, False
+        return chars, True
+
+    def visit_choiceexpr(self, node):
+        chars, nullable = set(), False
+        for expr in node.exprs:
+            first, expr_nullable = self.visit(expr)
+            if first is None or chars is None:
+                chars = None
+            else:
+                chars |= first
+            nullable = nullable or expr_nullable
+        return chars, nullable
+
+    def visit_oneormoreexpr(self, node):
+        return self.visit(node.expr)
+
+    def visit_zeroormoreexpr(self, node):
+        return self.visit(node.expr)[0], True
+
+    visit_maybeexpr = visit_zeroormoreexpr
+
+    def visit_not(self, node):
+        # a predicate consumes nothing, the chars that follow it are a
+        # superset of the actual FIRST set
+        return set(), True
+
+    visit_lookahead = visit_not
+
+    def visit_labeledexpr(self, node):
+        return self.visit(node.expr)
+
+    visit_memoizedexpr = visit_labeledexpr
+
+
+class LiteralPrefix(Visitor):
+    """
+    Compute the literal every match of a rule starts with ("" if there's
+    none).
+    """
+    def __init__(self, rules):
+        self.rules = dict((r.name, r) for r in rules)
+        self.visiting = set()
+
+    def visit_ruleexpr(self, node):
+        if node.rulename in self.visiting:
+            # recursive rule
+            return ""
+        self.visiting.add(node.rulename)
+        try:
+            return self.visit(self.rules[node.rulename].expr)
+        finally:
+            self.visiting.discard(node.rulename)
+
+    def visit_literalexpr(self, node):
+        if node.ignorecase:
+            return ""
+        return node.lit
+
+    def visit_seqexpr(self, node):
+        prefix = ""
+        for expr in node.exprs:
+            if isinstance(expr, (Not, LookAhead)):
+                continue
+            expr_prefix = self.visit(expr)
+            prefix += expr_prefix
+            if not (isinstance(expr, LiteralExpr) and expr_prefix):
+                break
+        return prefix
+
+    def visit_choiceexpr(self, node):
+        prefixes = [self.visit(e) for e in node.exprs]
+        prefix = prefixes[0] if prefixes else ""
+        for other in prefixes[1:]:
+            while not other.startswith(prefix):
+                prefix = prefix[:-1]
+        return prefix
+
+    def visit_oneormoreexpr(self, node):
+        return self.visit(node.expr)
+
+    def visit_labeledexpr(self, node):
+        return self.visit(node.expr)
+
+    visit_memoizedexpr = visit_labeledexpr
+
+    def generic_visit(self, node):
+        return ""
+
+
+def search_hints(rules):
+    """
+    Return a dict of `rulename: (prefix, chars)`, where `prefix` is the
+    literal every match of the rule starts with, and `chars` a string of
+    the chars the rule can start with, or None if the rule may match
+    anywhere.
+    """
+    firsts = FirstChars(rules).firsts
+    prefixes = LiteralPrefix(rules)
+    hints = {}
+    for rule in rules:
+        chars, nullable = firsts[rule.name]
+        if chars is not None and not nullable:
+            chars = "".join(sorted(chars))
+        else:
+            chars = None
+        hints[rule.name] = (prefixes.visit(rule.expr), chars)
+    return hints
@@ -0,0 +1,123 @@
+"""
+Bound the chars a regex examined (see `PyCodeGen.track_examined`).
+
+A regex of single chars, whose last one may repeat, reads one char past
+its match, and no further than its fixed chars and minimum repeats when it
+fails. Another regex that can't match a newline doesn't read past the end
+of the line where it starts.
+"""
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    # before Python 3.11
+    import sre_parse
+
+NEWLINE = ord("\n")
+
+# the categories of the chars classes that hold the newline
+NEWLINE_CATEGORIES = set(getattr(sre_parse, name) for name in (
+    "CATEGORY_SPACE", "CATEGORY_NOT_DIGIT", "CATEGORY_NOT_WORD",
+    "CATEGORY_LINEBREAK"))
+
+REPEATS = set(getattr(sre_parse, name) for name in (
+    "MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_parse, name))
+
+# the opcodes that match one char
+SINGLE_CHARS = set([sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.IN,
+                    sre_parse.ANY])
+
+
+def _in_class(items):
+    "Tell if the class `items` of an IN opcode holds the newline"
+    negate, found = False, False
+    for op, av in items:
+        if op is sre_parse.NEGATE:
+            negate = True
+        elif op is sre_parse.LITERAL:
+            found = found or av == NEWLINE
+        elif op is sre_parse.RANGE:
+            found = found or av[0] <= NEWLINE <= av[1]
+        elif op is sre_parse.CATEGORY:
+            found = found or av in NEWLINE_CATEGORIES
+        else:
+            return True
+    return found != negate
+
+
+def _may_match(subpattern, dotall):
+    for op, av in subpattern:
+        if op is sre_parse.LITERAL:
+            found = av == NEWLINE
+        elif op is sre_parse.NOT_LITERAL:
+            found = av != NEWLINE
+        elif op is sre_parse.ANY:
+            found = dotall
+        elif op is sre_parse.IN:
+            found = _in_class(av)
+        elif op in REPEATS:
+            found = _may_match(av[2], dotall)
+        elif op is sre_parse.SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            found = _may_match(sub, (dotall or bool(
+                add_flags & sre_parse.SRE_FLAG_DOTALL)) and not (
+                del_flags & sre_parse.SRE_FLAG_DOTALL))
+        elif op is sre_parse.BRANCH:
+            found = any(_may_match(sub, dotall) for sub in av[1])
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            found = _may_match(av[1], dotall)
+        elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+            found = _may_match(av, dotall)
+        elif op is sre_parse.GROUPREF_EXISTS:
+            found = any(_may_match(sub, dotall) for sub in av[1:] if sub)
+        elif op in (sre_parse.AT, sre_parse.GROUPREF):
+            # the assertions match no char, the backreferences the chars
+            # of their group
+            found = False
+        else:
+            # unknown, assume it may
+            found = True
+        if found:
+            return True
+    return False
+
+
+def may_match_newline(regex):
+    "Tell if the compiled `regex` may match a newline, in any position"
+    parsed = sre_parse.parse(regex.pattern, regex.flags)
+    state = getattr(parsed, "state", None) or parsed.pattern
+    return _may_match(parsed, bool(state.flags & sre_parse.SRE_FLAG_DOTALL))
+
+
+def _single_chars(subpattern):
+    "Yield the items of `subpattern`, its groups flattened"
+    for op, av in subpattern:
+        if op is sre_parse.SUBPATTERN:
+            for item in _single_chars(av[-1]):
+                yield item
+        else:
+            yield op, av
+
+
+def failure_width(regex):
+    """
+    Return how many chars the compiled `regex` may examine when it fails,
+    or None when it may also read past the char that follows its match.
+
+    The regexes bounded are sequences of single chars, the last of which
+    may repeat, such as ``[0-9]``, ``\\s*`` or ``"[^"]*``: they don't
+    backtrack. The others may, and their lookarounds and backreferences
+    read chars they don't match.
+    """
+    items = list(_single_chars(sre_parse.parse(regex.pattern, regex.flags)))
+    width = 0
+    if items and items[-1][0] in REPEATS:
+        low, _, repeated = items.pop()[1]
+        if len(repeated) != 1 or repeated[0][0] not in SINGLE_CHARS:
+            return None
+        width = low
+    for op, av in items:
+        if op not in SINGLE_CHARS:
+            return None
+        width += 1
+    return width
@@ -13,6 +13,10 @@ class LeftRecursion(Exception):
     pass
 
 
+class NotBinary(Exception):
+    pass
+
+
 class RuleNameChecker(Visitor):
     def __init__(self):
         self.current_rule = None
@@ -58,11 +62,69 @@ def _dedup(lst):
     return lst
 
 
+def check_recover(rules, recover):
+    """
+    Check that the rules of the `__recover__` mapping of a parser exist
+    """
+    rulenames = set(r.name for r in rules)
+    for name, sync in sorted(recover.items()):
+        for rulename in (name, sync):
+            if rulename not in rulenames:
+                raise UnknownRule(
+                    "Rule `%s` referenced in __recover__ is not defined" % (
+                        rulename))
+
+
+def check_deferred(rules, deferred):
+    """
+    Check that the rules of the `__deferred__` list of a parser exist
+    """
+    rulenames = set(r.name for r in rules)
+    for rulename in deferred:
+        if rulename not in rulenames:
+            raise UnknownRule(
+                "Rule `%s` referenced in __deferred__ is not defined" % (
+                    rulename))
+
+
+class BinaryChecker(Visitor):
+    "Check that the terminals only match latin-1 chars, i.e. bytes"
+    def check(self, node, text):
+        try:
+            text.encode("latin-1")
+        except UnicodeEncodeError:
+            raise NotBinary("`%s` can't match bytes" % node.as_grammar())
+
+    def visit_literalexpr(self, node):
+        self.check(node, node.lit)
+
+    def visit_charrangeexpr(self, node):
+        self.check(node, node.chars)
+        # the ranges and categories match their latin-1 code points
+        if any(first > 0xFF for first, _ in node.ranges):
+            raise NotBinary("`%s` can't match bytes" % node.as_grammar())
+
+    def visit_regexexpr(self, node):
+        self.check(node, node.lit)
+
+
+def check_binary(rules):
+    """
+    Check that the rules of a parser of bytes (`__binary__`) only match
+    bytes
+    """
+    checker = BinaryChecker()
+    for rule in rules:
+        checker.visit(rule)
+
+
 class LeftRecursionChecker(Visitor):
     def __init__(self):
         self.leftmosts = {}
+        self.rulenames = []
 
     def visit_rule(self, node):
+        self.rulenames.append(node.name)
         self.leftmosts[node.name] = _dedup(self.visit(node.expr))
 
     def visit_seqexpr(self, node):
@@ -81,12 +143,16 @@ class LeftRecursionChecker(Visitor):
     def visit_labeledexpr(self, node):
         return self.visit(node.expr)
 
+    def visit_memoizedexpr(self, node):
+        return self.visit(node.expr)
+
     def generic_action(self, node):
         return []
 
-    def check_rules(self, rules):
-        for r in rules:
-            self.visit(r)
+    def check_rules(self, rules, raise_error=True):
+        if not self.leftmosts:
+            for r in rules:
+                self.visit(r)
 
         # expand the found left expressions to their own left expressions too
         changed = True
@@ -101,6 +167,8 @@ class LeftRecursionChecker(Visitor):
                     changed = True
                     self.leftmosts[rule] = expanded
 
+        if not raise_error:
+            return
         # find the recursions
         for rule, lefts in self.leftmosts.items():
             for l in lefts:
@@ -109,6 +177,69 @@ class LeftRecursionChecker(Visitor):
                         "rule `%s` and `%s` are left recursive"
                         " (maybe through another rule)" % (rule, l))
 
+    def _is_acyclic(self, names):
+        # Kahn's algorithm on the left calls restricted to `names`
+        names = set(names)
+        callers = dict((n, 0) for n in names)
+        for n in names:
+            for l in set(self.leftmosts.get(n, [])) & names:
+                callers[l] += 1
+        ready = [n for n, c in callers.items() if c == 0]
+        seen = 0
+        while ready:
+            n = ready.pop()
+            seen += 1
+            for l in set(self.leftmosts.get(n, [])) & names:
+                callers[l] -= 1
+                if callers[l] == 0:
+                    ready.append(l)
+        return seen == len(names)
+
+    def leaders(self, rules):
+        """
+        Return the set of rules that are left recursive (through any path),
+        and the set of their leaders: one rule per group of mutually left
+        recursive rules, that is part of every left recursion cycle of its
+        group.
+        """
+        for r in rules:
+            self.visit(r)
+        # direct left calls, before the expansion done in check_rules
+        calls = dict((k, list(v)) for k, v in self.leftmosts.items())
+        self.check_rules(rules, raise_error=False)
+        expanded = self.leftmosts
+        self.leftmosts = calls
+
+        involved = set()
+        leaders = set()
+        for rule in self.rulenames:
+            if rule in involved or rule not in expanded.get(rule, []):
+                continue
+            # the group of mutually left recursive rules
+            lefts = expanded[rule]
+            group = [r for r in self.rulenames
+                     if r in lefts and rule in expanded.get(r, [])]
+            involved.update(group)
+            for candidate in group:
+                if self._is_acyclic([r for r in group if r != candidate]):
+                    leaders.add(candidate)
+                    break
+            else:
+                raise LeftRecursion(
+                    "rules %s are left recursive, but no rule is part of"
+                    " all the recursion cycles" % ", ".join(
+                        "`%s`" % r for r in group))
+        return involved, leaders
+
 
 def check_left_recursion(rules):
     LeftRecursionChecker().check_rules(rules)
+
+
+def left_recursion_leaders(rules):
+    """
+    Return `(involved, leaders)`: the names of the left recursive rules, and
+    the names of the rules that grow their match through the memo (see
+    `LeftRecursionChecker.leaders`).
+    """
+    return LeftRecursionChecker().leaders(rules)
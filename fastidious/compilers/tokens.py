@@ -0,0 +1,159 @@
+"""
+The master regex of the token rules of a parser (`__tokens__`): the lexer
+that splits the input into tokens (see `ParserMixin.p_token`), and the
+regexes of the terminals that skip the trivia first (`__trivia__`).
+"""
+import re
+import sys
+
+import six
+
+from fastidious.compiler.astutils import Visitor
+from fastidious.compiler.action.pyclass import _SimpleArgAction
+from fastidious.compilers.sanitize import UnknownRule
+
+# Python 3.11 has atomic groups, the older versions emulate them with a
+# lookahead and a backreference
+ATOMIC_GROUPS = sys.version_info >= (3, 11)
+
+
+class NotAToken(Exception):
+    pass
+
+
+class TokenRegex(Visitor):
+    """
+    Translate the expression of a token rule to a regex that matches what
+    the rule matches. The PEG operators commit to their first match, the
+    repetitions and the choices are atomic groups.
+    """
+    def __init__(self, rules, binary=False):
+        self.rules = dict((r.name, r) for r in rules)
+        # the wide char classes only match their latin-1 code points
+        self.binary = binary
+        self.visiting = []
+        # the number of emulated atomic groups, that name them
+        self.groups = 0
+
+    def atomic(self, pattern):
+        if ATOMIC_GROUPS:
+            return "(?>%s)" % pattern
+        self.groups += 1
+        return "(?=(?P<_a{0}>{1}))(?P=_a{0})".format(self.groups, pattern)
+
+    def visit_rule(self, node):
+        self.visiting.append(node.name)
+        try:
+            return self.visit(node.expr)
+        finally:
+            self.visiting.pop()
+
+    def visit_ruleexpr(self, node):
+        if node.rulename in self.visiting:
+            raise NotAToken("`%s` is recursive, it can't be a token" % (
+                self.visiting[0]))
+        return self.visit(self.rules[node.rulename])
+
+    def visit_literalexpr(self, node):
+        pattern = re.escape(node.lit)
+        if node.ignorecase and pattern:
+            return "(?i:%s)" % pattern
+        return pattern
+
+    def visit_charrangeexpr(self, node):
+        if node.is_wide:
+            ranges = node.code_points()
+            if self.binary:
+                ranges = [(first, min(last, 0xFF))
+                          for first, last in ranges if first <= 0xFF]
+            if not ranges:
+                return "(?!)"
+            return "[%s]" % "".join(
+                re.escape(six.unichr(first)) if first == last else
+                "%s-%s" % (re.escape(six.unichr(first)),
+                           re.escape(six.unichr(last)))
+                for first, last in ranges)
+        if not node.chars:
+            return "(?!)"
+        return "[%s]" % "".join(re.escape(c) for c in node.chars)
+
+    def visit_anycharexpr(self, node):
+        return "(?s:.)"
+
+    def visit_regexexpr(self, node):
+        pattern = node.lit
+        if node.flags:
+            if not set(node.flags) <= set("imsx"):
+                raise NotAToken(
+                    "`%s`: the flags of a token regex are i, m, s or x" % (
+                        node.as_grammar()))
+            pattern = "(?%s:%s)" % (node.flags, pattern)
+        # the regex runs once, its match isn't backtracked into
+        return self.atomic(pattern)
+
+    def visit_seqexpr(self, node):
+        return "".join(self.visit(e) for e in node.exprs)
+
+    def visit_choiceexpr(self, node):
+        return self.atomic("|".join(self.visit(e) for e in node.exprs))
+
+    def visit_zeroormoreexpr(self, node):
+        return self.atomic("(?:%s)*" % self.visit(node.expr))
+
+    def visit_oneormoreexpr(self, node):
+        return self.atomic("(?:%s)+" % self.visit(node.expr))
+
+    def visit_maybeexpr(self, node):
+        return self.atomic("(?:%s)?" % self.visit(node.expr))
+
+    def visit_not(self, node):
+        return "(?!%s)" % self.visit(node.expr)
+
+    def visit_lookahead(self, node):
+        return "(?=%s)" % self.visit(node.expr)
+
+    def visit_labeledexpr(self, node):
+        return self.visit(node.expr)
+
+    visit_memoizedexpr = visit_labeledexpr
+
+
+def token_lexer(rules, tokens, binary=False):
+    """
+    Return the master regex of the rules named in `tokens`, and a dict of
+    `{group index: kind}`: the match of the regex is the first token that
+    matches, in the group of its kind, its index in `tokens`.
+    """
+    rulenames = dict((r.name, r) for r in rules)
+    translate = TokenRegex(rules, binary)
+    alternatives = []
+    for kind, name in enumerate(tokens):
+        if name not in rulenames:
+            raise UnknownRule(
+                "Rule `%s` referenced in __tokens__ is not defined" % name)
+        rule = rulenames[name]
+        if isinstance(rule.action, _SimpleArgAction):
+            raise NotAToken("token `%s` has no labels, its action gets its "
+                            "text" % name)
+        pattern = translate.visit(rule)
+        if re.compile(pattern).match(""):
+            raise NotAToken("token `%s` matches an empty string" % name)
+        alternatives.append("(?P<_t%d>%s)" % (kind, pattern))
+    pattern = "|".join(alternatives)
+    if binary:
+        pattern = pattern.encode("latin-1")
+    lexer = re.compile(pattern)
+    kinds = dict((lexer.groupindex["_t%d" % kind], kind)
+                 for kind in range(len(tokens)))
+    return lexer, kinds
+
+
+def trivia_prefix(pattern):
+    """
+    Return the regex that skips any number of the trivia matched by
+    `pattern`, without backtracking into them
+    """
+    pattern = "(?:%s)*" % pattern
+    if ATOMIC_GROUPS:
+        return "(?>%s)" % pattern
+    return "(?=(?P<_trivia>{0}))(?P=_trivia)".format(pattern)
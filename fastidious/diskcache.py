@@ -0,0 +1,183 @@
+"""
+Persistent on-disk cache of parse results.
+
+Results are pickled in a cache directory. The cache key is the hash of the
+parsed content plus a fingerprint of the parser (fastidious version, python
+version, compiler settings, grammar and actions), so any change to one of
+them invalidates the cached results.
+"""
+import hashlib
+import inspect
+import os
+import sys
+import tempfile
+
+import six
+from six.moves import cPickle as pickle
+
+import fastidious
+from fastidious.parser_base import _map_file
+
+
+def _code_fingerprint(code):
+    # marshal.dumps() output depends on refcounts, and line numbers don't
+    # matter. Hash the bytecode, names and constants instead
+    parts = [code.co_code, repr(code.co_names).encode("utf-8"),
+             repr(code.co_varnames).encode("utf-8")]
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            parts.append(_code_fingerprint(const))
+        elif isinstance(const, frozenset):
+            # the order of sets changes between processes
+            parts.append(repr(sorted(repr(c) for c in const)).encode(
+                "utf-8"))
+        else:
+            parts.append(repr(const).encode("utf-8"))
+    return b"\0".join(parts)
+
+
+def parser_fingerprint(parser):
+    """
+    Return a hex digest that changes when the grammar, the actions, the
+    compiler settings of `parser`, or the fastidious version change.
+    """
+    fingerprint = parser.__dict__.get("_p_fingerprint")
+    if fingerprint is not None:
+        return fingerprint
+    h = hashlib.sha256()
+
+    def update(value):
+        if isinstance(value, six.text_type):
+            value = value.encode("utf-8")
+        h.update(value)
+        h.update(b"\0")
+
+    update(fastidious.__version__)
+    update(sys.version)
+    compiler = parser.p_compiler
+    update("%s.%s" % (type(compiler).__module__, type(compiler).__name__))
+    update(repr(sorted(vars(compiler).items())))
+    update(repr(parser.__default__))
+    for rule in parser.__rules__:
+        update(rule.as_grammar())
+    # the actions and helpers written by the user. The generated methods
+    # are already covered by the grammar
+    rulenames = set(r.name for r in parser.__rules__)
+    for name in sorted(dir(parser)):
+        if name in rulenames:
+            continue
+        attr = inspect.getattr_static(parser, name) if six.PY3 else getattr(
+            parser, name)
+        attr = getattr(attr, "__func__", attr)
+        if getattr(attr, "_p_generated", False):
+            continue
+        if inspect.isfunction(attr):
+            update(name)
+            update(_code_fingerprint(six.get_function_code(attr)))
+    fingerprint = h.hexdigest()
+    parser._p_fingerprint = fingerprint
+    return fingerprint
+
+
+class DiskCache(object):
+    """
+    A directory of pickled parse results.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+
+    def key(self, parser, content, methodname=None, parse_all=True):
+        "Return the cache key of `content` parsed by `parser`"
+        if methodname is None:
+            methodname = parser.__default__
+        if isinstance(content, six.text_type):
+            content = content.encode("utf-8")
+        h = hashlib.sha256()
+        for part in (parser_fingerprint(parser), methodname,
+                     repr(bool(parse_all))):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        h.update(content)
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".pickle")
+
+    def load(self, key):
+        """
+        Return `(True, result)` if `key` is in the cache, `(False, None)`
+        otherwise. Unreadable entries count as misses.
+        """
+        try:
+            with open(self.path(key), "rb") as f:
+                return True, pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError, IndexError, TypeError,
+                ValueError):
+            return False, None
+
+    def store(self, key, result):
+        """
+        Pickle `result` under `key`. Return False if the result can't be
+        pickled.
+        """
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # created by a concurrent process
+                if not os.path.isdir(directory):
+                    raise
+        try:
+            data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        # write atomically, concurrent readers never see partial entries
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            if six.PY3:
+                os.replace(tmp, path)
+            else:
+                os.rename(tmp, path)
+        except Exception:
+            os.unlink(tmp)
+            raise
+        return True
+
+    def parse(self, parser, content, methodname=None, parse_all=True,
+              encoding="utf-8"):
+        """
+        Return the result of `parser.p_parse(content)`, from the cache if
+        possible. Bytes contents are decoded with `encoding` before parsing,
+        unless the parser parses bytes (`__binary__`).
+        """
+        key = self.key(parser, content, methodname, parse_all)
+        found, result = self.load(key)
+        if found:
+            return result
+        if isinstance(content, six.binary_type) and not parser.__binary__:
+            content = content.decode(encoding)
+        result = parser.p_parse(content, methodname, parse_all)
+        self.store(key, result)
+        return result
+
+
+def parse_file(parser, path, cache_dir, methodname=None, parse_all=True,
+               encoding="utf-8"):
+    """
+    Parse the file at `path` with `parser`, and cache the result in
+    `cache_dir`. Later calls on the same content load the cached result
+    instead of parsing.
+    """
+    if parser.__binary__:
+        # hashed and parsed in place
+        content = _map_file(path)
+    else:
+        with open(path, "rb") as f:
+            content = f.read()
+    return DiskCache(cache_dir).parse(parser, content, methodname,
+                                      parse_all, encoding)
@@ -1,10 +1,24 @@
+import bisect
+import hashlib
 import re
 
 import six
 
+from fastidious import charclass
+
 
 if six.PY2:
     from types import UnboundMethodType
+else:
+    from types import MethodType
+
+
+def stable_hash(text):
+    """
+    The hash of `text`, used as a memo key: unlike hash(), it is the same
+    in every process, and so is the generated code (see diskcache)
+    """
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:15], 16)
 
 
 class ExprMixin(object):
@@ -63,7 +77,7 @@ class ExprProxi(ExprMixin):
 
     @property
     def id(self):
-        self.proxied.id
+        return self.proxied.id
 
 
 class AtomicExpr(object):
@@ -79,14 +93,12 @@ class RegexExpr(ExprMixin):
 
     def __call__(self, parser):
         self.debug(parser, "RegexExpr `{}`".format(self.lit))
-        m = self.re.match(parser.p_suffix())
+        m = self.re.match(parser.input, parser.pos)
         if m is None:
             parser.p_nomatch(self.id)
             return parser.NoMatch
-        end = m.end()
-        result = parser.p_suffix(end)
-        parser.pos += end
-        return result
+        parser.pos = m.end()
+        return m.group()
 
     def as_grammar(self, atomic=False):
         return "~{}{}".format(repr(self.lit), self.flags or "")
@@ -202,15 +214,49 @@ class LiteralExpr(ExprMixin, AtomicExpr):
 
 
 class CharRangeExpr(ExprMixin, AtomicExpr):
-    def __init__(self, chars, terminal=False):
+    def __init__(self, chars, terminal=False, ranges=(), categories=(),
+                 ignorecase=False):
         ExprMixin.__init__(self, chars, terminal=terminal)
         self.chars = chars
+        # the (first, last) code point ranges, and the Unicode categories
+        # ("L", or "^L" for \P{L}), matched through lookup tables
+        self.ranges = tuple(ranges)
+        self.categories = tuple(categories)
+        # `chars` are already in both cases, not the ranges
+        self.ignorecase = ignorecase
+        self.is_wide = bool(self.ranges or self.categories)
+        self._tables = None
+        self._low_chars = None
+
+    def code_points(self):
+        "The merged (first, last) ranges of the code points of the class"
+        return charclass.class_ranges(self.chars, self.ranges,
+                                      self.categories, self.ignorecase)
+
+    def lookup_tables(self):
+        "The `(table, bounds)` of the class, see charclass.lookup_tables"
+        if self._tables is None:
+            self._tables = charclass.lookup_tables(self.code_points())
+        return self._tables
+
+    def low_chars(self):
+        "The chars of the class in the table, see charclass.table_chars"
+        if self._low_chars is None:
+            self._low_chars = charclass.table_chars(self.lookup_tables()[0])
+        return self._low_chars
+
+    def in_tables(self, char):
+        if char in (self._low_chars or self.low_chars()):
+            return True
+        return char > charclass.LAST_IN_TABLE and bisect.bisect_right(
+            self.lookup_tables()[1], ord(char)) & 1
 
     def __call__(self, parser):
         self.debug(parser, "CharRangeExpr `{}`".format(self.chars))
         parser.p_save()
         n = parser.p_next()
-        if n is not None and n in self.chars:
+        if n is not None and (
+                n in self.chars or self.is_wide and self.in_tables(n)):
             parser.p_discard()
             return n
         parser.p_restore()
@@ -225,7 +271,16 @@ class CharRangeExpr(ExprMixin, AtomicExpr):
         chars = chars.replace("abcdefghijklmnopqrstuvwxyz", "a-z")
         chars = chars.replace("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "A-Z")
         chars = chars.replace("0123456789", "0-9")
-        return "[{}]".format(chars)
+        for first, last in self.ranges:
+            chars += "{}-{}".format(charclass.escape(first),
+                                    charclass.escape(last))
+        for name in self.categories:
+            if name.startswith("^"):
+                chars += "\\P{%s}" % name[1:]
+            else:
+                chars += "\\p{%s}" % name
+        ignore = self.ignorecase and self.is_wide and "i" or ""
+        return "[{}]{}".format(chars, ignore)
 
 
 class OneOrMoreExpr(ExprMixin):
@@ -299,7 +354,7 @@ class RuleExpr(ExprMixin, AtomicExpr):
         return self.rulename
 
     def memoize(self, code):
-        pk = hash(self.as_grammar())
+        pk = stable_hash(self.as_grammar())
         return"""
 start_pos_{2}= self.pos
 if ({0}, start_pos_{2}) in self._p_memoized:
@@ -386,7 +441,8 @@ class LabeledExpr(ExprMixin, AtomicExpr):
     def __call__(self, parser):
         self.debug(parser, "LabeledExpr `{}`".format(self.name))
         parser._debug_indent += 1
-        rule = getattr(parser, self.rulename)
+        # from the class, the instance may wrap the rule (see p_recover)
+        rule = getattr(type(parser), self.rulename)
         result = self.expr(parser)
         rule.args_stack[-1][self.name] = result
         parser._debug_indent -= 1
@@ -407,6 +463,9 @@ class Rule(ExprMixin):
         if alias is not None and not isinstance(
                 alias, six.string_types) and alias.__name__ == "NoMatch":
             alias = None
+        # marked with a backtick: its chars are matched without skipping
+        # the trivia
+        self.is_lexical = terminal
         if alias:
             terminal = True
         elif terminal and name.isupper():
@@ -415,6 +474,12 @@ class Rule(ExprMixin):
         self.is_syntaxic_terminal = terminal
 
     def __call__(self, parser):
+        if getattr(self, "left_recursive", False):
+            return parser.p_left_recursion(stable_hash(self.name),
+                                           lambda: self._match(parser))
+        return self._match(parser)
+
+    def _match(self, parser):
         self.args_stack.append({})
         result = self.expr(parser)
         args = self.args_stack.pop()
@@ -434,6 +499,12 @@ class Rule(ExprMixin):
         parser.p_nomatch(self.id)
         return result
 
+    def __get__(self, obj, objtype=None):
+        # attached rules behave like methods on python 3
+        if obj is None:
+            return self
+        return MethodType(self, obj)
+
     def _attach_to(self, parser):
         if six.PY3:
             m = self
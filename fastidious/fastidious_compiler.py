@@ -1,18 +1,32 @@
 """
 Fastidious parser compiler and utils.
 """
+# the generated methods of the wide char classes bisect in this namespace
+import bisect  # noqa: F401
 import sys
 import re
 import string
 import inspect
+import threading
 
 import six
 
-from fastidious.expressions import CharRangeExpr, AnyCharExpr, ExprProxi
+from fastidious import charclass
+from fastidious.expressions import (CharRangeExpr, AnyCharExpr, ExprProxi,
+                                    LiteralExpr, Not, RegexExpr, RuleExpr,
+                                    SeqExpr, stable_hash)
 from fastidious.compiler.astutils import Visitor, Mutator
-from fastidious.compilers import check_rulenames, check_left_recursion
+from fastidious.compilers import (check_rulenames, left_recursion_leaders,
+                                  check_recover, check_deferred,
+                                  check_binary, search_hints, token_lexer,
+                                  trivia_prefix, may_match_newline,
+                                  failure_width)
+from fastidious.compilers.sanitize import LeftRecursion
+from fastidious.compilers.tokens import TokenRegex
 from fastidious.compiler.action.pyclass import SimplePyAction
 from fastidious.compiler.pyutils import indent
+from fastidious.parser_base import (FAILURE_CHUNK_BITS, FAILURE_CHUNK_BYTES,
+                                    FAILURE_BYTE_MASK)
 
 if six.PY3:
     from types import FunctionType
@@ -23,6 +37,12 @@ else:
     UPPERCASE = string.uppercase
     LOWERCASE = string.lowercase
 
+# the expressions that match chars
+TERMINALS = (LiteralExpr, CharRangeExpr, AnyCharExpr, RegexExpr)
+
+# the recognizers generated on first use share the expressions of the rules
+_recognizers_lock = threading.Lock()
+
 
 class _RuleNameToCaptures(Visitor):
     def __init__(self, rules):
@@ -52,40 +72,300 @@ class _register_expressions(Visitor):
         self.klass._p_expressions[node.id] = node
 
 
+class _rule_expression_ids(Visitor):
+    "Iterate over the ids of the expressions of `rules`"
+    def __init__(self, rules):
+        self.ids = []
+        for rule in rules:
+            self.visit(rule)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def generic_action(self, node):
+        self.ids.append(node.id)
+
+
+class _called_rules(Visitor):
+    "The names of the rules called by an expression"
+    def __init__(self, expr):
+        self.names = set()
+        self.visit(expr)
+
+    def visit_ruleexpr(self, node):
+        self.names.add(node.rulename)
+
+
+class _predicate_calls(Visitor):
+    "The names of the rules called within the `&` and `!` predicates"
+    def __init__(self, rules):
+        self.names = set()
+        for rule in rules:
+            self.visit(rule.expr)
+
+    def visit_not(self, node):
+        self.names.update(_called_rules(node.expr).names)
+
+    visit_lookahead = visit_not
+
+
+def _recognized_rules(rules, deferred=()):
+    """
+    The rules whose recognizers run while parsing: the rules called by the
+    predicates, the `deferred` rules, and the rules they call
+    """
+    by_name = dict((r.name, r) for r in rules)
+    recognized = set()
+    todo = list(_predicate_calls(rules).names) + list(deferred)
+    while todo:
+        name = todo.pop()
+        if name in recognized or name not in by_name:
+            continue
+        recognized.add(name)
+        todo.extend(_called_rules(by_name[name].expr).names)
+    return recognized
+
+
+def _lexical_rules(rules, tokens=()):
+    """
+    The rules that match their chars without skipping the trivia: the
+    `tokens`, the rules marked with a backtick, and the rules they call
+    """
+    by_name = dict((r.name, r) for r in rules)
+    lexical = set()
+    todo = [r.name for r in rules if r.name in tokens or r.is_lexical]
+    while todo:
+        name = todo.pop()
+        if name in lexical or name not in by_name:
+            continue
+        lexical.add(name)
+        todo.extend(_called_rules(by_name[name].expr).names)
+    return lexical
+
+
+def _leaf_rules(rules, deferred=frozenset()):
+    """
+    The rules that can't recurse, i.e. that only call leaf rules, or the
+    `deferred` rules. The stackless parsers run them as plain methods.
+    """
+    calls = dict((r.name, _called_rules(r.expr).names) for r in rules)
+    leaves = set()
+    grown = True
+    while grown:
+        grown = False
+        for rule in rules:
+            if rule.name in leaves or getattr(rule, "left_recursive", False):
+                continue
+            if calls[rule.name] - deferred <= leaves:
+                leaves.add(rule.name)
+                grown = True
+    return leaves
+
+
 class PySetConstants(Visitor):
-    def __init__(self, parser):
+    def __init__(self, parser, trivia="", lexical=frozenset()):
         self.parser = parser
         self.parser._p_py_constants = dict()
+        # the regex prefix of the terminals, see PyCodeGen.fold_trivia
+        self.trivia = trivia
+        self.lexical = lexical
+        self.translate = TokenRegex(parser.__rules__, parser.__binary__)
         for rule in parser.__rules__:
+            self.folded = bool(trivia) and rule.name not in lexical
             self.visit(rule)
 
     def node_consts(self, node):
         return self.parser._p_py_constants.setdefault(node.id, dict())
 
+    def compile(self, node, pattern):
+        if self.parser.__binary__:
+            pattern = pattern.encode("latin-1")
+        self.node_consts(node)["regex"] = re.compile(pattern)
+
     def visit_regexexpr(self, node):
-        consts = self.node_consts(node)
-        consts["regex"] = re.compile(node._full_regexp())
+        if self.folded:
+            return self.fold_trivia(node)
+        self.compile(node, node._full_regexp())
+
+    def fold_trivia(self, node):
+        "The terminal matches in the group that follows the trivia"
+        if isinstance(node, LiteralExpr) and not node.lit:
+            return
+        self.compile(node, "%s(%s)?" % (self.trivia,
+                                        self.translate.visit(node)))
+
+    def visit_literalexpr(self, node):
+        if self.folded:
+            self.fold_trivia(node)
+
+    visit_anycharexpr = visit_literalexpr
+
+    def visit_charrangeexpr(self, node):
+        if self.folded:
+            return self.fold_trivia(node)
+        if node.is_wide:
+            consts = self.node_consts(node)
+            consts["table"], consts["bounds"] = node.lookup_tables()
+
+    def visit_ruleexpr(self, node):
+        if self.folded and node.rulename in self.lexical:
+            # the trivia skipped before the call
+            self.compile(node, self.trivia)
 
 
 class PyCodeGen(Visitor):
-    def __init__(self, debug):
+    def __init__(self, debug, report_errors=True, prefix="", stackless=False,
+                 deferred=frozenset(), binary=False, incremental=False,
+                 structural="", tokens={}, trivia="", lexical=frozenset()):
         self.debug = debug
+        # False compiles the error bookkeeping out
+        self.report_errors = report_errors
+        # prepended to the names of the generated methods
+        self.prefix = prefix
+        # the rules, except the leaves, are generators run by `p_run`
+        self.stackless = stackless
+        self.leaves = self.match_leaves = set()
+        # the rules that return a `LazyResult`
+        self.deferred = deferred
+        # the input is bytes-like, the terminals match and return bytes
+        self.binary = binary
+        # the memo records the span of input examined by each entry, see
+        # ParseSession
+        self.incremental = incremental
+        # the chars the `(!stop .)` repetitions can skip to, see
+        # ParserMixin.p_skip_until
+        self.structural = structural
+        # the kinds of the token rules, matched by ParserMixin.p_token
+        self.tokens = tokens
+        # the terminals of the rules that aren't `lexical` skip the trivia
+        # matched by this regex prefix, in the same regex match
+        self.trivia = trivia
+        self.lexical = lexical
+        self.trivia_group = re.compile(trivia).groups + 1 if trivia else 0
+        self.folded = False
+
+    def __call__(self, parser, names=None):
+        "Generate the code of the rules of `parser`, or of the rules `names`"
+        if self.stackless:
+            self.set_leaves(parser.__rules__)
+        parser.__rules__ = [
+            self.visit(r) if names is None or r.name in names else r
+            for r in parser.__rules__]
+
+    def visit(self, node):
+        if self.folded and isinstance(node, TERMINALS):
+            result = self.fold_trivia(node)
+        else:
+            result = Visitor.visit(self, node)
+        if self.folded and isinstance(node, RuleExpr):
+            self.skip_trivia(node)
+        if self.incremental:
+            self.track_examined(node)
+        return result
+
+    def fold_trivia(self, node):
+        """
+        Set the code of the terminal `node`, that skips the trivia before
+        its match. It runs the regex of PySetConstants.fold_trivia.
+        """
+        if isinstance(node, LiteralExpr) and not node.lit:
+            return Visitor.visit(self, node)
+        if self.report_errors:
+            # the failure is where the terminal was expected
+            error = """
+pos_{0} = self.pos
+self.pos = m.end()
+self.p_nomatch({0})
+self.pos = pos_{0}
+            """.format(node.id).strip()
+        else:
+            error = "pass"
+        code = """
+# {0}
+m = self._p_py_constants[{1}]["regex"].match(self.input, self.pos)
+if m.start({2}) != -1:
+    result = {3}
+    self.pos = m.end()
+else:
+{4}
+    result = self.NoMatch
+        """.format(
+            node.as_grammar(),
+            node.id,
+            self.trivia_group,
+            self.folded_result(),
+            indent(error, 1),
+        )
+        node._py_code = code.strip()
 
-    def __call__(self, parser):
-        parser.__rules__ = [self.visit(r) for r in parser.__rules__]
+    def folded_result(self):
+        "The result of a terminal that skipped the trivia"
+        if self.binary:
+            # m.group() copies memoryviews
+            return "self.input[m.start({0}):m.end({0})]".format(
+                self.trivia_group)
+        return "m.group({})".format(self.trivia_group)
+
+    def skip_trivia(self, node):
+        "Skip the trivia before the call of a lexical rule"
+        if node.rulename not in self.lexical:
+            return
+        node._py_code = """
+pos_{0} = self.pos
+trivia = self._p_py_constants[{0}]["regex"]
+self.pos = trivia.match(self.input, self.pos).end()
+{1}
+if result is self.NoMatch:
+    self.pos = pos_{0}
+        """.format(node.id, node._py_code).strip()
+
+    def track_examined(self, node):
+        """
+        Add to the code of a terminal the update of `_p_examined`, the
+        furthest position examined by the memoized expression being parsed
+        """
+        if isinstance(node, RegexExpr):
+            # a regex can't tell how far it looked: the ones that don't
+            # backtrack read the char after their match, or at most their
+            # width when they fail. The others that can't match a newline
+            # stop at the end of their line, the rest may have read up to
+            # the end of the input
+            width = failure_width(node.re)
+            if width is not None:
+                examined = "self.pos + 1 if m else self.pos + %d" % width
+            elif may_match_newline(node.re):
+                examined = "len(self.input) + 1"
+            else:
+                examined = "self.p_line_end(self.pos)"
+            node._py_code += """
+examined = {}
+if examined > self._p_examined:
+    self._p_examined = examined""".format(examined)
+            return
+        if isinstance(node, LiteralExpr) and node.lit:
+            extent = "self.pos + %d" % len(node.lit)
+        elif isinstance(node, (CharRangeExpr, AnyCharExpr)):
+            extent = "self.pos + 1"
+        else:
+            return
+        node._py_code = """if {0} > self._p_examined:
+    self._p_examined = {0}
+{1}""".format(extent, node._py_code)
+
+    def set_leaves(self, rules):
+        # the calls to the deferred rules only run their recognizer, the
+        # recognizers call each other
+        self.leaves = _leaf_rules(rules, self.deferred)
+        self.match_leaves = _leaf_rules(rules)
+
+    def is_generator(self, rulename):
+        "Tell if the rule `rulename` runs as a generator"
+        return self.stackless and rulename not in self.leaves
 
     def report_error(self, id):
-        return """
-if self._p_error_stack:
-    head = self._p_error_stack[0]
-else:
-    head = (0, 0)
-if self.pos <= head[0]:
-    self._p_error_stack.append((self.pos, {0}))
-elif self.pos > head[0]:
-    self._p_error_stack = [(self.pos, {0})]
-# print self._p_error_stack
-        """.format(id).strip()
+        if not self.report_errors:
+            return "pass"
+        return "self.p_nomatch({})".format(id)
 
     def _action(self, action):
         from fastidious.compiler.action.pyclass import SimplePyAction
@@ -94,8 +374,26 @@ elif self.pos > head[0]:
                 return action.as_code()
         return "pass"
 
+    def rule_body(self, node):
+        "The code of the expression of the rule `node`"
+        self.folded = bool(self.trivia) and node.name not in self.lexical
+        if node.name not in self.tokens:
+            self.visit(node.expr)
+            return node.expr._py_code
+        return """
+end = self.p_token({0})
+if end is None:
+    result = self.NoMatch
+else:
+    result = {1}
+    self.pos = end
+        """.format(self.tokens[node.name], self.token_result()).strip()
+
+    def token_result(self):
+        return "self.input[self.pos:end]"
+
     def visit_rule(self, node):
-        self.visit(node.expr)
+        body = self.rule_body(node)
         code = """    '''{3}'''
     # -- self.p_debug("{0}({5})")
     # -- self._debug_indent += 1
@@ -108,16 +406,16 @@ elif self.pos > head[0]:
     else:
 {4}
         # -- self.p_debug("{0}({5}) -- NO MATCH")
-    return result
+    {6}
         """.format(node.name,
-                   indent(node.expr._py_code, 1),
+                   indent(body, 1),
                    self._action(node.action),
-                   node.as_grammar().replace("'", "\\'"),
+                   self.docstring(node),
                    indent(self.report_error(node.id), 2),
                    node.id,
+                   self.return_result(node.name),
                    )
-        defline = "def {}(self):".format(node.name)
-        code = "\n".join([defline, code])
+        code = self.rule_methods(node, code, "")
         if self.debug:
             code = code.replace("# -- ", "")
         else:
@@ -131,18 +429,85 @@ elif self.pos > head[0]:
         node._py_code = code.strip()
         return node
 
+    def docstring(self, node):
+        "The docstring of the methods of the rule `node`, its grammar"
+        return node.as_grammar().replace("\\", "\\\\").replace(
+            "'", "\\'")
+
+    def return_result(self, rulename):
+        "The last line of a rule"
+        if self.is_generator(rulename):
+            # see ParserMixin.p_run
+            return "self._p_return = result"
+        return "return result"
+
+    def rule_methods(self, node, code, kind):
+        """
+        Return the code of the methods of the rule `node`, whose body is
+        `code`. `kind` is "" for the rule, "match_" for its recognizer.
+        """
+        docstring = self.docstring(node)
+        name = kind + node.name
+        if kind:
+            name = "_p_" + name
+        elif node.name in self.deferred:
+            # the rule method returns a `LazyResult` that runs this one
+            name = "_p_full_" + name
+        generator = self.is_generator(node.name)
+        if generator:
+            method = "_p_gen_" + kind + node.name
+        else:
+            method = name
+        if getattr(node, "left_recursive", False):
+            # the rule body grows its match in p_left_recursion
+            code = """def {4}_p_lr_{0}(self):
+{1}
+
+def {4}{5}(self):
+    '''{2}'''
+    return self.{6}({3}, self.{4}_p_lr_{0})
+            """.format(kind + node.name, code, docstring,
+                       stable_hash(node.name),
+                       self.prefix, method,
+                       "p_left_recursion_gen" if generator
+                       else "p_left_recursion")
+        else:
+            defline = "def {}{}(self):".format(self.prefix, method)
+            code = "\n".join([defline, code])
+        if generator:
+            code += """
+
+def {0}{1}(self):
+    '''{2}'''
+    return self.p_run(self.{3}())
+            """.format(self.prefix, name, docstring, method)
+        if not kind and node.name in self.deferred:
+            code += """
+
+def {0}{1}(self):
+    '''{2}'''
+    return self.p_defer("{1}")
+            """.format(self.prefix, node.name, docstring)
+        return code
+
     def visit_ruleexpr(self, node):
-        code = "result = self.{}()".format(node.rulename).strip()
+        if node.rulename in self.deferred:
+            # only the recognizer runs
+            code = "result = self.{}()".format(node.rulename)
+        elif self.is_generator(node.rulename):
+            code = "result = yield self._p_gen_{}()".format(node.rulename)
+        else:
+            code = "result = self.{}()".format(node.rulename)
         node._py_code = code.strip()
 
     def visit_regexexpr(self, node):
         code = """
 # {0}
 regex = self._p_py_constants[{2}]["regex"]
-m = regex.match(self.p_suffix())
+m = regex.match(self.input, self.pos)
 if m:
-    result = self.p_suffix(m.end())
-    self.pos += m.end()
+    result = {3}
+    self.pos = m.end()
 else:
 {1}
     result = self.NoMatch
@@ -150,40 +515,45 @@ else:
             node.as_grammar(),
             indent(self.report_error(node.id), 1),
             node.id,
+            # m.group() copies memoryviews
+            "self.input[self.pos:m.end()]" if self.binary else "m.group()",
         )
         node._py_code = code.strip()
 
     def visit_seqexpr(self, node):
 
         def expressions():
+            # a one-shot loop, so that the code of the elements doesn't
+            # nest deeper and deeper
             exprs = []
-            for i, expr in enumerate(node.exprs):
+            for expr in node.exprs:
                 self.visit(expr)
                 expr_code = """
 {0}
 if result is self.NoMatch:
-    results_{1} = self.NoMatch
-    self.p_restore()
-{2}
-else:
-    results_{1}.append(result)
-                    """.format(expr._py_code, node.id,
-                               indent(self.report_error(node.id).strip(), 1))
-                exprs.append(indent(expr_code, i))
+    break
+results_{1}.append(result)
+                    """.format(expr._py_code, node.id).strip()
+                exprs.append(indent(expr_code, 1))
             return "\n".join(exprs)
 
         code = """
 # {0}
 self.p_save()
 results_{1} = []
+while 42:
 {2}
-if results_{1} is not self.NoMatch:
+    result = results_{1}
     self.p_discard()
-result = results_{1}
+    break
+if result is self.NoMatch:
+    self.p_restore()
+{3}
         """.format(
             node.as_grammar(),
             node.id,
-            expressions()
+            expressions(),
+            indent(self.report_error(node.id), 1)
         )
         node._py_code = code.strip()
 
@@ -200,10 +570,71 @@ args[{}] = result
         )
         node._py_code = code.strip()
 
+    def until_chars(self, node):
+        """
+        The structural chars the `(!stop .)` repetition `node` skips to
+        (the chars that may start `stop`), or None
+        """
+        expr = node.expr
+        if not self.structural or not isinstance(expr, SeqExpr):
+            return None
+        if self.folded:
+            # `.` skips the trivia
+            return None
+        if len(expr.exprs) != 2 or not isinstance(expr.exprs[0], Not):
+            return None
+        if not isinstance(expr.exprs[1], AnyCharExpr):
+            return None
+        stop = expr.exprs[0].expr
+        if isinstance(stop, LiteralExpr) and stop.lit and \
+                not stop.ignorecase:
+            chars = stop.lit[0]
+        elif isinstance(stop, CharRangeExpr) and stop.chars and \
+                not stop.is_wide:
+            chars = stop.chars
+        else:
+            return None
+        if set(chars) <= set(self.structural):
+            return "".join(sorted(set(chars)))
+        return None
+
+    def skip_until(self, node):
+        "The code that skips the chars that can't stop the repetition"
+        chars = self.until_chars(node)
+        if chars is None:
+            return ""
+        if self.binary:
+            # one slice per byte, as `.` returns
+            skipped = "[{1!r}, skipped_{0}[i:i + 1]] " \
+                "for i in range(len(skipped_{0}))"
+        else:
+            skipped = "[{1!r}, c] for c in skipped_{0}"
+        code = """
+# skip to the next of {0!r}
+end_{1} = self.p_skip_until({0!r}, self.pos)
+if end_{1} > self.pos:
+    skipped_{1} = self.input[self.pos:end_{1}]
+    results_{1}.extend({2})
+    self.pos = end_{1}
+        """.format(chars, node.id,
+                   skipped.format(node.id, self.literal("")))
+        return indent(code.strip(), 1) + "\n"
+
+    def chars_result(self, node):
+        "The code of the result of a repeated char class or any char"
+        if self.binary and self.folded:
+            # the trivia are skipped between the chars
+            return "result = b\"\".join(results_{})".format(node.id)
+        if self.binary:
+            # one byte per match: slice the input, memoryviews aren't copied
+            return "result = self.input[self.pos - len(results_{0}):" \
+                "self.pos]".format(node.id)
+        return 'result = "".join(results_{})'.format(node.id)
+
     def visit_oneormoreexpr(self, node):
         self.visit(node.expr)
         if isinstance(node.expr, (CharRangeExpr, AnyCharExpr)):
-            result_line = 'result = "".join(results_{})'.format(node.id)
+            result_line = self.chars_result(node)
         else:
             result_line = 'result = results_{}'.format(node.id)
         code = """
@@ -211,7 +642,7 @@ args[{}] = result
 self.p_save()
 results_{3} = []
 while 42:
-{1}
+{5}{1}
     if result is not self.NoMatch:
         results_{3}.append(result)
     else:
@@ -228,26 +659,27 @@ else:
             indent(node.expr._py_code, 1),
             result_line,
             node.id,
-            indent(self.report_error(node.id), 1)
+            indent(self.report_error(node.id), 1),
+            self.skip_until(node),
         )
         node._py_code = code.strip()
 
     def visit_maybeexpr(self, node):
         self.visit(node.expr)
         code = """
-# {}
-{}
-result = "" if result is self.NoMatch else result
+# {0}
+{1}
+result = {2!r} if result is self.NoMatch else result
 if result is self.NoMatch:
     # print self._p_error_stack
     self._p_error_stack.pop()
-        """.format(node.as_grammar(), node.expr._py_code)
+        """.format(node.as_grammar(), node.expr._py_code, self.literal(""))
         node._py_code = code.strip()
 
     def visit_literalexpr(self, node):
 
         if node.lit == "":
-            node._py_code = "result = ''"
+            node._py_code = "result = {!r}".format(self.literal(""))
             return
         code = """
 # {2}
@@ -256,20 +688,34 @@ if not result:
 {3}
     result = self.NoMatch
         """.format(
-            repr(node.lit),
+            repr(self.literal(node.lit)),
             repr(node.ignorecase),
             node.as_grammar(),
             indent(self.report_error(node.id), 1)
         )
         node._py_code = code.strip()
 
+    def matcher(self):
+        "The code generator of the recognizers"
+        matcher = PyMatchCodeGen(self.debug, self.report_errors,
+                                 stackless=self.stackless,
+                                 deferred=self.deferred, binary=self.binary,
+                                 incremental=self.incremental,
+                                 structural=self.structural,
+                                 tokens=self.tokens, trivia=self.trivia,
+                                 lexical=self.lexical)
+        matcher.leaves = matcher.match_leaves = self.match_leaves
+        matcher.folded = self.folded
+        return matcher
+
     def visit_not(self, node):
-        self.visit(node.expr)
+        # the predicates only need to know if the expression matches
+        self.matcher().visit(node.expr)
         code = """
 # {1}
 self.p_save()
 {0}
-result = "" if result is self.NoMatch else self.NoMatch
+result = {3!r} if result is self.NoMatch else self.NoMatch
 self.p_restore()
 if result is self.NoMatch:
 {2}
@@ -279,11 +725,39 @@ if result is self.NoMatch:
         """.format(
             node.expr._py_code,
             node.as_grammar(),
-            indent(self.report_error(node.id), 1)
+            indent(self.report_error(node.id), 1),
+            self.literal(""),
         )
         node._py_code = code.strip()
 
+    def literal(self, text):
+        "The constant that matches `text` in the input"
+        if self.binary:
+            return text.encode("latin-1")
+        return text
+
     def visit_charrangeexpr(self, node):
+        if node.is_wide:
+            return self.wide_char_range(node)
+        if self.binary:
+            # indexing bytes returns ints, the result is a slice
+            code = """
+# {0}
+if self.pos < len(self.input) and self.input[self.pos] in {1}:
+    result = self.input[self.pos:self.pos + 1]
+    self.pos += 1
+else:
+{2}
+    result = self.NoMatch
+            """.format(
+                node.as_grammar(),
+                "{%s}" % ", ".join(
+                    str(c) for c in sorted(bytearray(self.literal(
+                        node.chars)))) if node.chars else "()",
+                indent(self.report_error(node.id), 1)
+            )
+            node._py_code = code.strip()
+            return
         code = """
 # {0}
 self.p_save()
@@ -302,28 +776,82 @@ else:
         )
         node._py_code = code.strip()
 
+    def wide_char_range(self, node):
+        """
+        The classes with code point ranges or categories look the code
+        points below charclass.TABLE_SIZE up in a table (or search their
+        chars), and bisect the bounds of the ranges above
+        """
+        if self.binary:
+            code = """
+# {0}
+if self.pos < len(self.input) and \\
+        self._p_py_constants[{1}]["table"][self.input[self.pos]]:
+    result = self.input[self.pos:self.pos + 1]
+    self.pos += 1
+else:
+{2}
+    result = self.NoMatch
+            """.format(
+                node.as_grammar(),
+                node.id,
+                indent(self.report_error(node.id), 1),
+            )
+            node._py_code = code.strip()
+            return
+        found = "n in %r" % node.low_chars()
+        if node.lookup_tables()[1]:
+            found = """({0} or n > {1!r} and bisect.bisect_right(
+        self._p_py_constants[{2}]["bounds"], ord(n)) & 1)""".format(
+                found, charclass.LAST_IN_TABLE, node.id)
+        code = """
+# {0}
+self.p_save()
+n = self.p_next()
+if n is not None and {1}:
+    self.p_discard()
+    result = n
+else:
+    self.p_restore()
+{2}
+    result = self.NoMatch
+        """.format(
+            node.as_grammar(),
+            found,
+            indent(self.report_error(node.id), 1)
+        )
+        node._py_code = code.strip()
+
     def visit_zeroormoreexpr(self, node):
         self.visit(node.expr)
+        save, discard = "", ""
         if isinstance(node.expr, (CharRangeExpr, AnyCharExpr)):
-            result_line = 'result = "".join(results_{})'.format(node.id)
+            result_line = self.chars_result(node)
+            if self.binary:
+                # the result is sliced from the start of the run, that a
+                # stream must keep (see ParserMixin.p_slide)
+                save, discard = "self.p_save()\n", "self.p_discard()\n"
         else:
             result_line = 'result = results_{}'.format(node.id)
         code = """
 # {0}
-results_{3} = []
+{4}results_{3} = []
 while 42:
-{1}
+{6}{1}
     if result is not self.NoMatch:
         results_{3}.append(result)
     else:
         break
 # print self._p_error_stack
-{2}
+{5}{2}
         """.format(
             node.as_grammar(),
             indent(node.expr._py_code, 1),
             result_line,
             node.id,
+            save,
+            discard,
+            self.skip_until(node),
         )
         node._py_code = code.strip()
 
@@ -333,20 +861,23 @@ while 42:
             return
 
         def expressions():
+            # a one-shot loop, left at the first match
             exprs = []
-            for i, expr in enumerate(node.exprs):
+            for expr in node.exprs:
                 self.visit(expr)
                 expr_code = """
 {}
-if result is self.NoMatch:
+if result is not self.NoMatch:
+    break
                 """.format(expr._py_code).strip()
-                exprs.append(indent(expr_code, i))
-            exprs.append(indent("pass", i + 1))
+                exprs.append(indent(expr_code, 1))
+            exprs.append(indent("break", 1))
             return "\n".join(exprs)
 
         code = """
 # {1}
 self.p_save()
+while 42:
 {0}
 if result is self.NoMatch:
     self.p_restore()
@@ -361,6 +892,18 @@ else:
         node._py_code = code.strip()
 
     def visit_anycharexpr(self, node):
+        if self.binary:
+            code = """
+# .
+if self.pos < len(self.input):
+    result = self.input[self.pos:self.pos + 1]
+    self.pos += 1
+else:
+{}
+    result = self.NoMatch
+            """.format(indent(self.report_error(node.id), 1))
+            node._py_code = code.strip()
+            return
         code = """
 # .
 self.p_save()
@@ -375,83 +918,407 @@ else:
         """.format(indent(self.report_error(node.id), 1))
         node._py_code = code.strip()
 
-    def visit_lookahead(self, node):
+    def visit_memoizedexpr(self, node):
         self.visit(node.expr)
+        if self.incremental:
+            # a column of entries per position, see ParserMixin.p_memo_store
+            if self.report_errors:
+                # the entry keeps its failures apart from the others
+                errors = """
+    error_stack_{2} = self._p_error_stack
+    self._p_error_stack = [(-1, 0)]"""
+                stack = "error_stack_{2}"
+            else:
+                errors, stack = "", "None"
+            code = """
+start_pos_{2} = self.pos
+column_{2} = self._p_columns[start_pos_{2}]
+entry_{2} = column_{2} and column_{2}.get({0})
+if entry_{2}:
+    result, length_{2}, examined_{2}, errors_{2} = entry_{2}
+    self.pos = start_pos_{2} + length_{2}
+    examined_{2} += start_pos_{2}
+    if errors_{2}:
+        self.p_memo_errors(start_pos_{2}, errors_{2})
+else:
+    examined_{2} = self._p_examined
+    self._p_examined = start_pos_{2}%s
+{1}
+    self.p_memo_store({0}, start_pos_{2}, result, %s)
+if examined_{2} > self._p_examined:
+    self._p_examined = examined_{2}
+    """ % (errors, stack)
+        elif not node.compact_failures:
+            code = """
+start_pos_{2}= self.pos
+if ({0}, start_pos_{2}) in self._p_memoized:
+    result, self.pos = self._p_memoized[({0}, self.pos)]
+else:
+{1}
+    self._p_memoized[({0}, start_pos_{2})] = result, self.pos
+    """
+        else:
+            # successes go to the memo dict, failures to a per-rule bitset
+            code = """
+start_pos_{2} = self.pos
+failures_{2} = self._p_failures.get({0})
+chunk_{2} = failures_{2} and failures_{2}.get(start_pos_{2} >> %d)
+if chunk_{2} and (chunk_{2}[(start_pos_{2} >> 3) & %d] &
+                  (1 << (start_pos_{2} & 7))):
+    result = self.NoMatch
+elif ({0}, start_pos_{2}) in self._p_memoized:
+    result, self.pos = self._p_memoized[({0}, start_pos_{2})]
+else:
+{1}
+    if result is self.NoMatch:
+        self.p_memo_failure({0}, start_pos_{2})
+    else:
+        self._p_memoized[({0}, start_pos_{2})] = result, self.pos
+    """ % (FAILURE_CHUNK_BITS, FAILURE_BYTE_MASK)
+        node._py_code = code.format(
+            node.key,
+            indent(node.expr._py_code, 1),
+            node.expr.id,
+        ).strip()
+
+    def visit_lookahead(self, node):
+        self.matcher().visit(node.expr)
         code = """
 # {1}
 self.p_save()
 {0}
-result = result if result is self.NoMatch else ""
+result = result if result is self.NoMatch else {3!r}
 self.p_restore()
 if result is self.NoMatch:
 {2}
         """.format(
             node.expr._py_code,
             node.as_grammar(),
+            indent(self.report_error(node.id), 1),
+            self.literal(""),
+        )
+        node._py_code = code.strip()
+
+
+class PyMatchCodeGen(PyCodeGen):
+    """
+    Generate the recognizer of each rule: a `_p_match_<rule>` method that
+    returns `NoMatch` or any other value, and leaves the parser at the end
+    of the match. It builds no results, runs no actions and records no
+    labels.
+    """
+    def visit_rule(self, node):
+        if getattr(node, "left_recursive", False):
+            # the seed growing needs the results
+            code = """
+def {0}_p_match_{1}(self):
+    return self.{2}{1}()
+            """.format(self.prefix, node.name,
+                       "_p_full_" if node.name in self.deferred else "")
+            if self.stackless:
+                code += """
+def {0}_p_gen_match_{1}(self):
+    return self._p_gen_{1}()
+                """.format(self.prefix, node.name)
+            node._py_code = code.strip()
+            return node
+        body = self.rule_body(node)
+        code = """
+    '''{0}'''
+{1}
+    if result is self.NoMatch:
+{2}
+    {3}
+        """.format(
+            self.docstring(node),
+            indent(body, 1),
+            indent(self.report_error(node.id), 2),
+            self.return_result(node.name),
+        )
+        code = self.rule_methods(node, code.strip("\n"), "match_")
+        node._py_code = code.strip()
+        return node
+
+    def set_leaves(self, rules):
+        self.leaves = self.match_leaves = _leaf_rules(rules)
+
+    def token_result(self):
+        return "True"
+
+    def folded_result(self):
+        return "True"
+
+    def visit_ruleexpr(self, node):
+        if self.is_generator(node.rulename):
+            code = "result = yield self._p_gen_match_{}()"
+        else:
+            code = "result = self._p_match_{}()"
+        node._py_code = code.format(node.rulename)
+
+    def visit_memoizedexpr(self, node):
+        # the failures are shared with the full rules, and so are the
+        # successes found by the full rules
+        self.visit(node.expr)
+        if self.incremental:
+            # the successes of the recognizer are stored under `~key`
+            code = """
+start_pos_{2} = self.pos
+column_{2} = self._p_columns[start_pos_{2}]
+entry_{2} = column_{2} and (column_{2}.get({0}) or column_{2}.get({3}))
+if entry_{2}:
+    result, length_{2}, examined_{2}, _ = entry_{2}
+    self.pos = start_pos_{2} + length_{2}
+    examined_{2} += start_pos_{2}
+else:
+    examined_{2} = self._p_examined
+    self._p_examined = start_pos_{2}
+{1}
+    self.p_memo_store({0} if result is self.NoMatch else {3},
+                      start_pos_{2}, result)
+if examined_{2} > self._p_examined:
+    self._p_examined = examined_{2}
+            """
+        elif not node.compact_failures:
+            code = """
+start_pos_{2} = self.pos
+if ({0}, start_pos_{2}) in self._p_memoized:
+    result, self.pos = self._p_memoized[({0}, start_pos_{2})]
+elif ({0}, start_pos_{2}) in self._p_matched:
+    result, self.pos = True, self._p_matched[({0}, start_pos_{2})]
+else:
+{1}
+    if result is self.NoMatch:
+        self._p_memoized[({0}, start_pos_{2})] = result, self.pos
+    else:
+        self._p_matched[({0}, start_pos_{2})] = self.pos
+            """
+        else:
+            code = """
+start_pos_{2} = self.pos
+failures_{2} = self._p_failures.get({0})
+chunk_{2} = failures_{2} and failures_{2}.get(start_pos_{2} >> %d)
+if chunk_{2} and (chunk_{2}[(start_pos_{2} >> 3) & %d] &
+                  (1 << (start_pos_{2} & 7))):
+    result = self.NoMatch
+elif ({0}, start_pos_{2}) in self._p_memoized:
+    result, self.pos = self._p_memoized[({0}, start_pos_{2})]
+elif ({0}, start_pos_{2}) in self._p_matched:
+    result, self.pos = True, self._p_matched[({0}, start_pos_{2})]
+else:
+{1}
+    if result is self.NoMatch:
+        self.p_memo_failure({0}, start_pos_{2})
+    else:
+        self._p_matched[({0}, start_pos_{2})] = self.pos
+            """ % (FAILURE_CHUNK_BITS, FAILURE_BYTE_MASK)
+        node._py_code = code.format(
+            node.key,
+            indent(node.expr._py_code, 1),
+            node.expr.id,
+            ~node.key,
+        ).strip()
+
+    def visit_seqexpr(self, node):
+        exprs = []
+        for expr in node.exprs:
+            self.visit(expr)
+            exprs.append(indent("""
+{}
+if result is self.NoMatch:
+    break
+            """.format(expr._py_code).strip(), 1))
+        code = """
+# {0}
+self.p_save()
+while 42:
+{1}
+    self.p_discard()
+    break
+if result is self.NoMatch:
+    self.p_restore()
+{2}
+        """.format(
+            node.as_grammar(),
+            "\n".join(exprs),
             indent(self.report_error(node.id), 1)
         )
         node._py_code = code.strip()
 
+    def visit_labeledexpr(self, node):
+        self.visit(node.expr)
+        node._py_code = node.expr._py_code
+
+    def skip_until(self, node):
+        chars = self.until_chars(node)
+        if chars is None:
+            return ""
+        return "    self.pos = self.p_skip_until({!r}, self.pos)\n".format(
+            chars)
+
+    def visit_zeroormoreexpr(self, node):
+        self.visit(node.expr)
+        code = """
+# {0}
+while 42:
+{2}{1}
+    if result is self.NoMatch:
+        break
+result = True
+        """.format(node.as_grammar(), indent(node.expr._py_code, 1),
+                   self.skip_until(node))
+        node._py_code = code.strip()
+
+    def visit_oneormoreexpr(self, node):
+        self.visit(node.expr)
+        code = """
+# {0}
+start_pos_{2} = self.pos
+while 42:
+{4}{1}
+    if result is self.NoMatch:
+        break
+if self.pos == start_pos_{2}:
+{3}
+    result = self.NoMatch
+else:
+    result = True
+        """.format(
+            node.as_grammar(),
+            indent(node.expr._py_code, 1),
+            node.id,
+            indent(self.report_error(node.id), 1),
+            self.skip_until(node),
+        )
+        node._py_code = code.strip()
+
+    def visit_literalexpr(self, node):
+        if node.ignorecase or node.lit == "":
+            return PyCodeGen.visit_literalexpr(self, node)
+        if self.binary:
+            # memoryviews have no startswith
+            test = "self.input[self.pos:self.pos + {2}] == {1}"
+        else:
+            test = "self.input.startswith({1}, self.pos)"
+        code = """
+# {0}
+if %s:
+    self.pos += {2}
+    result = True
+else:
+{3}
+    result = self.NoMatch
+        """ % test
+        code = code.format(
+            node.as_grammar(),
+            repr(self.literal(node.lit)),
+            len(node.lit),
+            indent(self.report_error(node.id), 1)
+        )
+        node._py_code = code.strip()
+
+    def visit_regexexpr(self, node):
+        code = """
+# {0}
+regex = self._p_py_constants[{2}]["regex"]
+m = regex.match(self.input, self.pos)
+if m:
+    self.pos = m.end()
+    result = True
+else:
+{1}
+    result = self.NoMatch
+        """.format(
+            node.as_grammar(),
+            indent(self.report_error(node.id), 1),
+            node.id,
+        )
+        node._py_code = code.strip()
+
 
 class MemoizedExpr(ExprProxi):
-    def __init__(self, expr, debug):
+    def __init__(self, expr, debug, compact_failures=True):
         self.expr = expr
         self.debug = debug
+        self.compact_failures = compact_failures
         self.proxied = expr
 
     @property
-    def _py_code(self):
-        PyCodeGen(self.debug).visit(self.expr)
-        pk = hash(self.expr.as_grammar())
-        code = """
-start_pos_{2}= self.pos
-if ({0}, start_pos_{2}) in self._p_memoized:
-    result, self.pos = self._p_memoized[({0}, self.pos)]
-else:
-{1}
-    self._p_memoized[({0}, start_pos_{2})] = result, self.pos
-    """.format(
-            pk,
-            indent(self.expr._py_code, 1),
-            self.expr.id,
-        )
-        return code.strip()
+    def key(self):
+        if not hasattr(self, "_key"):
+            self._key = stable_hash(self.expr.as_grammar())
+        return self._key
+
+    def __call__(self, parser):
+        key = self.key
+        start_pos = parser.pos
+        if self.compact_failures and parser.p_memo_failed(key, start_pos):
+            return parser.NoMatch
+        memo = parser._p_memoized.get((key, start_pos))
+        if memo is not None:
+            result, parser.pos = memo
+            return result
+        result = self.expr(parser)
+        if result is parser.NoMatch and self.compact_failures:
+            parser.p_memo_failure(key, start_pos)
+        else:
+            parser._p_memoized[(key, start_pos)] = result, parser.pos
+        return result
 
     def as_grammar(self, *args, **kwargs):
         return self.expr.as_grammar(*args, **kwargs)
 
 
 class Memoizer(Mutator):
-    def __init__(self, debug):
+    def __init__(self, debug, compact_failures=True, unmemoized=()):
         self.debug = debug
+        self.compact_failures = compact_failures
+        # the rules that must not be memoized
+        self.unmemoized = unmemoized
 
     def __call__(self, parser):
         parser.__rules__ = [self.visit(r) for r in parser.__rules__]
 
     def visit_ruleexpr(self, node):
         self.generic_visit(node)
-        return MemoizedExpr(node, self.debug)
+        if node.rulename in self.unmemoized:
+            return node
+        return MemoizedExpr(node, self.debug, self.compact_failures)
+
+    def visit_memoizedexpr(self, node):
+        # rules inherited from a parent parser are already memoized
+        return node
 
 
 class MethodBuilder(Visitor):
-    def __init__(self, parser):
+    def __init__(self, parser, codes=None):
         self.parser = parser
-        parser.__rules__ = [self.visit(r) for r in parser.__rules__]
+        if codes is None:
+            parser.__rules__ = [self.visit(r) for r in parser.__rules__]
+        else:
+            for code in codes:
+                self.add_methods(code)
 
     def visit_rule(self, node):
-        locals_ = dict()
-        exec(node._py_code, None, locals_)
-        new_method = locals_[node.name]
-        if six.PY3:
-            new_method.__name__ = node.name
-            meth = FunctionType(new_method.__code__, globals(), node.name)
-        else:
-            new_method._code = node._py_code  # noqa
-            new_method.func_name = node.name  # noqa
-            meth = UnboundMethodType(new_method, None, self.parser)  # noqa
-        setattr(self.parser, node.name, meth)
+        self.add_methods(node._py_code)
         return node
 
+    def add_methods(self, code):
+        "Add to the parser the methods defined by `code`"
+        locals_ = dict()
+        exec(code, None, locals_)
+        for name, new_method in locals_.items():
+            # covered by the grammar in the diskcache fingerprints
+            new_method._p_generated = True
+            if six.PY3:
+                new_method.__name__ = name
+                meth = FunctionType(new_method.__code__, globals(), name)
+                meth._p_generated = True
+            else:
+                new_method._code = code  # noqa
+                new_method.func_name = name  # noqa
+                meth = UnboundMethodType(new_method, None, self.parser)  # noqa
+            setattr(self.parser, name, meth)
+
 
 class MethodWriter(Visitor):
     def __init__(self, output, indent=1):
@@ -468,16 +1335,53 @@ class MethodWriter(Visitor):
 
 
 class FastidiousCompiler(object):
-    def __init__(self, gen_code=True, memoize=True, debug=False):
+    def __init__(self, gen_code=True, memoize=True, debug=False,
+                 compact_failures=True, lazy_errors=False, stackless=False,
+                 incremental=False):
         self.gen_code = gen_code
         self.memoize = memoize
         self.debug = debug
+        self.compact_failures = compact_failures
+        # parse without error tracking, track them only to report a failure
+        self.lazy_errors = lazy_errors
+        # the recursive rules keep their calls on a heap-allocated stack
+        if stackless and not gen_code:
+            raise ValueError("stackless parsers need the code generation")
+        self.stackless = stackless
+        # the memo can be updated after an edit of the input, see
+        # ParseSession
+        if incremental and not (gen_code and memoize):
+            raise ValueError(
+                "incremental parsers need the code generation and the "
+                "memoization")
+        self.incremental = incremental
 
     def __call__(self, parser):
         rules = parser.__rules__
         # sanity check. Any compiler should
         check_rulenames(rules)
-        check_left_recursion(rules)
+        check_recover(rules, parser.__recover__)
+        check_deferred(rules, parser.__deferred__)
+        if parser.__binary__:
+            if not self.gen_code:
+                raise ValueError("parsers of bytes need the code generation")
+            check_binary(rules)
+        # left recursive rules grow their match through the memo
+        involved, leaders = left_recursion_leaders(rules)
+        if involved and not self.memoize:
+            raise LeftRecursion(
+                "rules %s are left recursive, they need memoization" % (
+                    ", ".join("`%s`" % r for r in sorted(involved))))
+        if involved and self.incremental:
+            raise LeftRecursion(
+                "rules %s are left recursive, incremental parsers don't "
+                "support them" % (
+                    ", ".join("`%s`" % r for r in sorted(involved))))
+        for rule in rules:
+            rule.left_recursive = rule.name in leaders
+        # the calls to the other left recursive rules can't be memoized,
+        # their results depend on the current seed of their leader
+        unmemoized = involved - leaders
 
         # set the default rule
         if parser.__default__ is None and rules:
@@ -485,27 +1389,128 @@ class FastidiousCompiler(object):
 
         # for error reporting, register all expressions on the parser
         _register_expressions(parser)
+        parser._p_rule_names = tuple(r.name for r in rules)
+        parser._p_lazy_errors = self.gen_code and self.lazy_errors
+        parser._p_incremental = self.incremental
+        # where the rules may start, for p_finditer
+        parser._p_search_hints = search_hints(rules)
 
         # parse the actions
         SimplePyAction.update_rules(parser)
 
+        # the token rules are matched by the master regex of the lexer
+        tokens = {}
+        parser._p_lexer, parser._p_token_kinds = None, {}
+        if parser.__tokens__:
+            if not self.gen_code:
+                raise ValueError("token rules need the code generation")
+            if self.incremental:
+                raise ValueError("incremental parsers don't support tokens")
+            parser._p_lexer, parser._p_token_kinds = token_lexer(
+                rules, parser.__tokens__, parser.__binary__)
+            tokens = dict((name, kind)
+                          for kind, name in enumerate(parser.__tokens__))
+            for rule in rules:
+                if rule.name in tokens:
+                    # the errors expect the tokens, not their chars, like
+                    # the terminal rules
+                    rule.is_syntaxic_terminal = True
+                    if not rule.alias and rule.name.isupper():
+                        rule.alias = rule.name
+
+        # the terminals skip the trivia, except within the lexical rules
+        trivia, lexical = "", frozenset()
+        parser._p_trivia = None
+        if parser.__trivia__:
+            if not self.gen_code:
+                raise ValueError("trivia need the code generation")
+            if self.incremental:
+                raise ValueError("incremental parsers don't support trivia")
+            trivia = trivia_prefix(parser.__trivia__)
+            lexical = frozenset(_lexical_rules(rules, tokens))
+            parser._p_trivia = re.compile(
+                trivia.encode("latin-1") if parser.__binary__ else trivia)
+
         # add the methods to the class
         if self.gen_code:
             # add constants to the class (pre-compile regexes, ...)
-            PySetConstants(parser)
+            PySetConstants(parser, trivia, lexical)
             # generate the python code
             if self.memoize:
-                Memoizer(self.debug)(parser)
-            PyCodeGen(self.debug)(parser)
+                Memoizer(self.debug, self.compact_failures,
+                         unmemoized)(parser)
+            if self.lazy_errors:
+                # the fast methods, and their `_p_errors_` counterparts
+                # that track the errors (see ParserMixin.p_track_errors)
+                variants = [dict(report_errors=False),
+                            dict(prefix="_p_errors_")]
+            else:
+                variants = [dict()]
+            # the incremental parsers track the chars each rule examines
+            structural = "" if self.incremental else parser.__structural__
+            options = dict(stackless=self.stackless,
+                           deferred=frozenset(parser.__deferred__),
+                           binary=parser.__binary__,
+                           incremental=self.incremental,
+                           structural=structural, tokens=tokens,
+                           trivia=trivia, lexical=lexical)
+            codes = dict((rule.name, []) for rule in parser.__rules__)
+            for kwargs in variants:
+                PyCodeGen(self.debug, **dict(options, **kwargs))(parser)
+                for rule in parser.__rules__:
+                    codes[rule.name].append(rule._py_code)
+            # the recognizers of the rules that the predicates and the
+            # deferred rules call. The others are generated on the first
+            # p_match (see add_recognizers)
+            recognized = _recognized_rules(parser.__rules__,
+                                           parser.__deferred__)
+            self.recognizer_codes(parser, recognized, options, variants,
+                                  codes)
+            for rule in parser.__rules__:
+                rule._py_code = "\n\n".join(codes[rule.name])
+            parser._p_lazy_recognizers = (
+                frozenset(codes) - recognized, options, variants)
             # add the methods
             MethodBuilder(parser)
         else:
+            parser._p_lazy_recognizers = None
+            if self.memoize:
+                Memoizer(self.debug, self.compact_failures,
+                         unmemoized)(parser)
+            # the captures must know their parent rule name
+            _RuleNameToCaptures(parser.__rules__)
             for rule in parser.__rules__:
-                # the captures must know their parent rule name
-                _RuleNameToCaptures(rules)
                 rule._attach_to(parser)
         return parser
 
+    def recognizer_codes(self, parser, names, options, variants, codes):
+        "Append the code of the recognizers of the rules `names` to `codes`"
+        for kwargs in variants:
+            PyMatchCodeGen(self.debug, **dict(options, **kwargs))(
+                parser, names)
+            for rule in parser.__rules__:
+                if rule.name in names:
+                    codes[rule.name].append(rule._py_code)
+
+    def add_recognizers(self, parser):
+        """
+        Add the recognizers that the class `parser` was compiled without,
+        the ones of the rules no predicate nor deferred rule calls (see
+        ParserMixin.p_match)
+        """
+        with _recognizers_lock:
+            if not parser.__dict__.get("_p_lazy_recognizers"):
+                return
+            names, options, variants = parser._p_lazy_recognizers
+            # the code of the rules, written by gen_py_code, is kept
+            saved = [rule._py_code for rule in parser.__rules__]
+            codes = dict((name, []) for name in names)
+            self.recognizer_codes(parser, names, options, variants, codes)
+            for rule, code in zip(parser.__rules__, saved):
+                rule._py_code = code
+            MethodBuilder(parser, ["\n\n".join(c) for c in codes.values()])
+            parser._p_lazy_recognizers = None
+
     def _get_expr_kwargs(self, e):
         kwargs = dict(
             is_syntaxic_terminal=e.is_syntaxic_terminal,
@@ -530,10 +1535,26 @@ More info at https://github.com/lisael/fastidious
 """
 '''.format(cmd))
         out.write("""
+import array
+import bisect
+import copy
+import mmap
 import re
+import threading
+import time
+from collections import OrderedDict
+
 import six
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 """)
+        out.write("FAILURE_CHUNK_BITS = %d\n" % FAILURE_CHUNK_BITS)
+        out.write("FAILURE_CHUNK_BYTES = %d\n" % FAILURE_CHUNK_BYTES)
+        out.write("FAILURE_BYTE_MASK = %d\n\n" % FAILURE_BYTE_MASK)
 
         out.write("""
 class _Expr:
@@ -542,31 +1563,94 @@ class _Expr:
             self.__dict__[k] = v
 
 
+class _LazyAttribute(object):
+    "A class attribute computed on first access"
+    def __init__(self, name, compute):
+        self.name = name
+        self.compute = compute
+
+    def __get__(self, obj, owner):
+        value = self.compute()
+        setattr(owner, self.name, value)
+        return value
+
+
 """)
+        # print the runtime helpers used by the parser methods
+        from fastidious.parser_base import (ParseCache, ParseFailure,
+                                            ParseLimitError, ParseLimits,
+                                            ParserError, LazyResult,
+                                            ParseSession,
+                                            StreamBuffer, _StreamMatch,
+                                            _StreamRegex, _map_file, _unique)
+        for helper in (ParserError, ParseLimitError, ParseLimits,
+                       ParseFailure, LazyResult, ParseSession, StreamBuffer,
+                       _StreamMatch, _StreamRegex, ParseCache, _map_file,
+                       _unique):
+            out.write(inspect.getsource(helper))
+            out.write("\n\n")
         # print the user's methods
         _, body = inspect.getsource(parser).split("\n", 1)
         out.write("class %s(object):\n" % parser.__name__)
         out.write("    __default__ = '%s'\n" % parser.__default__)
-        out.write("    class ParserError(Exception):\n        pass\n\n")
+        out.write("    ParserError = ParserError\n\n")
         out.write(body)
 
         # print parsr methods and attributes
         from fastidious.parser_base import ParserMixin
         _, mixin_body = inspect.getsource(ParserMixin).split("\n", 1)
-        mixin_body = mixin_body.replace("ParserError", "self.ParserError")
         out.write(mixin_body)
 
         # print the fastidious methods
         MethodWriter(out)(parser)
 
-        # print the expression registry (for error handling)
+        out.write("    _p_rule_names = %r\n" % (parser._p_rule_names, ))
+        out.write("    _p_lazy_errors = %r\n" % parser._p_lazy_errors)
+        out.write("    _p_incremental = %r\n" % parser._p_incremental)
+        out.write("    __recover__ = %r\n" % (parser.__recover__, ))
+        out.write("    __binary__ = %r\n" % parser.__binary__)
+        out.write("    __structural__ = %r\n" % parser.__structural__)
+        out.write("    __tokens__ = %r\n" % (parser.__tokens__, ))
+        if parser._p_lexer is not None:
+            out.write("    _p_lexer = re.compile(%r, %d)\n" % (
+                parser._p_lexer.pattern, parser._p_lexer.flags))
+        out.write("    _p_token_kinds = %r\n" % (parser._p_token_kinds, ))
+        out.write("    __trivia__ = %r\n" % parser.__trivia__)
+        if parser._p_trivia is not None:
+            out.write("    _p_trivia = re.compile(%r, %d)\n" % (
+                parser._p_trivia.pattern, parser._p_trivia.flags))
+        out.write("    _p_search_hints = %r\n" % (parser._p_search_hints, ))
+        # the compiled regexes, and the lookup tables
+        out.write("    _p_py_constants = {\n")
+        for k, consts in sorted(parser._p_py_constants.items()):
+            entries = []
+            if "regex" in consts:
+                entries.append("\"regex\": re.compile(%r, %d)" % (
+                    consts["regex"].pattern, consts["regex"].flags))
+            # the lookup tables of the wide char classes
+            if "table" in consts:
+                entries.append("\"table\": %r" % (consts["table"], ))
+                entries.append("\"bounds\": %r" % (consts["bounds"], ))
+            out.write("        %s: {%s},\n" % (k, ", ".join(entries)))
+        out.write("    }\n")
+
+        # print the expression registry (for error handling), built on
+        # first use
         out.write("""
-    _p_expressions = {
+
+def _p_expressions():
+    return {
 """)
+        ids = set(_rule_expression_ids(parser.__rules__))
         for k, v in parser._p_expressions.items():
+            if k not in ids:
+                # registered by another parser
+                continue
             out.write(
                 "        %s: %s,\n" % (
                     k, "_Expr(%s)" % self._get_expr_kwargs(v)
                 )
             )
-        out.write("    }\n")
+        out.write("    }\n\n\n")
+        out.write("%s._p_expressions = _LazyAttribute(\"_p_expressions\", "
+                  "_p_expressions)\n" % parser.__name__)
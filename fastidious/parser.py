@@ -59,10 +59,14 @@ class FastidiousParser(Parser, _FastidiousParserMixin):
         suffix <- [?+*]
         prefix <- [!&]
 
-        char_range_expr <- "[" content:( class_char_range / class_char )* "]" ignore:"i"?
+        char_range_expr <- "[" content:( class_property / class_char_range / class_char )* "]" ignore:"i"?
+        class_property <- "\\" negate:[pP] "{" name:category_name "}"
+        category_name <- [A-Za-z]+ {p_flatten}
         class_char_range <- start:class_char "-" end:class_char
         class_char <- ( !( "]" / "\\" / EOL ) char:source_char ) / ( "\\" char:char_class_escape ) {@char}
-        char_class_escape <- "]" / common_escape
+        char_class_escape <- "]" / code_point_escape / common_escape
+        code_point_escape <- ( "x" hex_digit hex_digit ) / ( "u" hex_digit hex_digit hex_digit hex_digit ) / ( "U" hex_digit hex_digit hex_digit hex_digit hex_digit hex_digit hex_digit hex_digit )
+        hex_digit <- [0-9a-fA-F]
 
         common_escape <- single_char_escape
         single_char_escape <- "a" / "b" / "n" / "f" / "r" / "t" / "v" / "\\"
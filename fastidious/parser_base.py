@@ -1,9 +1,22 @@
+import array
+import bisect
+import copy
+import mmap
 import re
-import string
+import sys
+import threading
+import time
+from collections import OrderedDict
 
 import six
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
+
+from fastidious import charclass
 from fastidious.expressions import (
     AnyCharExpr,
     CharRangeExpr,
@@ -21,17 +34,516 @@ from fastidious.expressions import (
     ZeroOrMoreExpr
 )
 
-
-if six.PY3:
-    UPPERCASE = string.ascii_uppercase
-    LOWERCASE = string.ascii_lowercase
-else:
-    UPPERCASE = string.uppercase
-    LOWERCASE = string.lowercase
+# the bitsets of the memoized failures are split in chunks of
+# 2 ** FAILURE_CHUNK_BITS positions, allocated where a rule fails
+FAILURE_CHUNK_BITS = 14
+FAILURE_CHUNK_BYTES = (1 << FAILURE_CHUNK_BITS) >> 3
+FAILURE_BYTE_MASK = FAILURE_CHUNK_BYTES - 1
 
 
 class ParserError(Exception):
-    pass
+    """
+    Raised when the parsing fails.
+
+    Syntax errors carry the position of the failure in `pos`, `line` and
+    `col`, and the list of the `expected` expressions.
+    """
+    def __init__(self, message, pos=None, line=None, col=None,
+                 expected=()):
+        super(ParserError, self).__init__(message)
+        self.pos = pos
+        self.line = line
+        self.col = col
+        self.expected = list(expected)
+
+
+class ParseLimitError(ParserError):
+    """
+    Raised when a parsing exceeds its `ParseLimits`. `reason` is one of
+    "steps", "timeout", "memo" or "cancelled".
+    """
+    def __init__(self, message, reason, pos=None, line=None, col=None):
+        super(ParseLimitError, self).__init__(message, pos, line, col)
+        self.reason = reason
+
+
+class ParseLimits(object):
+    """
+    The limits of a parsing, see `p_parse`.
+
+    - `steps`: max number of rule calls
+    - `timeout`: max duration, in seconds
+    - `max_memo`: max number of memoized successes
+    - `cancel`: an object with an `is_set()` method, like a
+      `threading.Event`, that aborts the parsing when set
+    - `progress`: a callable, called with the furthest position reached
+
+    Except `steps`, the limits are checked, and `progress` called, every
+    `check_every` rule calls. A rule that runs a single regex can't be
+    interrupted.
+    """
+    def __init__(self, steps=None, timeout=None, max_memo=None, cancel=None,
+                 progress=None, check_every=1000):
+        self.steps = steps
+        self.timeout = timeout
+        self.max_memo = max_memo
+        self.cancel = cancel
+        self.progress = progress
+        self.check_every = check_every
+
+
+class ParseFailure(object):
+    """
+    The failure of a parsing, returned by `p_try_parse`.
+
+    It's cheap to build: the expected expressions and the error message are
+    computed only when accessed. A failure is falsy, but so may be some
+    results, check the result type with `isinstance`.
+    """
+    def __init__(self, parser, pos, expected_ids):
+        self.parser = parser
+        self.pos = pos
+        # ids of the expected expressions in the parser `_p_expressions`
+        self.expected_ids = expected_ids
+
+    def __bool__(self):
+        return False
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return "<ParseFailure at %s>" % self.pos
+
+    @property
+    def expected(self):
+        "The expected expressions, in grammar syntax (or their alias)"
+        expressions = self.parser._p_expressions
+        expected = []
+        for id in self.expected_ids:
+            for item in expressions[id].expected:
+                if item not in expected:
+                    expected.append(item)
+        return expected
+
+    @property
+    def line(self):
+        return self.parser.p_line_col(self.pos)[0]
+
+    @property
+    def col(self):
+        return self.parser.p_line_col(self.pos)[1]
+
+    @property
+    def message(self):
+        "The error message of the `ParserError` raised by `p_parse`"
+        self.parser.pos = self.pos
+        return self.parser.p_syntax_message(*self.expected)
+
+    def raise_error(self):
+        "Raise the `ParserError` that `p_parse` would have raised"
+        self.parser.pos = self.pos
+        return self.parser.p_syntax_error(*self.expected)
+
+
+class LazyResult(object):
+    """
+    The result of a deferred rule (see `__deferred__`). The rule only
+    matched the span `start:end` of the input; it's parsed, and its actions
+    run, when `value` is first read.
+
+    Indexing, iterating, comparing and the attributes of the value are
+    delegated to the value.
+    """
+    def __init__(self, parser, rule, start, end):
+        self._parser = parser
+        self._input = parser.input
+        self.rule = rule
+        self.start = start
+        self.end = end
+        self._parsed = False
+        self._value = None
+
+    @property
+    def text(self):
+        "The matched text"
+        return self._input[self.start:self.end]
+
+    @property
+    def parsed(self):
+        "Tell if the value was parsed already"
+        return self._parsed
+
+    @property
+    def value(self):
+        if not self._parsed:
+            # reuse the parser, and its memo
+            p = self._parser
+            pos = p.pos
+            p.pos = self.start
+            try:
+                self._value = getattr(p, "_p_full_" + self.rule)()
+            finally:
+                p.pos = pos
+            self._parsed = True
+            self._parser = None
+        return self._value
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.value, name)
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __bool__(self):
+        return bool(self.value)
+
+    __nonzero__ = __bool__
+
+    def __contains__(self, item):
+        return item in self.value
+
+    def __eq__(self, other):
+        if isinstance(other, LazyResult):
+            other = other.value
+        return self.value == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "<LazyResult %s at %s:%s>" % (self.rule, self.start, self.end)
+
+
+class StreamBuffer(object):
+    """
+    The input of `ParserMixin.p_parse_stream`: a sliding window over a
+    file-like object, indexed with the offsets of the whole stream.
+
+    The chunks are read as the parser looks ahead. Before each read, the
+    parser discards the data it can't backtrack to anymore (see
+    `ParserMixin.p_slide`).
+    """
+    def __init__(self, stream, chunk_size=16384, binary=False):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.data = b"" if binary else ""
+        self.newline = b"\n" if binary else "\n"
+        # the stream offset of data[0]
+        self.offset = 0
+        self.eof = False
+        # the newlines of the discarded data: count, and last offset
+        self.lines = 0
+        self.last_newline = -1
+        # set by p_parse_stream, to read the next chunk when the parser
+        # reaches the end of the data
+        self.parser = None
+
+    @property
+    def end(self):
+        "The stream offset of the end of the data read so far"
+        return self.offset + len(self.data)
+
+    def fill(self, end):
+        "Read the stream up to `end`, if it's that long"
+        while self.offset + len(self.data) < end and not self.eof:
+            if self.parser is not None:
+                self.parser.p_slide()
+            # read more at once as the window grows, so that it's copied
+            # a bounded number of times
+            chunk = self.stream.read(max(self.chunk_size, len(self.data)))
+            if chunk:
+                self.data += chunk
+            else:
+                self.eof = True
+
+    def discard(self, pos):
+        "Forget the data before `pos`"
+        drop = pos - self.offset
+        if drop <= 0:
+            return
+        dropped = self.data[:drop]
+        self.lines += dropped.count(self.newline)
+        last = dropped.rfind(self.newline)
+        if last != -1:
+            self.last_newline = self.offset + last
+        self.data = self.data[drop:]
+        self.offset = pos
+
+    def _index(self, pos):
+        if pos < self.offset:
+            raise ValueError(
+                "offset %s of the stream was discarded (the window starts "
+                "at %s)" % (pos, self.offset))
+        return pos - self.offset
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start = key.start or 0
+            if key.stop is None:
+                self.fill(float("inf"))
+                stop = self.end
+            else:
+                stop = key.stop
+                self.fill(stop)
+            return self.data[self._index(start):max(0, stop - self.offset)]
+        self.fill(key + 1)
+        return self.data[self._index(key)]
+
+    def __len__(self):
+        # the generated code tests `pos < len(input)`: the data at the
+        # parser's position must be read
+        if self.parser is not None:
+            self.fill(self.parser.pos + 1)
+        return self.end
+
+    def startswith(self, prefix, pos):
+        self.fill(pos + len(prefix))
+        return self.data.startswith(prefix, self._index(pos))
+
+    def match(self, regex, pos):
+        """
+        Return the match of the compiled `regex` at `pos`, with stream
+        offsets.
+
+        The regex first sees `chunk_size` chars after `pos`, then twice as
+        many as long as its match reaches the end of the data: it must
+        fail within `chunk_size` chars.
+        """
+        window = self.chunk_size
+        while 42:
+            self.fill(pos + window)
+            m = regex.match(self.data, self._index(pos))
+            if m is None or self.eof or m.end() < len(self.data):
+                break
+            window *= 2
+        return m and _StreamMatch(m, self.offset)
+
+    def line_col(self, pos):
+        "Same as `ParserMixin.p_line_col`, within the window"
+        pos = max(pos, self.offset)
+        before = self.data[:pos - self.offset]
+        line = self.lines + before.count(self.newline)
+        last = before.rfind(self.newline)
+        last = self.last_newline if last == -1 else self.offset + last
+        if line == 0:
+            return 0, pos
+        return line, pos - last
+
+    def line_bounds(self, pos):
+        "Return the start and end offsets of the line at `pos`, clipped"
+        pos = max(pos, self.offset)
+        start = self.data.rfind(self.newline, 0, pos - self.offset) + 1
+        end = self.data.find(self.newline, pos - self.offset)
+        if end == -1:
+            end = len(self.data)
+        return self.offset + start, self.offset + end
+
+
+class _StreamMatch(object):
+    "A regex match on a `StreamBuffer`, with stream offsets"
+    def __init__(self, match, offset):
+        self._match = match
+        self._offset = offset
+
+    def group(self, *groups):
+        return self._match.group(*groups)
+
+    def start(self, group=0):
+        return self._match.start(group) + self._offset
+
+    def end(self, group=0):
+        return self._match.end(group) + self._offset
+
+    @property
+    def lastindex(self):
+        return self._match.lastindex
+
+
+class _StreamRegex(object):
+    "Run a compiled regex on a `StreamBuffer`, for the generated code"
+    def __init__(self, regex):
+        self.regex = regex
+
+    def match(self, input, pos):
+        return input.match(self.regex, pos)
+
+
+class ParseSession(object):
+    """
+    Parse a text, and parse it again after each edit, reusing the memo of
+    the previous parse. The parser is compiled with
+    `FastidiousCompiler(incremental=True)`.
+
+    The memo entries know the span of the input they examined. An edit
+    drops the entries that examined the replaced text, the following
+    entries move with the text, and the parsing runs again: only the rules
+    around the edit are parsed again. The results must not depend on
+    their position in the input.
+
+    `result` is the result of the last parse, or a `ParseFailure`.
+    """
+    def __init__(self, parser_class, text, methodname=None, parse_all=True):
+        if not parser_class._p_incremental:
+            raise ValueError(
+                "%s is not compiled with FastidiousCompiler(incremental="
+                "True)" % parser_class.__name__)
+        self.parser_class = parser_class
+        self.methodname = methodname or parser_class.__default__
+        self.parse_all = parse_all
+        self.parser = parser_class(text)
+        self.result = None
+        self.parse()
+
+    @property
+    def text(self):
+        return self.parser.input
+
+    def parse(self):
+        "Parse the text, return the result or a `ParseFailure`"
+        p = self.parser
+        p.pos = 0
+        p._p_examined = 0
+        p._p_error_stack = [(0, 0)]
+        p._p_savepoint_stack = []
+        result = getattr(p, self.methodname)()
+        if result is p.NoMatch or self.parse_all and not p.p_at_end():
+            if p._p_lazy_errors:
+                # parse again from scratch, tracking the errors this time
+                result = self.parser_class.p_try_parse(
+                    p.input, self.methodname, self.parse_all)
+            else:
+                # the reused memo entries recorded their failures again
+                result = p.p_failure()
+        self.result = result
+        return result
+
+    def edit(self, start, end, text):
+        """
+        Replace the text between `start` and `end` with `text`, and parse
+        again. Return the new result, or a `ParseFailure`.
+        """
+        p = self.parser
+        if not 0 <= start <= end <= len(p.input):
+            raise ValueError("bad edit span %s:%s" % (start, end))
+        columns, reach = p._p_columns, p._p_reach
+        delta = len(text) - (end - start)
+        # the entries before the edit that examined it: the ones close to
+        # it, and the few that examined many chars
+        crossing = set(range(max(0, start - p._p_short_reach), start))
+        crossing.update(pos for pos in p._p_far if pos < start)
+        for pos in crossing:
+            limit = start - pos
+            if reach[pos] <= limit:
+                continue
+            kept = dict((key, entry) for key, entry in columns[pos].items()
+                        if entry[2] <= limit)
+            columns[pos] = kept or None
+            reach[pos] = max([entry[2] for entry in kept.values()] or [0])
+        # the entries of the replaced text are dropped, the following ones
+        # shift with the text
+        columns[start:end] = [None] * len(text)
+        reach[start:end] = [0] * len(text)
+        p._p_far = set(pos if pos < start else pos + delta
+                       for pos in p._p_far if not start <= pos < end)
+        newlines = p._p_newlines
+        if newlines is not None:
+            newline = b"\n" if p.__binary__ else "\n"
+            low = bisect.bisect_left(newlines, start)
+            high = bisect.bisect_left(newlines, end)
+            newlines[low:] = [start + m.start()
+                              for m in re.finditer(newline, text)] + [
+                offset + delta for offset in newlines[high:]]
+        p.input = p.input[:start] + text + p.input[end:]
+        return self.parse()
+
+
+class ParseCache(object):
+    """
+    A thread-safe LRU cache of parse results, keyed by
+    `(input, methodname, parse_all)`.
+    """
+    # guards the lazy creation of the per-class caches
+    creation_lock = threading.Lock()
+
+    def __init__(self, maxsize, copier=None):
+        self.maxsize = maxsize
+        self.copier = copier
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+
+    def get(self, key, default=None):
+        "Return the cached result of `key` or `default`, count hits/misses"
+        with self._lock:
+            try:
+                result = self._results.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._results[key] = result
+            self.hits += 1
+        return self._copy(result)
+
+    def put(self, key, result):
+        "Cache `result`, evict the least recently used result if needed"
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = result
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return self._copy(result)
+
+    def _copy(self, result):
+        if not self.copier:
+            return result
+        if self.copier is True:
+            return copy.deepcopy(result)
+        return self.copier(result)
+
+    def clear(self):
+        "Empty the cache and reset the counters"
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        "Return a dict of the cache counters"
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses,
+                        maxsize=self.maxsize, currsize=len(self._results))
+
+
+def _map_file(path):
+    """
+    Return a read-only memory map of the file at `path`, closed when it's
+    garbage collected
+    """
+    with open(path, "rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            return b""
+
+
+def _unique(items):
+    "Return the items without duplicates, in order"
+    result = []
+    for item in items:
+        if item not in result:
+            result.append(item)
+    return result
 
 
 class ParserMixin(object):
@@ -39,7 +551,45 @@ class ParserMixin(object):
     # __debug___ = True
     __debug___ = False
     __code_gen__ = True
+    # max number of results cached by `p_parse`. None disables the cache
+    __parse_cache__ = None
+    # True deep-copies the cached results, a callable copies them its own way
+    __parse_cache_copy__ = False
+    # {"rule": "sync_rule"}: in `p_parse_recover`, when `rule` fails, skip
+    # the input up to the next match of `sync_rule`
+    __recover__ = {}
+    # these rules only recognize their match, and return a `LazyResult`
+    __deferred__ = ()
+    # True parses bytes-like inputs (bytes, bytearray, memoryview)
+    __binary__ = False
+    # the chars whose offsets are indexed, to skip to the next one at once
+    # (see p_skip_until)
+    __structural__ = ""
+    # the rules matched by a master regex, that splits the input into
+    # tokens (see p_token)
+    __tokens__ = ()
+    # a regex of the blanks and the comments skipped before each terminal
+    # (see p_skip_trivia)
+    __trivia__ = ""
     _p_action_classes = []
+    # set by the compiler
+    _p_rule_names = ()
+    _p_lazy_errors = False
+    _p_incremental = False
+    _p_search_hints = {}
+    # the memo entries that examined more chars are indexed, see
+    # ParseSession.edit
+    _p_short_reach = 64
+    # the regexes of p_skip_until, by chars and `__binary__`
+    _p_until_regexes = {}
+    # the master regex of `__tokens__`, and the kinds of its groups
+    _p_lexer = None
+    _p_token_kinds = {}
+    # the regex that skips the trivia
+    _p_trivia = None
+    # the recognizers generated on the first p_match, see
+    # FastidiousCompiler.add_recognizers
+    _p_lazy_recognizers = None
 
     class NoMatch(object):
         pass
@@ -52,8 +602,29 @@ class ParserMixin(object):
         self._debug_indent = 0
         self._p_savepoint_stack = []
         self._p_memoized = {}
+        self._p_failures = {}
+        # end positions of the matches of the recognizers
+        self._p_matched = {}
+        # the furthest position examined by the memoized expression being
+        # parsed (incremental parsers)
+        self._p_examined = 0
+        if self._p_incremental:
+            # the memo entries, by position, and the longest span they
+            # examined (see p_memo_store)
+            self._p_columns = [None] * (len(input) + 1)
+            self._p_reach = [0] * (len(input) + 1)
+            self._p_far = set()
 
         self._p_error_stack = [(0, 0)]
+        # offsets of the newlines, built by p_line_col on first use
+        self._p_newlines = None
+        # the offsets of the structural chars, see p_structural_index
+        self._p_structural = None
+        # the starts, the ends and the kinds of the tokens, see p_tokenize
+        self._p_tokens = None
+        self._p_token_next = 0
+        # the failures `p_recover` recovered from
+        self._p_recovered = []
 
     def p_nomatch(self, id):
         head = self._p_error_stack[0]
@@ -62,15 +633,324 @@ class ParserMixin(object):
         elif self.pos > head[0]:
             self._p_error_stack = [(self.pos, id)]
 
+    def p_track_errors(self):
+        """
+        Make this parser track the parsing errors, for `p_raise`.
+
+        Parsers compiled with `FastidiousCompiler(lazy_errors=True)` don't
+        track the errors by default. `p_parse` calls this method and parses
+        the input a second time, only when the first parsing fails. Call it
+        before parsing if you call the rule methods and `p_raise` yourself.
+        """
+        if not self._p_lazy_errors:
+            return
+        for name in self._p_rule_names:
+            for method in (name, "_p_match_" + name, "_p_gen_" + name,
+                           "_p_gen_match_" + name, "_p_full_" + name):
+                tracking = getattr(self, "_p_errors_" + method, None)
+                if tracking is not None:
+                    setattr(self, method, tracking)
+
+    def p_recover(self, name, sync):
+        """
+        Make the rule `name` recover from its failures (internal use)
+
+        When the rule fails past its start position, the failure is
+        recorded and the input is skipped up to the end of the next match of
+        the rule `sync`, or to the end of the input. The rule then returns
+        the `ParseFailure` as its result.
+        """
+        # the stackless parsers call the generator of the rule
+        generator = hasattr(self, "_p_gen_" + name)
+        if generator:
+            name = "_p_gen_" + name
+        rule = getattr(self, name)
+
+        def recovering():
+            start_pos = self.pos
+            return recover(start_pos, rule())
+
+        def recovering_generator():
+            start_pos = self.pos
+            result = yield rule()
+            self._p_return = recover(start_pos, result)
+
+        def recover(start_pos, result):
+            if result is not self.NoMatch:
+                return result
+            failure = self.p_failure()
+            if failure.pos <= start_pos:
+                # the rule just doesn't apply here
+                self.pos = start_pos
+                return result
+            sync_rule = getattr(self, sync)
+            pos = failure.pos
+            while pos < len(self.input):
+                self.pos = pos
+                if sync_rule() is not self.NoMatch:
+                    break
+                pos += 1
+            else:
+                self.pos = pos
+            self._p_recovered.append(failure)
+            # start over the error tracking
+            self._p_error_stack = [(0, 0)]
+            return failure
+
+        setattr(self, name, recovering_generator if generator else recovering)
+
+    def p_apply_limits(self, limits):
+        """
+        Enforce the `ParseLimits` `limits` on this parser (internal use)
+
+        The rule methods are wrapped on the instance, parsers without limits
+        don't pay for them.
+        """
+        clock = getattr(time, "monotonic", time.time)
+        deadline = None
+        if limits.timeout is not None:
+            deadline = clock() + limits.timeout
+        # the number of rule calls, the call count of the next check, the
+        # furthest position
+        state = [0, 0, 0]
+
+        def abort(reason, message):
+            line, col = self.p_line_col()
+            message = "Parsing aborted at line %s, col %s: %s" % (
+                line, col, message)
+            raise ParseLimitError(message, reason, self.pos, line, col)
+
+        def check():
+            steps = state[0]
+            state[1] = steps + limits.check_every
+            if limits.steps is not None:
+                if steps > limits.steps:
+                    abort("steps", "more than %s steps" % limits.steps)
+                state[1] = min(state[1], limits.steps + 1)
+            if deadline is not None and clock() > deadline:
+                abort("timeout", "timeout after %ss" % limits.timeout)
+            memo_size = len(self._p_memoized) + len(self._p_matched)
+            if limits.max_memo is not None and memo_size > limits.max_memo:
+                abort("memo", "more than %s memo entries" % (
+                    limits.max_memo))
+            if limits.cancel is not None and limits.cancel.is_set():
+                abort("cancelled", "cancelled")
+            if limits.progress is not None:
+                state[2] = max(state[2], self.pos)
+                limits.progress(state[2])
+
+        def limited(method):
+            def wrapper():
+                state[0] += 1
+                if state[0] >= state[1]:
+                    check()
+                return method()
+            return wrapper
+
+        for name in self._p_rule_names:
+            for method, generator in ((name, "_p_gen_" + name),
+                                      ("_p_match_" + name,
+                                       "_p_gen_match_" + name)):
+                # the stackless parsers call the generators of the rules
+                if hasattr(self, generator):
+                    method = generator
+                if hasattr(self, method):
+                    setattr(self, method, limited(getattr(self, method)))
+
+    def p_defer(self, name):
+        """
+        Match the deferred rule `name` with its recognizer, and return a
+        `LazyResult` (internal use)
+        """
+        start = self.pos
+        if getattr(self, "_p_match_" + name)() is self.NoMatch:
+            return self.NoMatch
+        return LazyResult(self, name, start, self.pos)
+
+    def p_memo_failure(self, key, pos):
+        """
+        Record that the memoized expression `key` fails at `pos` (internal
+        use)
+
+        Failures are stored in one bitset per expression, indexed by
+        position, instead of a `(key, pos)` entry in the memo dict. The
+        bitsets are split in chunks, allocated where the expression fails.
+        """
+        failures = self._p_failures.get(key)
+        if failures is None:
+            failures = self._p_failures[key] = {}
+        chunk = failures.get(pos >> FAILURE_CHUNK_BITS)
+        if chunk is None:
+            chunk = failures[pos >> FAILURE_CHUNK_BITS] = bytearray(
+                FAILURE_CHUNK_BYTES)
+        chunk[(pos >> 3) & FAILURE_BYTE_MASK] |= 1 << (pos & 7)
+
+    def p_memo_store(self, key, pos, result, error_stack=None):
+        """
+        Memoize the `result` of `key` at `pos` (incremental parsers,
+        internal use)
+
+        The entries are stored relative to their position, with the length
+        of their match and of the span of input they examined, so that an
+        edit only drops the entries that examined it, and shifts the others
+        (see ParseSession).
+
+        The failures recorded while parsing the entry, in a stack of their
+        own, are stored with it too and recorded again in `error_stack`,
+        the stack of the parser. A reused entry records them again, as if
+        it were parsed (see p_memo_errors).
+        """
+        errors = None
+        if error_stack is not None:
+            found, self._p_error_stack = self._p_error_stack, error_stack
+            if found[0][0] >= 0:
+                errors = tuple((at - pos, id) for at, id in found)
+                self.p_memo_errors(pos, errors)
+        examined = self._p_examined - pos
+        column = self._p_columns[pos]
+        if column is None:
+            column = self._p_columns[pos] = {}
+        column[key] = result, self.pos - pos, examined, errors
+        if examined > self._p_reach[pos]:
+            self._p_reach[pos] = examined
+            if examined > self._p_short_reach:
+                self._p_far.add(pos)
+
+    def p_memo_errors(self, pos, errors):
+        """
+        Record the failures `errors` of the memo entry at `pos`, like
+        `p_nomatch` (incremental parsers, internal use)
+        """
+        stack = self._p_error_stack
+        for offset, id in errors:
+            at = pos + offset
+            if at > stack[0][0]:
+                stack = self._p_error_stack = [(at, id)]
+            else:
+                stack.append((at, id))
+
+    def p_memo_failed(self, key, pos):
+        "Return True if `key` is known to fail at `pos` (internal use)"
+        chunk = self._p_failures.get(key, {}).get(pos >> FAILURE_CHUNK_BITS)
+        return chunk is not None and bool(
+            chunk[(pos >> 3) & FAILURE_BYTE_MASK] & (1 << (pos & 7)))
+
+    def p_left_recursion(self, key, body):
+        """
+        Match the left recursive rule `body` at current position (internal
+        use)
+
+        The memo is seeded with a failure, then `body` is run again and
+        again, each run finding the previous match in the memo, as long as
+        the match grows.
+        """
+        start_pos = self.pos
+        memo = self._p_memoized.get((key, start_pos))
+        if memo is not None:
+            result, self.pos = memo
+            return result
+        if self.p_memo_failed(key, start_pos):
+            return self.NoMatch
+        self._p_memoized[(key, start_pos)] = self.NoMatch, start_pos
+        result, end_pos = self.NoMatch, start_pos - 1
+        while 42:
+            self.pos = start_pos
+            grown = body()
+            if grown is self.NoMatch or self.pos <= end_pos:
+                break
+            result, end_pos = grown, self.pos
+            self._p_memoized[(key, start_pos)] = result, end_pos
+        self.pos = start_pos if result is self.NoMatch else end_pos
+        return result
+
+    def p_left_recursion_gen(self, key, body):
+        """
+        Same as `p_left_recursion`, for the stackless parsers (internal
+        use)
+        """
+        start_pos = self.pos
+        memo = self._p_memoized.get((key, start_pos))
+        if memo is not None:
+            self._p_return, self.pos = memo
+            return
+        if self.p_memo_failed(key, start_pos):
+            self._p_return = self.NoMatch
+            return
+        self._p_memoized[(key, start_pos)] = self.NoMatch, start_pos
+        result, end_pos = self.NoMatch, start_pos - 1
+        while 42:
+            self.pos = start_pos
+            grown = yield body()
+            if grown is self.NoMatch or self.pos <= end_pos:
+                break
+            result, end_pos = grown, self.pos
+            self._p_memoized[(key, start_pos)] = result, end_pos
+        self.pos = start_pos if result is self.NoMatch else end_pos
+        self._p_return = result
+
+    def p_run(self, generator):
+        """
+        Run the generator of a rule of a stackless parser (internal use)
+
+        The generators yield the generators of the rules they call, and
+        set `_p_return` to their result before they stop. The pending
+        calls are stacked in a list, so the nesting depth is only limited
+        by the memory.
+        """
+        stack = []
+        result = None
+        while 42:
+            try:
+                callee = generator.send(result)
+            except StopIteration:
+                if not stack:
+                    return self._p_return
+                generator = stack.pop()
+                result = self._p_return
+            else:
+                stack.append(generator)
+                generator = callee
+                result = None
+
+    def p_slide(self):
+        """
+        Forget the input and the memo before the oldest position the parser
+        can backtrack to: the oldest savepoint, or the current position
+        (streams only, internal use)
+        """
+        stack = self._p_savepoint_stack
+        # the savepoints are pushed in order
+        mark = stack[0][0] if stack else self.pos
+        input = self.input
+        if (mark - input.offset) * 2 < len(input.data) or mark == input.offset:
+            # wait for half the window to be dead, so that the memo is
+            # filtered a bounded number of times per position
+            return
+        input.discard(mark)
+        self._p_memoized = dict(
+            (k, v) for k, v in self._p_memoized.items() if k[1] >= mark)
+        self._p_matched = dict(
+            (k, v) for k, v in self._p_matched.items() if k[1] >= mark)
+        first = mark >> FAILURE_CHUNK_BITS
+        for failures in self._p_failures.values():
+            for dead in [chunk for chunk in failures if chunk < first]:
+                del failures[dead]
+
     def p_suffix(self, length=None, elipsis=False):
         "Return the rest of the input"
         if length is not None:
             result = self.input[self.pos:self.pos + length]
             if elipsis and len(result) == length:
-                result += "..."
+                result = self._p_text(result) + "..."
             return result
         return self.input[self.pos:]
 
+    def _p_text(self, chunk):
+        "Return the `chunk` of the input as text, for the messages"
+        if not self.__binary__ or isinstance(chunk, six.text_type):
+            return chunk
+        return bytes(chunk).decode("latin-1")
+
     def p_debug(self, message):
         "Format and print debug messages"
         print("{}{} `{}`".format(self._debug_indent * " ",
@@ -107,65 +987,281 @@ class ParserMixin(object):
         "Pop and forget a savepoint (internal use)"
         self._p_savepoint_stack.pop()
 
+    def _p_line_bounds(self, line):
+        "Return the start and end offsets of `line`"
+        newlines = self._p_newlines
+        start = newlines[line - 1] + 1 if line else 0
+        end = newlines[line] if line < len(newlines) else len(self.input)
+        return start, end
+
+    def _p_newline_offsets(self):
+        "Return the offsets of the newlines, indexed on first use"
+        newlines = self._p_newlines
+        if newlines is None:
+            if "\n" in self.__structural__ and not self._p_incremental:
+                # the sessions edit the list of newlines
+                newlines = self.p_structural_index("\n")
+            if newlines is None:
+                newline = b"\n" if self.__binary__ else "\n"
+                newlines = [
+                    m.start() for m in re.finditer(newline, self.input)]
+            self._p_newlines = newlines
+        return newlines
+
+    def p_structural_index(self, chars):
+        """
+        Return the sorted offsets of the `chars` of the input, an
+        `array.array`, or None when the input can't be indexed: NumPy isn't
+        installed, the input is a stream, or text that isn't ASCII.
+        `chars` are `__structural__`.
+
+        The first call finds the offsets of all the structural chars, in one
+        vectorized pass over the bytes, or over an ASCII copy of the text.
+        Other text would need a UTF-32 copy, four bytes per char, so it is
+        left to the regex skips.
+        """
+        if numpy is None or isinstance(self.input, StreamBuffer):
+            return None
+        if self._p_structural is None:
+            self._p_structural = {}, self._p_structural_offsets()
+        indexes, offsets = self._p_structural
+        if offsets is None:
+            return None
+        index = indexes.get(chars)
+        if index is None:
+            found = numpy.sort(numpy.concatenate(
+                [offsets[char] for char in set(chars)]))
+            index = indexes[chars] = array.array("q")
+            index.frombytes(found.astype(numpy.int64).tobytes())
+        return index
+
+    def _p_structural_offsets(self):
+        """
+        Return the offsets of each structural char, as NumPy arrays, or None
+        for text that isn't ASCII
+        """
+        input = self.input
+        if not self.__binary__:
+            try:
+                input = input.encode("ascii")
+            except UnicodeEncodeError:
+                return None
+        codes = numpy.frombuffer(input, numpy.uint8)
+        offsets = {}
+        for char in set(self.__structural__):
+            if ord(char) > 0xff:
+                offsets[char] = numpy.zeros(0, numpy.int64)
+            else:
+                offsets[char] = numpy.flatnonzero(codes == ord(char))
+        return offsets
+
+    def p_skip_until(self, chars, pos):
+        """
+        Return the offset of the first of the structural `chars` at or after
+        `pos`, or the length of the input (internal use)
+
+        Without an index, a regex of the other chars finds it.
+        """
+        index = self.p_structural_index(chars)
+        if index is None:
+            regexes = self._p_until_regexes
+            regex = regexes.get((chars, self.__binary__))
+            if regex is None:
+                pattern = "[^%s]*" % re.escape(chars)
+                if self.__binary__:
+                    pattern = pattern.encode("latin-1")
+                regex = regexes[chars, self.__binary__] = re.compile(pattern)
+            if isinstance(self.input, StreamBuffer):
+                regex = _StreamRegex(regex)
+            return regex.match(self.input, pos).end()
+        found = bisect.bisect_left(index, pos)
+        if found < len(index):
+            return index[found]
+        return len(self.input)
+
+    def p_tokenize(self):
+        """
+        Split the input into the tokens of `__tokens__`, and return three
+        `array.array`: their start offsets, their end offsets and their
+        kinds, their index in `__tokens__`. The chars where no token starts
+        are skipped, and so are the trivia (see `__trivia__`).
+        """
+        starts, ends = array.array("q"), array.array("q")
+        kinds = array.array("H")
+        match, kinds_of = self._p_lexer.match, self._p_token_kinds
+        input, pos, size = self.input, 0, len(self.input)
+        trivia = self._p_trivia
+        while pos < size:
+            if trivia is not None:
+                # the tokens start where the parser looks for them
+                pos = trivia.match(input, pos).end()
+            m = match(input, pos)
+            end = m.end() if m else pos
+            if end == pos:
+                pos += 1
+                continue
+            starts.append(pos)
+            ends.append(end)
+            kinds.append(kinds_of[m.lastindex])
+            pos = end
+        return starts, ends, kinds
+
+    def p_token(self, kind):
+        """
+        Return the end of the token at the current position if it's of
+        `kind`, else None (internal use)
+
+        The input is tokenized by the first call, the later calls find the
+        token by its start offset, usually the one after the last match.
+        A token that starts within another one, after a failure, and the
+        tokens of a stream, are matched by the lexer.
+        """
+        pos, tokens = self.pos, self._p_tokens
+        if tokens is None and not isinstance(self.input, StreamBuffer):
+            tokens = self._p_tokens = self.p_tokenize()
+        if tokens is not None:
+            starts, ends, kinds = tokens
+            # the index of the token that follows the last one matched, if
+            # pos is at its start or in the gap before it
+            found, size = self._p_token_next, len(starts)
+            ahead = found < size and pos > starts[found]
+            if ahead or found and pos < ends[found - 1]:
+                found = bisect.bisect_left(starts, pos)
+            if found < size and starts[found] == pos:
+                if kinds[found] != kind:
+                    return None
+                self._p_token_next = found + 1
+                return ends[found]
+            between = found == 0 or ends[found - 1] <= pos
+            if between and self._p_trivia is None:
+                # the lexer matched nothing here. It didn't look within the
+                # trivia
+                return None
+        lexer = self._p_lexer
+        if tokens is None:
+            # the window moves, the tokens are matched where they're parsed
+            lexer = _StreamRegex(lexer)
+        m = lexer.match(self.input, pos)
+        if m is None or m.end() == pos:
+            return None
+        if self._p_token_kinds[m.lastindex] != kind:
+            return None
+        return m.end()
+
+    def p_skip_trivia(self, pos):
+        """
+        Return the offset that follows the trivia at `pos` (see
+        `__trivia__`)
+        """
+        trivia = self._p_trivia
+        if isinstance(self.input, StreamBuffer):
+            trivia = _StreamRegex(trivia)
+        return trivia.match(self.input, pos).end()
+
+    def p_at_end(self):
+        """
+        Tell if the parser is at the end of the input. It skips the trailing
+        trivia.
+        """
+        if self._p_trivia is not None:
+            self.pos = self.p_skip_trivia(self.pos)
+        return self.p_peek() is None
+
+    def p_line_end(self, pos):
+        """
+        Return the offset that follows the end of the line at `pos`, its
+        newline included
+        """
+        newlines = self._p_newline_offsets()
+        line = bisect.bisect_left(newlines, pos)
+        if line < len(newlines):
+            return newlines[line] + 1
+        return len(self.input) + 1
+
+    def p_line_col(self, pos=None):
+        """
+        Return the line number and the column of `pos` (default: current
+        position).
+
+        The offsets of the newlines are indexed the first time this method
+        is called, later calls are O(log(lines)).
+        """
+        if pos is None:
+            pos = self.pos
+        if isinstance(self.input, StreamBuffer):
+            return self.input.line_col(pos)
+        newlines = self._p_newline_offsets()
+        line = bisect.bisect_left(newlines, pos)
+        if line == 0:
+            return 0, pos
+        return line, pos - newlines[line - 1]
+
     @property
     def p_current_line(self):
         "Return current line number"
-        return self.input[:self.pos].count('\n')
+        return self.p_line_col()[0]
 
     @property
     def p_current_col(self):
         "Return currnet column in line"
-        prefix = self.input[:self.pos]
-        nlidx = prefix.rfind('\n')
-        if nlidx == -1:
-            return self.pos
-        return self.pos - nlidx
+        return self.p_line_col()[1]
 
     def p_pretty_pos(self):
         "Print current line and a pretty cursor below. Used in error messages"
-        col = self.p_current_col
-        suffix = self.input[self.pos - col:]
-        end = suffix.find("\n")
-        if end != -1:
-            suffix = suffix[:end]
-        return "%s\n%s" % (suffix, "-" * col + "^")
+        if isinstance(self.input, StreamBuffer):
+            start, end = self.input.line_bounds(self.pos)
+        else:
+            line, _ = self.p_line_col()
+            start, end = self._p_line_bounds(line)
+        return "%s\n%s" % (self._p_text(self.input[start:end]),
+                           "-" * (self.pos - start) + "^")
 
     def p_parse_error(self, message):
+        line, col = self.p_line_col()
         raise ParserError(
             "Error at line %s, col %s: %s" % (
-                self.p_current_line,
-                self.p_current_col,
+                line,
+                col,
                 message
-            )
+            ),
+            pos=self.pos, line=line, col=col
         )
 
-    def p_syntax_error(self, *expected):
+    def p_syntax_message(self, *expected):
+        "Return the message of a syntax error at current position"
         def prettify(i):
             if i.replace("_", "").isalnum():
                 return i
             return "`%s`" % i
-        expected = set(expected)
-        expected = [prettify(item) for item in expected]
+        expected = [prettify(item) for item in _unique(expected)]
         expected = " or ".join(expected)
-        raise ParserError(
+        line, col = self.p_line_col()
+        return (
             "Syntax error at line %s, col %s:"
             "\n\n%s\n\n"
             "Got `%s` expected %s "
             "" % (
-                self.p_current_line,
-                self.p_current_col,
+                line,
+                col,
                 self.p_pretty_pos(),
-                self.p_suffix(10, elipsis=True).replace(
+                self._p_text(self.p_suffix(10, elipsis=True)).replace(
                     '\n', "\\n") or "EOF",
                 expected)
         )
 
+    def p_syntax_error(self, *expected):
+        line, col = self.p_line_col()
+        raise ParserError(self.p_syntax_message(*expected), pos=self.pos,
+                          line=line, col=col, expected=_unique(expected))
+
     def p_startswith(self, st, ignorecase=False):
         "Return True if the input starts with `st` at current position"
         length = len(st)
         matcher = result = self.input[self.pos:self.pos + length]
         if ignorecase:
-            matcher = result.lower()
+            if isinstance(matcher, memoryview):
+                matcher = matcher.tobytes()
+            matcher = matcher.lower()
             st = st.lower()
         if matcher == st:
             self.pos += length
@@ -188,12 +1284,11 @@ class ParserMixin(object):
         'abc'
 
         """
-        if isinstance(value, six.string_types):
+        if isinstance(value, six.string_types + (bytes, bytearray,
+                                                 memoryview)):
             return value
-        result = ""
-        for i in value:
-            result += self.p_flatten(i)
-        return result
+        empty = b"" if self.__binary__ else ""
+        return empty.join([self.p_flatten(i) for i in value])
 
     def p_flatten_list(self, value, **kwargs):
         result = []
@@ -205,31 +1300,323 @@ class ParserMixin(object):
         return result
 
     @classmethod
-    def p_parse(cls, input, methodname=None, parse_all=True):
+    def p_parse(cls, input, methodname=None, parse_all=True, limits=None):
         """
         Parse the `input` using `methodname` as entry point.
 
         If `parse_all` is true, the input MUST be fully consumed at the end of
         the parsing, otherwise p_parse raises an exception.
+
+        If the class sets `__parse_cache__`, results are cached (see
+        `p_parse_cache`).
+
+        `limits` is an optional `ParseLimits`. The parsing raises
+        `ParseLimitError` when it exceeds one of them.
+        """
+        result = cls.p_try_parse(input, methodname, parse_all, limits)
+        if isinstance(result, ParseFailure):
+            result.raise_error()
+        return result
+
+    @classmethod
+    def p_parse_file(cls, path, methodname=None, parse_all=True,
+                     limits=None, encoding="utf-8"):
+        """
+        Parse the file at `path`, see `p_parse`.
+
+        Parsers of bytes (`__binary__`) parse a read-only memory map of the
+        file: the OS pages the input in on demand, and it's never copied.
+        The other parsers read the file and decode it with `encoding`.
+        """
+        if cls.__binary__:
+            input = _map_file(path)
+        else:
+            with open(path, "rb") as f:
+                input = f.read().decode(encoding)
+        return cls.p_parse(input, methodname, parse_all, limits)
+
+    @classmethod
+    def p_parse_stream(cls, stream, methodname=None, parse_all=True,
+                       limits=None, chunk_size=16384):
+        """
+        Parse the file-like object `stream`, see `p_parse`. `stream.read`
+        returns text, or bytes for the parsers of bytes (`__binary__`).
+
+        The stream is read by chunks of `chunk_size` as the parser looks
+        ahead. The input before the oldest position the parser can
+        backtrack to is discarded, and so are the memo entries there.
         """
         if methodname is None:
             methodname = cls.__default__
+        p = cls._p_stream_parser(stream, chunk_size)
+        if limits is not None:
+            p.p_apply_limits(limits)
+        result = getattr(p, methodname)()
+        if result is cls.NoMatch or parse_all and not p.p_at_end():
+            p.p_failure().raise_error()
+        return result
+
+    @classmethod
+    def _p_stream_parser(cls, stream, chunk_size):
+        "Return a parser of the file-like object `stream`"
+        if not hasattr(cls, "_p_py_constants"):
+            raise ValueError("streams need the code generation")
+        if cls._p_incremental:
+            raise ValueError("incremental parsers can't parse streams")
+        input = StreamBuffer(stream, chunk_size, cls.__binary__)
         p = cls(input)
+        input.parser = p
+        p._p_py_constants = dict(
+            (id, dict(consts, regex=_StreamRegex(consts["regex"]))
+             if "regex" in consts else consts)
+            for id, consts in cls._p_py_constants.items())
+        if cls._p_lazy_errors:
+            # a stream can't be parsed again
+            p.p_track_errors()
+        return p
+
+    @classmethod
+    def p_iter(cls, input, rule=None, limits=None, chunk_size=16384):
+        """
+        Parse `input` as a sequence of `rule` (default: `__default__`)
+        matches, and yield their results one at a time, as soon as they're
+        parsed.
+
+        `input` is a string, or a file-like object read as in
+        `p_parse_stream`. The memo is reset between the records, so the
+        memory used is the one of a record, not of the whole input. A
+        record that doesn't match raises `ParserError` when it's reached.
+        `limits` apply to the whole iteration.
+        """
+        if rule is None:
+            rule = cls.__default__
+        streamed = hasattr(input, "read")
+        if streamed:
+            p = cls._p_stream_parser(input, chunk_size)
+        else:
+            p = cls(input)
+        if limits is not None:
+            p.p_apply_limits(limits)
+        method = getattr(p, rule)
+        while not p.p_at_end():
+            start = p.pos
+            # forget the previous records
+            p._p_memoized, p._p_matched, p._p_failures = {}, {}, {}
+            p._p_error_stack = [(0, 0)]
+            result = method()
+            if result is cls.NoMatch or p.pos == start:
+                if cls._p_lazy_errors and not streamed:
+                    # parse the record again, tracking the errors this time
+                    p = cls(input)
+                    p.p_track_errors()
+                    p.pos = start
+                    getattr(p, rule)()
+                p.p_failure().raise_error()
+            yield result
+
+    @classmethod
+    def p_try_parse(cls, input, methodname=None, parse_all=True,
+                    limits=None):
+        """
+        Same as `p_parse`, but return a `ParseFailure` instead of raising
+        an exception when the parsing fails. Exceeded limits still raise
+        `ParseLimitError`.
+        """
+        if methodname is None:
+            methodname = cls.__default__
+        cache = cls.p_parse_cache()
+        if cache is not None:
+            key = (input, methodname, parse_all)
+            if isinstance(input, (bytearray, memoryview)):
+                # mutable, or not always hashable
+                key = (bytes(input), methodname, parse_all)
+            try:
+                result = cache.get(key, cls.NoMatch)
+            except TypeError:
+                # unhashable input
+                cache = None
+            else:
+                if result is not cls.NoMatch:
+                    return result
+        p = cls(input)
+        if limits is not None:
+            p.p_apply_limits(limits)
         result = getattr(p, methodname)()
-        if result is cls.NoMatch or parse_all and p.p_peek() is not None:
-            p.p_raise()
+        if result is cls.NoMatch or parse_all and not p.p_at_end():
+            if cls._p_lazy_errors:
+                # parse again, tracking the errors this time
+                p = cls(input)
+                p.p_track_errors()
+                if limits is not None:
+                    p.p_apply_limits(limits)
+                getattr(p, methodname)()
+            return p.p_failure()
+        if cache is not None:
+            result = cache.put(key, result)
         return result
 
-    def p_raise(self):
-        expected = []
+    @classmethod
+    def p_match(cls, input, rule=None):
+        """
+        Return the end position of the match of `rule` (default:
+        `__default__`) at the start of `input`, or None if it doesn't match.
+
+        The rule runs as a recognizer: no result is built and no action is
+        run.
+        """
+        if rule is None:
+            rule = cls.__default__
+        if cls._p_lazy_recognizers:
+            cls.p_compiler.add_recognizers(cls)
+        p = cls(input)
+        # interpreted parsers, and the generated modules, may lack the
+        # recognizer
+        recognizer = getattr(p, "_p_match_" + rule, None) or getattr(p, rule)
+        if recognizer() is cls.NoMatch:
+            return None
+        return p.pos
+
+    @classmethod
+    def p_finditer(cls, input, rule=None, pos=0):
+        """
+        Iterate over the non-overlapping matches of `rule` (default:
+        `__default__`) in `input`, from `pos`, as `(start, end, result)`
+        tuples, like `re.finditer`.
+
+        All the attempts share one parser and its memo. The positions where
+        the rule can't start are skipped, with `str.find` if all its matches
+        start with the same literal, with a regex of its first chars
+        otherwise.
+        """
+        if rule is None:
+            rule = cls.__default__
+        prefix, chars = cls._p_search_hints.get(rule, ("", None))
+        skip = None
+        if cls.__binary__:
+            # bytes-like inputs may have no `find`
+            if prefix:
+                skip = re.compile(re.escape(prefix.encode("latin-1")))
+                prefix = ""
+            elif chars is not None:
+                skip = re.compile(
+                    b"[" + re.escape(chars.encode("latin-1")) + b"]")
+        elif not prefix and chars is not None:
+            skip = re.compile("[%s]" % "".join(re.escape(c) for c in chars))
+        p = cls(input)
+        method = getattr(p, rule)
+        end = len(input)
+        while pos <= end:
+            if prefix:
+                pos = input.find(prefix, pos)
+                if pos == -1:
+                    return
+            elif skip is not None:
+                m = skip.search(input, pos)
+                if m is None:
+                    return
+                pos = m.start()
+            p.pos = pos
+            # forget the errors of the previous attempts
+            p._p_error_stack = [(0, 0)]
+            result = method()
+            if result is cls.NoMatch:
+                pos += 1
+                continue
+            yield pos, p.pos, result
+            pos = p.pos if p.pos > pos else pos + 1
+
+    @classmethod
+    def p_search(cls, input, rule=None, pos=0):
+        """
+        Return the first match of `rule` in `input` as a `(start, end,
+        result)` tuple, or None (see `p_finditer`).
+        """
+        for match in cls.p_finditer(input, rule, pos):
+            return match
+        return None
+
+    @classmethod
+    def p_parse_recover(cls, input, methodname=None, parse_all=True):
+        """
+        Parse the `input` using `methodname` as entry point, and recover
+        from the syntax errors in the rules of `__recover__`.
+
+        Return `(result, errors)` where `errors` is the list of the
+        `ParseFailure` found in one pass. In the result, the failed rules
+        are replaced by their `ParseFailure`. The result is None if the
+        parsing could not recover.
+        """
+        if methodname is None:
+            methodname = cls.__default__
+        p = cls(input)
+        p.p_track_errors()
+        for name, sync in cls.__recover__.items():
+            p.p_recover(name, sync)
+        result = getattr(p, methodname)()
+        errors = p._p_recovered
+        if result is cls.NoMatch or parse_all and not p.p_at_end():
+            errors.append(p.p_failure())
+            if result is cls.NoMatch:
+                result = None
+        return result, errors
+
+    @classmethod
+    def p_parse_cache(cls):
+        """
+        Return the `ParseCache` of this class, or None if `__parse_cache__`
+        is not set.
+
+        Each parser class has its own cache, with at most `__parse_cache__`
+        results. Parsing errors are not cached. Results are shared between
+        the callers unless `__parse_cache_copy__` is set.
+        """
+        if not cls.__parse_cache__:
+            return None
+        cache = cls.__dict__.get("_p_parse_cache")
+        if cache is None:
+            with ParseCache.creation_lock:
+                cache = cls.__dict__.get("_p_parse_cache")
+                if cache is None:
+                    cache = ParseCache(cls.__parse_cache__,
+                                       cls.__parse_cache_copy__)
+                    cls._p_parse_cache = cache
+        return cache
+
+    @classmethod
+    def p_cache_info(cls):
+        "Return the hits/misses/maxsize/currsize counters of the parse cache"
+        cache = cls.p_parse_cache()
+        if cache is None:
+            return None
+        return cache.info()
+
+    @classmethod
+    def p_cache_clear(cls):
+        "Empty the parse cache of the class"
+        cache = cls.p_parse_cache()
+        if cache is not None:
+            cache.clear()
+
+    def p_failure(self):
+        """
+        Return a `ParseFailure` at the furthest error found by the parser,
+        and move the parser there.
+        """
+        expected_ids = []
         current_pos = -1
 
         if self.__debug___:
             print(self._p_error_stack)
 
-        # check aliased rules
+        # check aliased rules. The token and trivia parsers only report the
+        # terminals at the furthest error, where the token didn't match or
+        # after the trivia, whatever the entries recorded below it
+        furthest = self._p_error_stack[0][0]
         for pos, id in self._p_error_stack:
-            if pos < current_pos:
+            if self.__tokens__ or self.__trivia__:
+                if pos < furthest:
+                    continue
+            elif pos < current_pos:
                 break
             try:
                 expr = self._p_expressions[id]
@@ -238,10 +1625,10 @@ class ParserMixin(object):
             else:
                 if expr.is_syntaxic_terminal:
                     current_pos = pos
-                    expected += expr.expected
+                    expected_ids.append(id)
 
         # none found, fallback to default tips
-        if not expected:
+        if not expected_ids:
             current_pos = -1
             for pos, id in self._p_error_stack:
                 if current_pos > -1 and pos < current_pos:
@@ -254,9 +1641,12 @@ class ParserMixin(object):
                 else:
                     if hasattr(expr, "expr") or hasattr(expr, "exprs"):
                         continue
-                    expected += expr.expected
+                    expected_ids.append(id)
         self.pos = current_pos
-        return self.p_syntax_error(*expected)
+        return ParseFailure(self, current_pos, expected_ids)
+
+    def p_raise(self):
+        return self.p_failure().raise_error()
 
 
 class _FastidiousParserMixin(object):
@@ -330,29 +1720,50 @@ class _FastidiousParserMixin(object):
         return LiteralExpr(self.p_flatten(lit), ignore == "i")
 
     def on_char_range_expr(self, value, content, ignore):
-        content = self.p_flatten(content)
+        chars, ranges, categories = [], [], []
+        for item in content:
+            if not isinstance(item, tuple):
+                chars.append(self.p_flatten(item))
+            elif item[0] == "p":
+                categories.append(item[1])
+            elif item[0] == "P":
+                categories.append("^" + item[1])
+            else:
+                ranges.append(item)
+        content = "".join(chars)
         if ignore == "i":
             # don't use sets to avoid ordering mess
             content = content.lower()
             upper = content.upper()
             content += "".join([c for c in upper if c not in content])
-        return CharRangeExpr(content)
+        return CharRangeExpr(content, ranges=ranges, categories=categories,
+                             ignorecase=ignore == "i")
 
     def on_class_char_range(self, value, start, end):
-        try:
-            if start.islower():
-                charset = LOWERCASE
-            elif start.isupper():
-                charset = UPPERCASE
-            elif start.isdigit():
-                charset = string.digits
-            starti = charset.index(start)
-            endi = charset.index(end)
-            assert starti <= endi
-            return charset[starti:endi + 1]
-        except Exception:
+        first, last = ord(start), ord(end)
+        if first > last:
             self.p_parse_error(
                 "Invalid char range : `{}`".format(self.p_flatten(value)))
+        if last < 128:
+            # the ASCII ranges are their chars
+            return "".join(six.unichr(cp) for cp in range(first, last + 1))
+        # the others are looked up, see charclass.lookup_tables
+        return (first, last)
+
+    def on_class_property(self, value, negate, name):
+        if name not in charclass.CATEGORIES and not any(
+                name in names for names in charclass.CATEGORIES.values()):
+            self.p_parse_error(
+                "Unknown Unicode category : `{}`".format(
+                    self.p_flatten(value)))
+        return (negate, name)
+
+    def on_code_point_escape(self, value):
+        cp = int(self.p_flatten(value)[1:], 16)
+        if cp > sys.maxunicode:
+            self.p_parse_error(
+                "Invalid code point : `\\{}`".format(self.p_flatten(value)))
+        return six.unichr(cp)
 
     _escaped = {
         "a": "\a",
@@ -1,3 +1,4 @@
+import re
 from setuptools import setup, find_packages
 from codecs import open
 from os import path
@@ -8,10 +9,15 @@ here = path.abspath(path.dirname(__file__))
 with open(path.join(here, 'README.rst'), encoding='utf-8') as f:
     long_description = f.read()
 
+# Get the version from the package, without importing its dependencies
+with open(path.join(here, 'fastidious', '__init__.py'),
+          encoding='utf-8') as f:
+    version = re.search(r'^__version__ = "(.*)"$', f.read(), re.M).group(1)
+
 setup(
     name='fastidious',
 
-    version='0.1dev0',
+    version=version,
 
     description='Yet another python parser generator',
     long_description=long_description,
@@ -66,6 +72,8 @@ setup(
     # $ pip install -e .[dev,test]
     extras_require={
         'test': ['flake8'],
+        # the vectorized index of the __structural__ chars
+        'structural': ['numpy'],
     },
 
 )
@@ -0,0 +1,145 @@
+import asyncio
+from unittest import TestCase
+
+from fastidious import Parser, ParserError, ParseLimits, ParseLimitError
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+from fastidious.aio import FeedParser, parse_stream
+
+
+GRAMMAR = r"""
+    list <- _ "[" _ items:(item (_ "," _ item)*)? _ "]" _ {on_list}
+    item <- number / list / word
+    number <- ~"[0-9]+" {on_number}
+    word <- "é"+ {p_flatten}
+    _ <- [ \n]*
+    """
+
+
+class Lists(Parser):
+    __grammar__ = GRAMMAR
+
+    def on_list(self, value, items):
+        if not items:
+            return []
+        return [items[0]] + [i[3] for i in items[1]]
+
+    def on_number(self, value):
+        return int(value)
+
+
+class BinaryLists(Parser):
+    __binary__ = True
+    __grammar__ = GRAMMAR.replace('"é"', '"e"')
+    on_list = Lists.__dict__["on_list"]
+    on_number = Lists.__dict__["on_number"]
+
+
+TEXT = "[1, [22, é, [333]],\n %s]" % ", ".join(["[4, 5]"] * 200)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class FeedParserTest(TestCase):
+    def test_feed(self):
+        async def parse():
+            parsing = FeedParser(Lists, chunk_size=16)
+            task = asyncio.ensure_future(parsing.result())
+            for i in range(0, len(TEXT), 7):
+                parsing.feed(TEXT[i:i + 7])
+                await asyncio.sleep(0)
+            parsing.feed_eof()
+            result = await task
+            self.assertIs(parsing._loop, asyncio.get_running_loop())
+            return result
+        self.assertEqual(run(parse()), Lists.p_parse(TEXT))
+
+    def test_binary(self):
+        async def parse():
+            parsing = FeedParser(BinaryLists)
+            parsing.feed(b"[1, ")
+            parsing.feed(b"ee]")
+            parsing.feed_eof()
+            return await parsing
+        self.assertEqual(run(parse()), [1, b"ee"])
+
+    def test_reader(self):
+        async def parse(parser, data):
+            reader = asyncio.StreamReader()
+            # the chunks split the "é"
+            reader.feed_data(data)
+            reader.feed_eof()
+            return await parse_stream(parser, reader, chunk_size=5)
+        data = TEXT.encode("utf-8")
+        self.assertEqual(run(parse(Lists, data)), Lists.p_parse(TEXT))
+        self.assertEqual(run(parse(BinaryLists, b"[ee, 1]")), [b"ee", 1])
+
+    def test_time_slice(self):
+        ticks = []
+
+        async def tick():
+            while 42:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def parse():
+            ticker = asyncio.ensure_future(tick())
+            parsing = FeedParser(Lists, time_slice=0,
+                                 limits=ParseLimits(check_every=10))
+            parsing.feed(TEXT)
+            parsing.feed_eof()
+            result = await parsing
+            ticker.cancel()
+            return result
+        self.assertEqual(run(parse()), Lists.p_parse(TEXT))
+        # the event loop ran during the parsing
+        self.assertTrue(len(ticks) > 10)
+
+    def test_errors(self):
+        async def parse(parser, text, **kwargs):
+            parsing = FeedParser(parser, **kwargs)
+            parsing.feed(text)
+            parsing.feed_eof()
+            return await parsing
+        with self.assertRaises(ParserError) as cm:
+            run(parse(Lists, "[1,\n 2 3]"))
+        with self.assertRaises(ParserError) as expected:
+            Lists.p_parse("[1,\n 2 3]")
+        self.assertEqual(str(cm.exception), str(expected.exception))
+        with self.assertRaises(ParseLimitError) as cm:
+            run(parse(Lists, TEXT, limits=ParseLimits(steps=100)))
+        self.assertEqual(cm.exception.reason, "steps")
+
+    def test_interpreted(self):
+        class Interpreted(BaseParser):
+            p_compiler = FastidiousCompiler(gen_code=False)
+            __grammar__ = 'a <- "a"'
+
+        async def parse():
+            parsing = FeedParser(Interpreted)
+            parsing.feed("a")
+            parsing.feed_eof()
+            return await parsing
+        self.assertRaises(ValueError, run, parse())
+
+    def test_cancel(self):
+        async def parse():
+            parsing = FeedParser(Lists)
+            task = asyncio.ensure_future(parsing.result())
+            parsing.feed("[1, ")
+            await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            return parsing
+        parsing = run(parse())
+        parsing._worker.join(1)
+        self.assertFalse(parsing._worker.is_alive())
@@ -0,0 +1,94 @@
+from unittest import TestCase
+
+import six
+
+from fastidious import Parser, ParserError
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+from fastidious.compilers.sanitize import NotBinary
+
+
+class Request(Parser):
+    __binary__ = True
+    __grammar__ = r"""
+    request <- m:method " " p:path " " version crlf h:header* crlf {on_request}
+    method <- "GET" / "post"i
+    path <- ~"/[^ ]*"
+    version <- "HTTP/1." [01]
+    header <- name:[a-zA-Z]+ ":" " "* v:(!crlf .)* crlf {on_header}
+    crlf <- "\r\n"
+    """
+
+    def on_request(self, value, m, p, h):
+        return m, p, dict(h)
+
+    def on_header(self, value, name, v):
+        return bytes(name), self.p_flatten(v)
+
+
+SOURCE = b"GET /index.html HTTP/1.1\r\nHost: a.org\r\nAccept: */*\r\n\r\n"
+
+
+class BinaryTest(TestCase):
+    def test_bytes_like(self):
+        for source in (SOURCE, bytearray(SOURCE), memoryview(SOURCE)):
+            m, p, headers = Request.p_parse(source)
+            self.assertEqual(bytes(m), b"GET")
+            self.assertEqual(bytes(p), b"/index.html")
+            self.assertEqual(headers, {b"Host": b"a.org", b"Accept": b"*/*"})
+
+    def test_zero_copy(self):
+        m, p, _ = Request.p_parse(memoryview(SOURCE))
+        self.assertIsInstance(m, memoryview)
+        self.assertIsInstance(p, memoryview)
+        self.assertIs(m.obj, SOURCE)
+
+    def test_ignorecase(self):
+        m, _, _ = Request.p_parse(memoryview(b"POST / HTTP/1.0\r\n\r\n"))
+        self.assertEqual(bytes(m), b"POST")
+
+    def test_errors(self):
+        with self.assertRaises(ParserError) as cm:
+            Request.p_parse(b"GET / HTTP/1.1\r\nHost a\r\n\r\n")
+        self.assertEqual((cm.exception.line, cm.exception.col), (1, 5))
+        self.assertIn("Host a", str(cm.exception))
+        self.assertIn('`":"`', str(cm.exception))
+
+    def test_stackless(self):
+        class Stackless(Request):
+            p_compiler = FastidiousCompiler(lazy_errors=True, stackless=True)
+            __grammar__ = Request.__grammar__
+        self.assertEqual(Stackless.p_parse(memoryview(SOURCE))[2],
+                         Request.p_parse(SOURCE)[2])
+        with self.assertRaises(ParserError) as cm:
+            Stackless.p_parse(b"GET / HTTP/1.1\r\nHost a\r\n\r\n")
+        self.assertEqual((cm.exception.line, cm.exception.col), (1, 5))
+
+    def test_match_and_search(self):
+        self.assertEqual(Request.p_match(memoryview(SOURCE)), len(SOURCE))
+        log = memoryview(b"x" + SOURCE + b"y GET / HTTP/1.0\r\n\r\n")
+        starts = [start for start, _, _ in
+                  Request.p_finditer(log, "request")]
+        self.assertEqual(starts, [1, len(SOURCE) + 3])
+
+    def test_standalone(self):
+        out = six.StringIO()
+        Request.p_compiler.gen_py_code(Request, out)
+        module = {}
+        exec(compile(out.getvalue(), "standalone", "exec"), module)
+        standalone = module["Request"]
+        self.assertEqual(standalone.p_parse(memoryview(SOURCE))[2],
+                         Request.p_parse(SOURCE)[2])
+        self.assertRaises(module["ParserError"], standalone.p_parse, b"GET")
+
+    def test_not_binary(self):
+        with self.assertRaises(NotBinary):
+            class Unicode(BaseParser):
+                p_compiler = FastidiousCompiler()
+                __binary__ = True
+                __grammar__ = u'euro <- "€"'
+        with self.assertRaises(ValueError):
+            class Interpreted(BaseParser):
+                p_compiler = FastidiousCompiler(gen_code=False)
+                __binary__ = True
+                __grammar__ = 'a <- "a"'
@@ -0,0 +1,130 @@
+import io
+from unittest import TestCase
+
+import six
+
+from fastidious import Parser, ParserError
+from fastidious import charclass
+from fastidious.compilers.sanitize import NotBinary
+
+from tests.variants import INTERPRETED, each_parser, variants
+
+
+class Words(Parser):
+    __grammar__ = r"""
+    words <- word (" " word)* {on_words}
+    word <- [\p{L}_] [\p{L}\p{Nd}_]* {p_flatten}
+    """
+
+    def on_words(self, value):
+        return [value[0]] + [w for _, w in value[1]]
+
+
+class Ranges(Parser):
+    __grammar__ = r"""
+    text <- ( cyrillic / greek / emoji / other )* {p_flatten}
+    cyrillic <- [Ѐ-ӿ]+ {on_cyrillic}
+    greek <- [α-ω]i+ {on_greek}
+    emoji <- [\U0001f600-\U0001f64f] {on_emoji}
+    other <- [\P{L}\x41]
+    """
+
+    def on_cyrillic(self, value):
+        return "C"
+
+    def on_greek(self, value):
+        return "G"
+
+    def on_emoji(self, value):
+        return "E"
+
+
+class BinaryClasses(Parser):
+    __binary__ = True
+    __grammar__ = r"""
+    text <- [\p{Lu}\xe0-\xff]+ [\P{L}]
+    """
+
+
+class TokenWords(Parser):
+    __tokens__ = ("WORD", )
+    __trivia__ = r" +"
+    __grammar__ = r"""
+    words <- WORD+
+    WORD <- [\p{L}_] [\p{L}\p{Nd}_]*
+    """
+
+
+TEXTS = ["x", u"héllo wörld_2", u"Жя _λ ǅ1"]
+
+BAD_TEXTS = ["2x", u"a ·", u"a  b"]
+
+
+class CharClassesTest(TestCase):
+    parsers = variants(Words, INTERPRETED,
+                       dict(stackless=True, lazy_errors=True))
+
+    @each_parser
+    def test_categories(self, parser):
+        for text in TEXTS:
+            self.assertEqual(parser.p_parse(text), text.split(" "))
+        for text in BAD_TEXTS:
+            self.assertRaises(ParserError, parser.p_parse, text)
+
+    def test_stream_and_tokens(self):
+        for text in TEXTS:
+            expected = text.split(" ")
+            self.assertEqual(Words.p_parse_stream(io.StringIO(text)),
+                             expected)
+            self.assertEqual(TokenWords.p_parse(text), expected)
+
+    def test_ranges(self):
+        self.assertEqual(Ranges.p_parse(u"AЖяΑβ 😀😃.1"), "ACG EE.1")
+        self.assertRaises(ParserError, Ranges.p_parse, u"é")
+        self.assertEqual(BinaryClasses.p_parse(b"A\xe9Z "), [b"A\xe9Z", b" "])
+        self.assertRaises(ParserError, BinaryClasses.p_parse, b"a ")
+        with self.assertRaises(NotBinary):
+            class NotBytes(Parser):
+                __binary__ = True
+                __grammar__ = r'a <- [Ѐ-ӿ]'
+
+    def test_grammar(self):
+        expr = Ranges.__rules__[2].expr
+        self.assertEqual(expr.as_grammar(), u"[\\u03b1-\\u03c9]i+")
+        expr = Ranges.__rules__[4].expr
+        self.assertEqual(expr.as_grammar(), "[A\\P{L}]")
+        for grammar in (r'a <- [z-a]', r'a <- [\p{Xy}]',
+                        r'a <- [\U00110000]'):
+            with self.assertRaises(ParserError):
+                class Invalid(Parser):
+                    __grammar__ = grammar
+
+    def test_lookup_tables(self):
+        ranges = charclass.class_ranges("ab", [(0x100, 0x17f), (0x17f, 0x200)])
+        self.assertEqual(ranges, [(0x61, 0x62), (0x100, 0x200)])
+        table, bounds = charclass.lookup_tables(ranges)
+        self.assertEqual([i for i, v in enumerate(table) if v], [0x61, 0x62])
+        self.assertEqual(bounds, (0x100, 0x201))
+        ranges = charclass.class_ranges("", categories=["^L"])
+        self.assertEqual(ranges[0], (0, 0x40))
+        self.assertEqual(charclass.class_ranges("a", ignorecase=True),
+                         [(0x41, 0x41), (0x61, 0x61)])
+
+    def test_cases_and_categories(self):
+        self.assertEqual(charclass.with_cases([(0x3b1, 0x3b2)]),
+                         [(0x391, 0x392), (0x3b1, 0x3b2)])
+        self.assertEqual(charclass.with_cases([(0x30, 0x39)]), [(0x30, 0x39)])
+        ranges = charclass.category_ranges("Lu")
+        self.assertIs(charclass.category_ranges("Lu"), ranges)
+        self.assertIn((0x41, 0x5a), ranges)
+        self.assertRaises(charclass.UnknownCategory,
+                          charclass.category_ranges, "Xy")
+
+    def test_standalone(self):
+        out = six.StringIO()
+        Words.p_compiler.gen_py_code(Words, out)
+        module = {}
+        exec(compile(out.getvalue(), "standalone", "exec"), module)
+        standalone = module["Words"]
+        self.assertEqual(standalone.p_parse(u"Жя x1"), [u"Жя", "x1"])
+        self.assertRaises(module["ParserError"], standalone.p_parse, "1")
@@ -1,7 +1,10 @@
 from unittest import TestCase
 
-from fastidious.parser import parse_grammar, Parser
-from fastidious.compilers import check_rulenames, gendot
+from fastidious.parser import parse_grammar, Parser, BaseParser
+from fastidious.parser_base import ParserError
+from fastidious.fastidious_compiler import FastidiousCompiler
+from fastidious.compilers import (check_rulenames, gendot,
+                                  left_recursion_leaders)
 from fastidious.compilers.sanitize import (DuplicateRule, UnknownRule,
                                            LeftRecursion)
 
@@ -36,30 +39,54 @@ class TestRulesChecker(TestCase):
 
 
 class LeftRecursionTest(TestCase):
-    def test_direct_left_recursion_detection(self):
+    def test_direct_left_recursion_needs_memoization(self):
         with self.assertRaises(LeftRecursion):
-            class Broken(Parser):
+            class Broken(BaseParser):
+                p_compiler = FastidiousCompiler(memoize=False)
                 __grammar__ = """
                 a <- a 'b'
                 """
 
-    def test_indirect_left_recursion_detection(self):
+    def test_indirect_left_recursion_needs_memoization(self):
         with self.assertRaises(LeftRecursion):
-            class Broken(Parser):
+            class Broken(BaseParser):
+                p_compiler = FastidiousCompiler(memoize=False)
                 __grammar__ = """
                 Value   <- [0-9.]+ / '(' Expr ')'
                 Product <- Expr (('*' / '/') Expr)*
                 Expr    <- 'a' / Product / Value
                 """
 
-    def test_multiple_indirect_left_recursion_detection(self):
+    def test_multiple_indirect_left_recursion(self):
+        class Expr(Parser):
+            __grammar__ = """
+            Value   <- [0-9.]+ / '(' Expr ')'
+            Product <- 'b'/ ProductAlias
+            ProductAlias <- Expr ('*' / '/') Value
+            Expr    <- Product / Value
+            """
+        self.assertEqual(Expr.p_parse("1*2/3", "Expr"),
+                         [["1", "*", "2"], "/", "3"])
+
+    def test_leaders(self):
+        rules = parse_grammar("""
+        Value   <- [0-9.]+ / '(' Expr ')'
+        Product <- Expr (('*' / '/') Expr)*
+        Expr    <- 'a' / Product / Value
+        """)
+        self.assertEqual(left_recursion_leaders(rules),
+                         (set(["Product", "Expr"]), set(["Product"])))
+
+    def test_no_leader(self):
+        # every rule of the cycle can be entered by another one without
+        # going through a leader
         with self.assertRaises(LeftRecursion):
             class Broken(Parser):
                 __grammar__ = """
-                Value   <- [0-9.]+ / '(' Expr ')'
-                Product <- 'b'/ ProductAlias
-                ProductAlias <- Expr (('*' / '/') Expr)*
-                Expr    <- 'a' / Product / Value
+                a <- b 'x' / c 'y' / 'a'
+                b <- a 'z'
+                c <- d 'w' / a 'v'
+                d <- c 'u'
                 """
 
 
@@ -112,3 +139,16 @@ class TestGendot(TestCase):
   node_9 -> node_11
 }
 """)
+
+
+class CodeGenTest(TestCase):
+    def test_long_sequence(self):
+        # the generated code of the elements of a sequence or a choice
+        # doesn't nest deeper and deeper
+        class Long(Parser):
+            __grammar__ = "seq <- %s\nchoice <- %s" % (
+                " ".join(["'a'"] * 150), " / ".join(["'b'"] * 150))
+        self.assertEqual(Long.p_parse("a" * 150), ["a"] * 150)
+        self.assertEqual(Long.p_parse("b", "choice"), "b")
+        with self.assertRaises(ParserError):
+            Long.p_parse("a" * 149)
@@ -0,0 +1,130 @@
+from unittest import TestCase
+
+from fastidious import LazyResult, ParserError
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+from fastidious.compilers.sanitize import UnknownRule
+
+
+CALLS = []
+
+GRAMMAR = r"""
+    doc <- _ v:value _ {@v}
+    value <- object / array / number / string
+    object <- "{" _ members:(member (_ "," _ member)*)? _ "}"
+    member <- key:string _ ":" _ val:value
+    array <- "[" _ items:(value (_ "," _ value)*)? _ "]"
+    number <- "-"? [0-9]+ {p_flatten}
+    string <- '"' chars:[a-z]* '"'
+    _ <- [ \n]*
+    """
+
+
+class Actions(object):
+    def on_object(self, value, members):
+        CALLS.append("object")
+        if not members:
+            return {}
+        return dict([members[0]] + [m[3] for m in members[1]])
+
+    def on_member(self, value, key, val):
+        return key, val
+
+    def on_array(self, value, items):
+        CALLS.append("array")
+        if not items:
+            return []
+        return [items[0]] + [i[3] for i in items[1]]
+
+    def on_string(self, value, chars):
+        return self.p_flatten(chars)
+
+
+class Eager(Actions, BaseParser):
+    p_compiler = FastidiousCompiler()
+    __grammar__ = GRAMMAR
+
+
+class Deferred(Eager):
+    __deferred__ = ("object", "array")
+    __grammar__ = GRAMMAR
+
+
+SOURCE = """
+{"a": 1, "b": [2, {"c": [3]}, []], "d": {"e": "f", "g": {}}}
+"""
+
+
+def materialize(result):
+    if isinstance(result, LazyResult):
+        result = result.value
+    if isinstance(result, dict):
+        return dict((k, materialize(v)) for k, v in result.items())
+    if isinstance(result, list):
+        return [materialize(r) for r in result]
+    return result
+
+
+class DeferredTest(TestCase):
+    def setUp(self):
+        del CALLS[:]
+
+    def test_same_results(self):
+        result = Deferred.p_parse(SOURCE)
+        self.assertIsInstance(result, LazyResult)
+        self.assertEqual(materialize(result), Eager.p_parse(SOURCE))
+
+    def test_on_demand(self):
+        result = Deferred.p_parse(SOURCE)
+        self.assertEqual(CALLS, [])
+        self.assertFalse(result.parsed)
+        self.assertEqual(result["a"], "1")
+        self.assertEqual(CALLS, ["object"])
+        nested = result["b"]
+        self.assertFalse(nested.parsed)
+        self.assertEqual(nested.text, '[2, {"c": [3]}, []]')
+        self.assertEqual((nested.rule, nested.start, nested.end),
+                         ("array", 15, 34))
+        self.assertEqual(len(nested), 3)
+        self.assertEqual(CALLS, ["object", "array"])
+        self.assertIs(result["b"], nested)
+        self.assertEqual(sorted(result["d"].keys()), ["e", "g"])
+        self.assertEqual(result["d"]["g"], {})
+
+    def test_errors(self):
+        class LazyErrors(Deferred):
+            p_compiler = FastidiousCompiler(lazy_errors=True)
+            __grammar__ = GRAMMAR
+        for source in ('{"a": [1, 2}', '[1, {"a" 2}]', '{"a": 1} x'):
+            with self.assertRaises(ParserError) as expected:
+                Eager.p_parse(source)
+            for parser in (Deferred, LazyErrors):
+                with self.assertRaises(ParserError) as cm:
+                    parser.p_parse(source)
+                self.assertEqual(str(cm.exception), str(expected.exception))
+
+    def test_deep_nesting(self):
+        class Stackless(Deferred):
+            p_compiler = FastidiousCompiler(stackless=True)
+            __grammar__ = GRAMMAR
+        source = "[" * 5000 + "1" + "]" * 5000
+        result = Stackless.p_parse(source)
+        self.assertEqual(result.end, len(source))
+        self.assertEqual(result[0].start, 1)
+        self.assertEqual(materialize(Stackless.p_parse(SOURCE)),
+                         Eager.p_parse(SOURCE))
+
+    def test_interpreted(self):
+        # no recognizers, no deferred rules
+        class Interpreted(Actions, BaseParser):
+            p_compiler = FastidiousCompiler(gen_code=False)
+            __deferred__ = ("object", "array")
+            __grammar__ = GRAMMAR
+        self.assertEqual(Interpreted.p_parse(SOURCE), Eager.p_parse(SOURCE))
+
+    def test_unknown_rule(self):
+        with self.assertRaises(UnknownRule):
+            class Broken(BaseParser):
+                p_compiler = FastidiousCompiler()
+                __deferred__ = ("objects", )
+                __grammar__ = GRAMMAR
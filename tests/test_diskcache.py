@@ -0,0 +1,150 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+import fastidious
+from fastidious import Parser, ParserError
+from fastidious.fastidious_compiler import FastidiousCompiler
+from fastidious.diskcache import parse_file, parser_fingerprint, DiskCache
+
+
+CALLS = []
+
+
+class Words(Parser):
+    __grammar__ = r"""
+    words <- first:word rest:( " " word )* {on_words}
+    word <- [a-z]+
+    """
+
+    def on_words(self, value, first, rest):
+        CALLS.append(first)
+        return [first] + [r[1] for r in rest]
+
+
+class OtherWords(Parser):
+    __grammar__ = r"""
+    words <- first:word rest:( "," word )* {on_words}
+    word <- [a-z]+
+    """
+
+    def on_words(self, value, first, rest):
+        CALLS.append(first)
+        return [first] + [r[1] for r in rest]
+
+
+class NotMemoizedWords(Words):
+    p_compiler = FastidiousCompiler(memoize=False)
+    __grammar__ = Words.__grammar__
+
+
+class OtherActionWords(Words):
+    __default__ = "words"
+    __grammar__ = r"""
+    word <- [a-z]+
+    """
+
+    def on_words(self, value, first, rest):
+        return "other"
+
+
+class DiskCacheTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "input.txt")
+        self.cache_dir = os.path.join(self.dir, "cache")
+        with open(self.path, "w") as f:
+            f.write("a b c")
+        del CALLS[:]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_cached(self):
+        self.assertEqual(parse_file(Words, self.path, self.cache_dir),
+                         ["a", "b", "c"])
+        self.assertEqual(parse_file(Words, self.path, self.cache_dir),
+                         ["a", "b", "c"])
+        self.assertEqual(len(CALLS), 1)
+        self.assertEqual(parse_file(Words, self.path, self.cache_dir, "word",
+                                    False), "a")
+        with open(self.path, "w") as f:
+            f.write("a b")
+        self.assertEqual(parse_file(Words, self.path, self.cache_dir),
+                         ["a", "b"])
+        self.assertEqual(len(CALLS), 2)
+
+    def test_errors_not_cached(self):
+        with open(self.path, "w") as f:
+            f.write("a 1")
+        for _ in range(2):
+            with self.assertRaises(ParserError):
+                parse_file(Words, self.path, self.cache_dir)
+
+    def test_fingerprint(self):
+        fingerprints = set(parser_fingerprint(p) for p in (
+            Words, OtherWords, NotMemoizedWords, OtherActionWords))
+        self.assertEqual(len(fingerprints), 4)
+        self.assertEqual(parser_fingerprint(Words), parser_fingerprint(Words))
+
+    def test_fingerprint_across_processes(self):
+        # the string hashes change with PYTHONHASHSEED, the fingerprints
+        # must not
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = ("from fastidious.diskcache import parser_fingerprint\n"
+                  "from examples.json import JSON\n"
+                  "from tests.test_diskcache import Words\n"
+                  "print(parser_fingerprint(JSON), parser_fingerprint(Words))")
+        fingerprints = set()
+        for seed in ("1", "2"):
+            env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=root)
+            fingerprints.add(subprocess.check_output(
+                [sys.executable, "-c", script], cwd=root, env=env))
+        self.assertEqual(len(fingerprints), 1)
+
+    def test_invalidation(self):
+        parse_file(Words, self.path, self.cache_dir)
+        parse_file(NotMemoizedWords, self.path, self.cache_dir)
+        self.assertEqual(len(CALLS), 2)
+        self.assertEqual(parse_file(OtherActionWords, self.path,
+                                    self.cache_dir), "other")
+
+    def test_command_line(self):
+        from fastidious.__main__ import parse
+        expected = [["a", "b", "c"]]
+        # read as a file, with or without a cache
+        self.assertEqual(
+            list(parse("tests.test_diskcache.Words", [self.path])), expected)
+        self.assertEqual(list(parse("tests.test_diskcache.Words", [self.path],
+                                    self.cache_dir)), expected)
+
+    def test_version(self):
+        cache = DiskCache(self.cache_dir)
+        key = cache.key(Words, "a b c")
+        version = fastidious.__version__
+        fastidious.__version__ = "0.0.0"
+        try:
+            del Words._p_fingerprint
+            self.assertNotEqual(cache.key(Words, "a b c"), key)
+        finally:
+            fastidious.__version__ = version
+            del Words._p_fingerprint
+        self.assertEqual(cache.key(Words, "a b c"), key)
+
+    def test_corrupted_entry(self):
+        cache = DiskCache(self.cache_dir)
+        key = cache.key(Words, b"a b c")
+        cache.store(key, "whatever")
+        with open(cache.path(key), "wb") as f:
+            f.write(b"garbage")
+        self.assertEqual(cache.load(key), (False, None))
+        self.assertEqual(parse_file(Words, self.path, self.cache_dir),
+                         ["a", "b", "c"])
+
+    def test_unpicklable(self):
+        cache = DiskCache(self.cache_dir)
+        self.assertFalse(cache.store("abcd", lambda: None))
+        self.assertEqual(cache.load("abcd"), (False, None))
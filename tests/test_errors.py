@@ -1,7 +1,10 @@
 from unittest import TestCase
 
 from fastidious import Parser
-from fastidious import ParserError
+from fastidious import ParserError, ParseFailure
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+from examples.calculator import Calculator
 
 
 class ErrorHandlingTests(TestCase):
@@ -20,3 +23,104 @@ class ErrorHandlingTests(TestCase):
         with self.assertRaisesRegexp(ParserError,
                                      "Got `! 1` expected OPERATOR"):
             Simple.p_parse("1 ! 1")
+
+    def test_aliased_rules(self):
+        with self.assertRaises(ParserError) as cm:
+            Calculator.p_parse("1 + 2 * (3* - 4)")
+        # the aliased rules that failed last, not the class after them
+        self.assertEqual(cm.exception.col, 12)
+        self.assertIn("EXPRESSION", str(cm.exception))
+        self.assertIn("INT", str(cm.exception))
+
+
+class LazyErrorsTests(TestCase):
+    grammar = r"""
+    calc <- num _ operator _ num EOF
+    num "NUMBER" <-  frac / "-"? int
+    int <- ~"[0-9]+"
+    frac <- int "." int
+    operator "OPERATOR" <- '+' / '-'
+    _ <- [ \t\r]*
+    EOF <- !.
+    """
+
+    def setUp(self):
+        class Eager(Parser):
+            __grammar__ = self.grammar
+
+        class Lazy(BaseParser):
+            p_compiler = FastidiousCompiler(lazy_errors=True)
+            __grammar__ = self.grammar
+
+        self.eager, self.lazy = Eager, Lazy
+
+    def test_same_messages(self):
+        for source in ("1 ! 1", "1 + ", "1 + 1.", "x", "1 + 1 1"):
+            with self.assertRaises(ParserError) as eager:
+                self.eager.p_parse(source)
+            with self.assertRaises(ParserError) as lazy:
+                self.lazy.p_parse(source)
+            self.assertEqual(str(eager.exception), str(lazy.exception))
+
+    def test_no_tracking(self):
+        p = self.lazy("1 + 1.5")
+        self.assertEqual(p.calc(), [["", "1"], " ", "+", " ",
+                                    ["1", ".", "5"], ""])
+        self.assertEqual(p._p_error_stack, [(0, 0)])
+        p = self.eager("1 + 1.5")
+        p.calc()
+        self.assertNotEqual(p._p_error_stack, [(0, 0)])
+
+    def test_track_errors(self):
+        p = self.lazy("1 ! 1")
+        p.p_track_errors()
+        self.assertIs(p.calc(), p.NoMatch)
+        with self.assertRaisesRegexp(ParserError,
+                                     "Got `! 1` expected OPERATOR"):
+            p.p_raise()
+
+
+class TryParseTests(TestCase):
+    class Simple(Parser):
+        __grammar__ = r"""
+        calc <- num _ operator _ num EOF
+        num "NUMBER" <-  frac / "-"? int
+        int <- ~"[0-9]+"
+        frac <- int "." int
+        operator "OPERATOR" <- '+' / '-'
+        _ <- [ \t\r]*
+        EOF <- !.
+        """
+
+    def test_success(self):
+        self.assertEqual(self.Simple.p_try_parse("1 + 2"),
+                         [["", "1"], " ", "+", " ", ["", "2"], ""])
+
+    def test_failure(self):
+        failure = self.Simple.p_try_parse("1 + 2\n ! 3")
+        self.assertIsInstance(failure, ParseFailure)
+        self.assertFalse(failure)
+        self.assertEqual(failure.pos, 5)
+        self.assertEqual((failure.line, failure.col), (0, 5))
+        self.assertEqual(failure.expected, ['"."'])
+        with self.assertRaises(ParserError) as cm:
+            self.Simple.p_parse("1 + 2\n ! 3")
+        error = cm.exception
+        self.assertEqual(str(error), failure.message)
+        self.assertEqual((error.pos, error.line, error.col, error.expected),
+                         (5, 0, 5, ['"."']))
+
+    def test_alias(self):
+        failure = self.Simple.p_try_parse("1 ! 1")
+        self.assertEqual(failure.expected, ["OPERATOR"])
+        with self.assertRaises(ParserError) as cm:
+            failure.raise_error()
+        self.assertEqual(cm.exception.expected, ["OPERATOR"])
+        self.assertIn("Got `! 1` expected OPERATOR", str(cm.exception))
+
+    def test_lazy_errors(self):
+        class Lazy(BaseParser):
+            p_compiler = FastidiousCompiler(lazy_errors=True)
+            __grammar__ = self.Simple.__grammar__
+        failure = Lazy.p_try_parse("1 ! 1")
+        self.assertEqual((failure.pos, failure.expected), (2, ["OPERATOR"]))
@@ -0,0 +1,89 @@
+import io
+from unittest import TestCase
+
+from fastidious import Parser, ParserError
+from fastidious.fastidious_compiler import FastidiousCompiler
+
+
+CALLS = []
+
+GRAMMAR = r"""
+    record <- "{" _ k:key _ ":" _ v:value _ "}" _ {on_record}
+    key <- ~"[a-z]+"
+    value <- [0-9]+ {p_flatten}
+    _ <- [ \n]*
+    """
+
+
+class Records(Parser):
+    __grammar__ = GRAMMAR
+
+    def on_record(self, value, k, v):
+        CALLS.append(k)
+        return k, int(v)
+
+
+class BinaryRecords(Parser):
+    __binary__ = True
+    __grammar__ = r"""
+    line <- ~"[^\n]*" "\n" {on_line}
+    """
+
+    def on_line(self, value):
+        return bytes(value[0])
+
+
+SOURCE = "{a: 1}\n{b : 22} {c:3}\n"
+RECORDS = [("a", 1), ("b", 22), ("c", 3)]
+
+
+class IterTest(TestCase):
+    def test_string(self):
+        self.assertEqual(list(Records.p_iter(SOURCE)), RECORDS)
+        self.assertEqual(list(Records.p_iter("")), [])
+
+    def test_stream(self):
+        for chunk_size in (1, 4, 100):
+            self.assertEqual(list(Records.p_iter(
+                io.StringIO(SOURCE), chunk_size=chunk_size)), RECORDS)
+        self.assertEqual(
+            list(BinaryRecords.p_iter(io.BytesIO(b"a\n\nbc\n"))),
+            [b"a", b"", b"bc"])
+
+    def test_lazy(self):
+        del CALLS[:]
+        records = Records.p_iter(io.StringIO(SOURCE), chunk_size=1)
+        self.assertEqual(next(records), ("a", 1))
+        self.assertEqual(CALLS, ["a"])
+        self.assertEqual(next(records), ("b", 22))
+        self.assertEqual(CALLS, ["a", "b"])
+
+    def test_memo_reset(self):
+        source = SOURCE * 50
+        records = Records.p_iter(source)
+        next(records)
+        # the generator's parser
+        p = records.gi_frame.f_locals["p"]
+        for _ in records:
+            self.assertLess(len(p._p_memoized), 10)
+            self.assertLess(
+                sum(len(f) for f in p._p_failures.values()), 10)
+
+    def test_errors(self):
+        source = "{a: 1}\n{b : x}\n{c:3}"
+        records = Records.p_iter(source)
+        self.assertEqual(next(records), ("a", 1))
+        with self.assertRaises(ParserError) as cm:
+            next(records)
+        self.assertEqual((cm.exception.line, cm.exception.col), (1, 6))
+        self.assertIn("`[0-9]`", str(cm.exception))
+
+    def test_lazy_errors(self):
+        class LazyRecords(Records):
+            p_compiler = FastidiousCompiler(lazy_errors=True)
+            __grammar__ = GRAMMAR
+        records = LazyRecords.p_iter(io.StringIO("{a: 1}\n{b : x}"))
+        self.assertEqual(next(records), ("a", 1))
+        with self.assertRaises(ParserError) as cm:
+            next(records)
+        self.assertEqual((cm.exception.line, cm.exception.col), (1, 6))
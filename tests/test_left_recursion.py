@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+from fastidious import Parser
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+
+from tests.variants import INTERPRETED, each_parser, variants
+
+
+DIRECT = r"""
+    expr <- binop / num
+    binop <- l:expr op:("+" / "-") r:num {on_binop}
+    num <- [0-9]+ {on_num}
+    """
+
+INDIRECT = r"""
+    expr <- operation / num
+    operation <- binop
+    binop <- l:expr op:("+" / "-") r:num {on_binop}
+    num <- [0-9]+ {on_num}
+    """
+
+
+SELF = r"""
+    chain <- chain "-" [0-9] / [0-9]
+    """
+
+
+class Actions(object):
+    def on_num(self, value):
+        return int(value)
+
+    def on_binop(self, value, l, op, r):
+        return l + r if op == "+" else l - r
+
+
+class Direct(Actions, Parser):
+    __grammar__ = DIRECT
+
+
+class Indirect(Actions, Parser):
+    __grammar__ = INDIRECT
+
+
+class LeftRecursionTest(TestCase):
+    parsers = variants(Direct, INTERPRETED) + variants(Indirect, INTERPRETED)
+
+    @each_parser
+    def test_left_associative(self, parser):
+        self.assertEqual(parser.p_parse("1-2-3"), -4)
+        self.assertEqual(parser.p_parse("10-2+3-1"), 10)
+        self.assertEqual(parser.p_parse("7"), 7)
+
+    @each_parser
+    def test_partial(self, parser):
+        p = parser("1-2-x")
+        self.assertEqual(p.expr(), -1)
+        self.assertEqual(p.pos, 3)
+
+    @each_parser
+    def test_no_match(self, parser):
+        p = parser("-1")
+        self.assertIs(p.expr(), p.NoMatch)
+        self.assertEqual(p.pos, 0)
+
+    def test_direct_left_recursion(self):
+        for compiler in (FastidiousCompiler(),
+                         FastidiousCompiler(gen_code=False)):
+            class Chain(BaseParser):
+                p_compiler = compiler
+                __grammar__ = SELF
+            self.assertEqual(Chain.p_parse("1-2-3"),
+                             [["1", "-", "2"], "-", "3"])
+
+    def test_long_chain(self):
+        # the growth is iterative, it doesn't hit the recursion limit
+        source = "-".join(["1"] * 3000)
+        for parser in (Direct, Indirect):
+            self.assertEqual(parser.p_parse(source), 2 - 3000)
@@ -0,0 +1,101 @@
+import threading
+from unittest import TestCase
+
+from fastidious import Parser, ParseLimits, ParseLimitError, ParserError
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+
+
+GRAMMAR = r"""
+    list <- item ("," item)*
+    item <- [a-z]+ / number
+    number <- [0-9]+
+    """
+
+
+class Items(Parser):
+    __grammar__ = GRAMMAR
+
+
+SOURCE = ",".join(["ab", "12"] * 50)
+
+
+class LimitsTest(TestCase):
+    def test_no_limit_reached(self):
+        limits = ParseLimits(steps=1000, timeout=60, max_memo=1000,
+                             cancel=threading.Event(), check_every=10)
+        self.assertEqual(Items.p_parse(SOURCE, limits=limits),
+                         Items.p_parse(SOURCE))
+
+    def test_steps(self):
+        with self.assertRaises(ParseLimitError) as cm:
+            Items.p_parse(SOURCE, limits=ParseLimits(steps=50))
+        self.assertEqual(cm.exception.reason, "steps")
+        self.assertIn("more than 50 steps", str(cm.exception))
+        # exact count, whatever check_every: list, item, item, number
+        Items.p_parse("ab,12", limits=ParseLimits(steps=4))
+        self.assertRaises(ParseLimitError, Items.p_parse, "ab,12",
+                          limits=ParseLimits(steps=3))
+
+    def test_interpreted(self):
+        class Interpreted(BaseParser):
+            p_compiler = FastidiousCompiler(gen_code=False)
+            __grammar__ = GRAMMAR
+        Interpreted.p_parse("ab,12", limits=ParseLimits(steps=4))
+        self.assertRaises(ParseLimitError, Interpreted.p_parse, "ab,12",
+                          limits=ParseLimits(steps=3))
+
+    def test_timeout(self):
+        with self.assertRaises(ParseLimitError) as cm:
+            Items.p_parse(SOURCE, limits=ParseLimits(timeout=-1,
+                                                     check_every=1))
+        self.assertEqual(cm.exception.reason, "timeout")
+        self.assertIsInstance(cm.exception, ParserError)
+
+    def test_memo(self):
+        with self.assertRaises(ParseLimitError) as cm:
+            Items.p_parse(SOURCE, limits=ParseLimits(max_memo=20,
+                                                     check_every=5))
+        self.assertEqual(cm.exception.reason, "memo")
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        limits = ParseLimits(cancel=cancel, check_every=1)
+        Items.p_parse(SOURCE, limits=limits)
+        cancel.set()
+        with self.assertRaises(ParseLimitError) as cm:
+            Items.p_parse(SOURCE, limits=limits)
+        self.assertEqual(cm.exception.reason, "cancelled")
+        self.assertEqual(cm.exception.pos, 0)
+
+    def test_progress(self):
+        positions = []
+        Items.p_parse(SOURCE, limits=ParseLimits(
+            progress=positions.append, check_every=20))
+        self.assertTrue(positions)
+        self.assertEqual(positions, sorted(positions))
+        self.assertTrue(0 < positions[-1] <= len(SOURCE))
+
+    def test_syntax_errors(self):
+        # the limits don't change the errors, even tracked lazily
+        class LazyItems(Items):
+            p_compiler = FastidiousCompiler(lazy_errors=True)
+            __grammar__ = GRAMMAR
+        for parser in (Items, LazyItems):
+            with self.assertRaises(ParserError) as expected:
+                parser.p_parse("ab,,12")
+            with self.assertRaises(ParserError) as cm:
+                parser.p_parse("ab,,12", limits=ParseLimits(steps=100))
+            self.assertNotIsInstance(cm.exception, ParseLimitError)
+            self.assertEqual(str(cm.exception), str(expected.exception))
+
+    def test_no_overhead(self):
+        p = Items("ab")
+        self.assertNotIn("list", vars(p))
+        p.p_apply_limits(ParseLimits())
+        self.assertIn("list", vars(p))
+        # the recognizers, generated on the first p_match, too
+        Items.p_match("ab")
+        p = Items("ab")
+        p.p_apply_limits(ParseLimits())
+        self.assertIn("_p_match_list", vars(p))
@@ -0,0 +1,124 @@
+from unittest import TestCase
+
+from fastidious import Parser
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+
+
+GRAMMAR = r"""
+    list <- first:item rest:( "," item )* {p_flatten}
+    item <- number / word
+    number <- [0-9]+
+    word <- [a-z]+
+    """
+
+
+class Memoized(Parser):
+    __grammar__ = GRAMMAR
+
+
+class DictFailures(BaseParser):
+    p_compiler = FastidiousCompiler(compact_failures=False)
+    __grammar__ = GRAMMAR
+
+
+class CompactFailuresTest(TestCase):
+    def test_failures_in_bitsets(self):
+        p = Memoized("12,ab,3")
+        self.assertEqual(p.list(), "12,ab,3")
+        # `number` failed at the start of `ab`, it's not in the memo dict
+        for (key, pos), (result, end) in p._p_memoized.items():
+            self.assertIsNot(result, p.NoMatch)
+        self.assertTrue(p._p_failures)
+        self.assertTrue(any(p.p_memo_failed(key, 3)
+                            for key in p._p_failures))
+        self.assertFalse(any(p.p_memo_failed(key, 0)
+                             for key in p._p_failures))
+
+    def test_same_results(self):
+        for source in ("12,ab,3", "a", "1,,2", "abc,12,de,34"):
+            memoized, dict_failures = Memoized(source), DictFailures(source)
+            self.assertEqual(memoized.list(), dict_failures.list())
+            self.assertEqual(memoized.pos, dict_failures.pos)
+
+    def test_memo_failure(self):
+        p = Memoized("x" * 20)
+        self.assertFalse(p.p_memo_failed(42, 17))
+        p.p_memo_failure(42, 17)
+        p.p_memo_failure(42, 20)
+        self.assertTrue(p.p_memo_failed(42, 17))
+        self.assertTrue(p.p_memo_failed(42, 20))
+        self.assertFalse(p.p_memo_failed(42, 16))
+        # one chunk of the bitset, where it failed
+        self.assertEqual(list(p._p_failures[42]), [0])
+        p.p_memo_failure(42, 50000)
+        self.assertEqual(sorted(p._p_failures[42]), [0, 3])
+        self.assertTrue(p.p_memo_failed(42, 50000))
+        self.assertFalse(p.p_memo_failed(42, 49999))
+
+
+class Interpreted(BaseParser):
+    p_compiler = FastidiousCompiler(gen_code=False)
+    __grammar__ = GRAMMAR
+
+
+class InterpretedDictFailures(BaseParser):
+    p_compiler = FastidiousCompiler(gen_code=False, compact_failures=False)
+    __grammar__ = GRAMMAR
+
+
+# without packrat, each nesting level tries `inner` three times
+NESTED = r"""
+    outer <- inner "x" / inner "y" / inner
+    inner <- "(" outer ")" / "z"
+    """
+
+
+class InterpretedNested(BaseParser):
+    p_compiler = FastidiousCompiler(gen_code=False)
+    __grammar__ = NESTED
+
+
+class InterpretedNestedNotMemoized(BaseParser):
+    p_compiler = FastidiousCompiler(gen_code=False, memoize=False)
+    __grammar__ = NESTED
+
+
+class InterpreterMemoizationTest(TestCase):
+    def test_same_results(self):
+        for source in ("12,ab,3", "a", "1,,2", "abc,12,de,34"):
+            expected = Memoized(source).list()
+            self.assertEqual(Interpreted(source).list(), expected)
+            self.assertEqual(InterpretedDictFailures(source).list(),
+                             expected)
+        self.assertEqual(Interpreted.p_parse("ab,12"), "ab,12")
+
+    def test_memoized(self):
+        p = Interpreted("12,ab,3")
+        p.list()
+        self.assertTrue(p._p_memoized)
+        self.assertTrue(p._p_failures)
+        p = InterpretedDictFailures("12,ab,3")
+        p.list()
+        self.assertFalse(p._p_failures)
+        self.assertTrue(any(result is p.NoMatch
+                            for result, _ in p._p_memoized.values()))
+
+    def test_packrat(self):
+        source = "(" * 8 + "z" + ")" * 8
+        p = InterpretedNested(source)
+        p.outer()
+        self.assertEqual(p.pos, len(source))
+        memoized_calls = len(p._p_memoized)
+
+        counter = []
+        p = InterpretedNestedNotMemoized(source)
+        inner = p.inner
+
+        def counting_inner():
+            counter.append(p.pos)
+            return inner()
+        p.inner = counting_inner
+        p.outer()
+        self.assertEqual(p.pos, len(source))
+        self.assertGreater(len(counter), 10 * memoized_calls)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import mmap
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from fastidious import Parser, ParserError, LazyResult
+from fastidious.diskcache import parse_file
+
+
+class Lines(Parser):
+    __binary__ = True
+    __grammar__ = r"""
+    lines <- line*
+    line <- k:key "=" v:~"[^\n]*" "\n" {on_line}
+    key <- [a-z]+
+    """
+
+    def on_line(self, value, k, v):
+        self.__class__.inputs.append(self.input)
+        return bytes(k), bytes(v)
+
+    inputs = []
+
+
+class DeferredLines(Parser):
+    __binary__ = True
+    __deferred__ = ("line",)
+    __grammar__ = Lines.__grammar__
+    on_line = Lines.__dict__["on_line"]
+    inputs = []
+
+
+class TextLines(Parser):
+    __grammar__ = r"""
+    lines <- line*
+    line <- k:key "=" v:~"[^\n]*" "\n" {on_line}
+    key <- [a-zé]+
+    """
+
+    def on_line(self, value, k, v):
+        return k, v
+
+
+class ParseFileTest(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        Lines.inputs = []
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, content):
+        path = os.path.join(self.dir, "input")
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def test_mapped(self):
+        path = self.write(b"a=1\nbc=two\n")
+        self.assertEqual(Lines.p_parse_file(path),
+                         [(b"a", b"1"), (b"bc", b"two")])
+        # the file is parsed in place
+        self.assertIsInstance(Lines.inputs[0], mmap.mmap)
+
+    def test_text(self):
+        path = self.write(u"é=1\nb=deux\n".encode("utf-8"))
+        self.assertEqual(TextLines.p_parse_file(path),
+                         [(u"é", u"1"), (u"b", u"deux")])
+        path = self.write(u"é=1\n".encode("latin-1"))
+        self.assertEqual(TextLines.p_parse_file(path, encoding="latin-1"),
+                         [(u"é", u"1")])
+
+    def test_empty(self):
+        path = self.write(b"")
+        self.assertEqual(Lines.p_parse_file(path), [])
+        self.assertEqual(TextLines.p_parse_file(path), [])
+
+    def test_errors(self):
+        path = self.write(b"a=1\nb:2\n")
+        with self.assertRaises(ParserError) as cm:
+            Lines.p_parse_file(path)
+        self.assertIn("line 1, col 2", str(cm.exception))
+        self.assertEqual(Lines.p_parse_file(path, "line", parse_all=False),
+                         (b"a", b"1"))
+
+    def test_deferred(self):
+        path = self.write(b"a=1\nb=2\n")
+        lines = DeferredLines.p_parse_file(path)
+        self.assertIsInstance(lines[1], LazyResult)
+        # the map outlives the parse
+        self.assertEqual(lines[1].text, b"b=2\n")
+        self.assertEqual(lines[1].value, (b"b", b"2"))
+
+    def test_disk_cache(self):
+        path = self.write(b"a=1\n")
+        cache_dir = os.path.join(self.dir, "cache")
+        for _ in range(2):
+            self.assertEqual(parse_file(Lines, path, cache_dir),
+                             [(b"a", b"1")])
+        self.assertEqual(len(Lines.inputs), 1)
@@ -1,5 +1,7 @@
+import threading
 from unittest import TestCase
 
+from fastidious import Parser, ParserError
 from fastidious.parser_base import ParserMixin
 
 
@@ -24,3 +26,149 @@ ghi""")
         self.assertEqual(self.current_pos(p), (2, 1))
         self.forward(p, 12)
         self.assertEqual(self.current_pos(p), (2, 4))
+
+    def test_line_col(self):
+        p = ParserMixin("abc\n\ndef\n")
+        self.assertEqual([p.p_line_col(i) for i in range(9)],
+                         [(0, 0), (0, 1), (0, 2), (0, 3), (1, 1), (2, 1),
+                          (2, 2), (2, 3), (2, 4)])
+        p.pos = 6
+        self.assertEqual(p.p_line_col(), (2, 2))
+        self.assertEqual(p.p_line_col(0), (0, 0))
+
+    def test_pretty_pos(self):
+        p = ParserMixin("abc\ndef\nghi")
+        p.pos = 1
+        self.assertEqual(p.p_pretty_pos(), "abc\n-^")
+        p.pos = 5
+        self.assertEqual(p.p_pretty_pos(), "def\n-^")
+        p.pos = 7
+        self.assertEqual(p.p_pretty_pos(), "def\n---^")
+        p.pos = 8
+        self.assertEqual(p.p_pretty_pos(), "ghi\n^")
+        p.pos = 11
+        self.assertEqual(p.p_pretty_pos(), "ghi\n---^")
+
+    def test_error_on_later_line(self):
+        class Lines(Parser):
+            __grammar__ = r"""
+            lines <- line+
+            line <- [a-z]+ "\n"
+            """
+        with self.assertRaises(ParserError) as cm:
+            Lines.p_parse("abc\nde1\nfgh\n")
+        self.assertIn("line 1, col 3:\n\nde1\n--^\n", str(cm.exception))
+
+
+class ParseCacheTest(TestCase):
+    def make_parser(self, **attrs):
+        calls = []
+
+        class Words(Parser):
+            __grammar__ = r"""
+            words <- first:word rest:( " " word )* {on_words}
+            word <- [a-z]+
+            """
+
+            def on_words(self, value, first, rest):
+                calls.append(first)
+                return [first] + [r[1] for r in rest]
+
+        for k, v in attrs.items():
+            setattr(Words, k, v)
+        return Words, calls
+
+    def test_no_cache_by_default(self):
+        Words, calls = self.make_parser()
+        Words.p_parse("a b")
+        Words.p_parse("a b")
+        self.assertEqual(len(calls), 2)
+        self.assertIsNone(Words.p_cache_info())
+
+    def test_cache(self):
+        Words, calls = self.make_parser(__parse_cache__=2)
+        self.assertEqual(Words.p_parse("a b"), ["a", "b"])
+        self.assertEqual(Words.p_parse("a b"), ["a", "b"])
+        self.assertEqual(len(calls), 1)
+        # the entry point and parse_all are part of the key
+        self.assertEqual(Words.p_parse("a b", "word", False), "a")
+        self.assertEqual(Words.p_cache_info(),
+                         dict(hits=1, misses=2, maxsize=2, currsize=2))
+        # LRU eviction of "a b"
+        Words.p_parse("c")
+        self.assertEqual(Words.p_parse("a b", "word", False), "a")
+        self.assertEqual(len(calls), 2)
+        Words.p_parse("a b")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(Words.p_cache_info(),
+                         dict(hits=2, misses=4, maxsize=2, currsize=2))
+        # errors are not cached
+        for _ in range(2):
+            with self.assertRaises(ParserError):
+                Words.p_parse("a 1")
+        self.assertEqual(Words.p_cache_info()["misses"], 6)
+        Words.p_cache_clear()
+        self.assertEqual(Words.p_cache_info(),
+                         dict(hits=0, misses=0, maxsize=2, currsize=0))
+
+    def test_shared_results(self):
+        Words, calls = self.make_parser(__parse_cache__=10)
+        result = Words.p_parse("a b")
+        self.assertIs(Words.p_parse("a b"), result)
+
+    def test_copy(self):
+        Words, calls = self.make_parser(__parse_cache__=10,
+                                        __parse_cache_copy__=True)
+        result = Words.p_parse("a b")
+        result.append("c")
+        self.assertEqual(Words.p_parse("a b"), ["a", "b"])
+        self.assertIsNot(Words.p_parse("a b"), Words.p_parse("a b"))
+
+        Words, calls = self.make_parser(__parse_cache__=10,
+                                        __parse_cache_copy__=tuple)
+        Words.p_parse("a b")
+        self.assertEqual(Words.p_parse("a b"), ("a", "b"))
+
+    def test_per_class(self):
+        Words, _ = self.make_parser(__parse_cache__=10)
+
+        class MoreWords(Words):
+            __grammar__ = r"""
+            more_words <- words
+            """
+        Words.p_parse("a")
+        MoreWords.p_parse("a")
+        MoreWords.p_parse("a", "words")
+        self.assertIsNot(Words.p_parse_cache(), MoreWords.p_parse_cache())
+        self.assertEqual(MoreWords.p_cache_info()["misses"], 2)
+
+    def test_unhashable_input(self):
+        Words, calls = self.make_parser(__parse_cache__=10)
+
+        class Input(str):
+            __hash__ = None
+        Words.p_parse(Input("a"))
+        Words.p_parse(Input("a"))
+        self.assertEqual(len(calls), 2)
+
+    def test_threads(self):
+        Words, calls = self.make_parser(__parse_cache__=5)
+        inputs = ["a", "b", "c", "a b", "b c", "c a", "a b c"]
+        errors = []
+
+        def work():
+            try:
+                for i in range(50):
+                    source = inputs[i % len(inputs)]
+                    self.assertEqual(Words.p_parse(source), source.split())
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        info = Words.p_cache_info()
+        self.assertEqual(info["hits"] + info["misses"], 400)
+        self.assertLessEqual(info["currsize"], 5)
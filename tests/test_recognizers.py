@@ -0,0 +1,114 @@
+from unittest import TestCase
+
+import six
+
+from fastidious import Parser, ParserError
+from fastidious.expressions import stable_hash
+
+from tests.variants import (INTERPRETED, LAZY, compiled_with, each_parser,
+                            variants)
+
+
+CALLS = []
+
+GRAMMAR = r"""
+    list <- first:item rest:( "," item )* {on_list}
+    item <- plain / number
+    plain <- !keyword word {on_plain}
+    keyword <- ("if" / "else") ![a-z] {on_keyword}
+    word <- [a-z]+
+    number <- ~"[0-9]+"
+    """
+
+
+class Actions(object):
+    def on_list(self, value, first, rest):
+        return [first] + [r[1] for r in rest]
+
+    def on_plain(self, value):
+        return value[1]
+
+    def on_keyword(self, value):
+        CALLS.append(value)
+        return value
+
+
+class Items(Actions, Parser):
+    __grammar__ = GRAMMAR
+
+
+class Words(Parser):
+    __grammar__ = r"""
+        words <- word ("," word)*
+        word <- !keyword [a-z]+
+        keyword <- "if" / "else"
+        """
+
+
+class RecognizerTest(TestCase):
+    parsers = variants(Items, LAZY, {"compact_failures": False},
+                       INTERPRETED)
+
+    def setUp(self):
+        del CALLS[:]
+
+    @each_parser
+    def test_match(self, parser):
+        self.assertEqual(parser.p_match("ab,12,cd"), 8)
+        self.assertEqual(parser.p_match("ab,12,if"), 5)
+        self.assertEqual(parser.p_match("ab,12", "word"), 2)
+        self.assertEqual(parser.p_match("12", "number"), 2)
+        self.assertIsNone(parser.p_match("if"))
+        self.assertIsNone(parser.p_match("12", "word"))
+
+    def test_no_action(self):
+        self.assertEqual(Items.p_match("iffy,else"), 4)
+        self.assertEqual(Items.p_parse("iffy,ab"), ["iffy", "ab"])
+        # the predicates use the recognizer of `keyword`
+        self.assertEqual(CALLS, [])
+        # the interpreter runs the actions
+        compiled_with(Items, **INTERPRETED).p_match("if")
+        self.assertEqual(CALLS, [["if", ""]])
+
+    def test_generated_on_first_match(self):
+        class Lazy(Actions, Parser):
+            __grammar__ = GRAMMAR
+        # the predicates run the recognizer of `keyword`
+        self.assertTrue(hasattr(Lazy, "_p_match_keyword"))
+        self.assertFalse(hasattr(Lazy, "_p_match_list"))
+        self.assertEqual(Lazy.p_parse("ab,12"), ["ab", "12"])
+        self.assertFalse(hasattr(Lazy, "_p_match_list"))
+        self.assertEqual(Lazy.p_match("ab,12,cd"), 8)
+        self.assertTrue(hasattr(Lazy, "_p_match_list"))
+
+    def test_standalone(self):
+        Words.p_match("ab")
+        out = six.StringIO()
+        Words.p_compiler.gen_py_code(Words, out)
+        self.assertIn("def _p_match_keyword", out.getvalue())
+        self.assertNotIn("def _p_match_words", out.getvalue())
+        module = {}
+        exec(compile(out.getvalue(), "standalone", "exec"), module)
+        # the full rules stand in for the recognizers left out
+        self.assertEqual(module["Words"].p_match("ab,cd,if"), 5)
+
+    def test_shared_memo(self):
+        Items.p_match("")
+        p = Items("ab,if")
+        self.assertEqual(p._p_match_list(), True)
+        self.assertEqual(p.pos, 2)
+        self.assertTrue(p._p_matched)
+        self.assertFalse(p._p_memoized)
+        # the failure of `item` on `if` found by the recognizer
+        key = stable_hash("item")
+        self.assertTrue(p.p_memo_failed(key, 3))
+        p.pos = 0
+        self.assertEqual(p.list(), ["ab"])
+
+    def test_errors(self):
+        messages = set()
+        for parser in self.parsers:
+            with self.assertRaises(ParserError) as cm:
+                parser.p_parse("ab,if")
+            messages.add(str(cm.exception))
+        self.assertEqual(len(messages), 1)
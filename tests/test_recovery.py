@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+from fastidious import Parser, ParseFailure
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+from fastidious.compilers.sanitize import UnknownRule
+
+from tests.variants import INTERPRETED, LAZY, each_parser, variants
+
+
+GRAMMAR = r"""
+    program <- stmt* _
+    stmt <- _ name:id _ "=" _ number:num _ EOS {on_stmt}
+    id <- [a-z]+
+    num "NUMBER" <- [0-9]+
+    EOS <- ";"
+    _ <- [ \n]*
+    """
+
+
+class Statements(Parser):
+    __grammar__ = GRAMMAR
+    __recover__ = {"stmt": "EOS"}
+
+    def on_stmt(self, value, name, number):
+        return name, number
+
+
+class RecoveryTest(TestCase):
+    parsers = variants(Statements, LAZY, INTERPRETED)
+
+    @each_parser
+    def test_no_error(self, parser):
+        result, errors = parser.p_parse_recover("a = 1; b = 2;")
+        self.assertEqual(errors, [])
+        self.assertEqual(result, [[("a", "1"), ("b", "2")], ""])
+
+    @each_parser
+    def test_errors(self, parser):
+        source = "a = 1;\nb = ;\nc = 2;\nd 3;\ne = 4;"
+        result, errors = parser.p_parse_recover(source)
+        self.assertEqual([(e.line, e.col, e.expected) for e in errors],
+                         [(1, 5, ["NUMBER"]), (3, 3, ["[ \\n]", '"="'])])
+        stmts = result[0]
+        self.assertEqual(stmts[0], ("a", "1"))
+        self.assertIs(stmts[1], errors[0])
+        self.assertEqual(stmts[2], ("c", "2"))
+        self.assertIs(stmts[3], errors[1])
+        self.assertEqual(stmts[4], ("e", "4"))
+
+    def test_skip_to_end(self):
+        result, errors = Statements.p_parse_recover("a = 1; b = 2 c = 3")
+        self.assertEqual(result[0][0], ("a", "1"))
+        self.assertIsInstance(result[0][1], ParseFailure)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('expected `[ \\n]` or `";"`', errors[0].message)
+
+    def test_unrecoverable(self):
+        # `stmt` fails at its start position, it doesn't recover
+        result, errors = Statements.p_parse_recover("2; a = 1;")
+        self.assertEqual(result, [[], ""])
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].pos, 0)
+
+    def test_unknown_rules(self):
+        with self.assertRaises(UnknownRule):
+            class Broken(BaseParser):
+                p_compiler = FastidiousCompiler()
+                __grammar__ = GRAMMAR
+                __recover__ = {"stmt": "sync"}
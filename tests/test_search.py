@@ -0,0 +1,96 @@
+from unittest import TestCase
+
+from fastidious import Parser
+from fastidious.parser import BaseParser, parse_grammar
+from fastidious.fastidious_compiler import FastidiousCompiler
+from fastidious.compilers import search_hints
+
+
+GRAMMAR = r"""
+    url <- scheme "://" host path? {p_flatten}
+    scheme <- "https" / "http"
+    host <- [a-z.]+
+    path <- "/" [a-z/]*
+    number <- "-"? [0-9]+ {p_flatten}
+    pair <- "(" number "," number ")"
+    any <- "x"*
+    """
+
+
+class Finder(Parser):
+    __grammar__ = GRAMMAR
+
+
+TEXT = ("see http://a.org/x and https://b.com, not ftp://c.net "
+        "(1,-2) (3, 4) -5")
+
+
+class SearchHintsTest(TestCase):
+    def test_hints(self):
+        hints = search_hints(parse_grammar(GRAMMAR))
+        self.assertEqual(hints["url"], ("http", "h"))
+        self.assertEqual(hints["number"], ("", "-0123456789"))
+        self.assertEqual(hints["pair"], ("(", "("))
+        # `any` matches everywhere
+        self.assertEqual(hints["any"], ("", None))
+
+    def test_recursive(self):
+        hints = search_hints(parse_grammar(r"""
+        expr <- expr "+" term / term
+        term <- [0-9] / "(" expr ")"
+        list <- item ("," item)*
+        item <- "[" list "]" / "x"
+        """))
+        self.assertEqual(hints["expr"], ("", "(0123456789"))
+        self.assertEqual(hints["list"], ("", "[x"))
+
+
+class FindIterTest(TestCase):
+    def test_finditer(self):
+        self.assertEqual(list(Finder.p_finditer(TEXT, "url")), [
+            (4, 18, "http://a.org/x"),
+            (23, 36, "https://b.com"),
+        ])
+        self.assertEqual(
+            [m[2] for m in Finder.p_finditer(TEXT, "number")],
+            ["1", "-2", "3", "4", "-5"])
+        self.assertEqual(len(list(Finder.p_finditer(TEXT, "pair"))), 1)
+
+    def test_interpreted(self):
+        class Interpreted(BaseParser):
+            p_compiler = FastidiousCompiler(gen_code=False)
+            __grammar__ = GRAMMAR
+        for rule in ("url", "number", "pair"):
+            self.assertEqual(list(Interpreted.p_finditer(TEXT, rule)),
+                             list(Finder.p_finditer(TEXT, rule)))
+
+    def test_same_as_every_offset(self):
+        for rule in ("url", "number", "pair", "host"):
+            expected, pos = [], 0
+            while pos <= len(TEXT):
+                p = Finder(TEXT)
+                p.pos = pos
+                result = getattr(p, rule)()
+                if result is p.NoMatch:
+                    pos += 1
+                    continue
+                expected.append((pos, p.pos, result))
+                pos = max(p.pos, pos + 1)
+            self.assertEqual(list(Finder.p_finditer(TEXT, rule)), expected)
+
+    def test_empty_matches(self):
+        self.assertEqual(list(Finder.p_finditer("axxb", "any")), [
+            (0, 0, []), (1, 3, ["x", "x"]), (3, 3, []), (4, 4, [])])
+
+    def test_search(self):
+        self.assertEqual(Finder.p_search(TEXT, "url", 5),
+                         (23, 36, "https://b.com"))
+        self.assertIsNone(Finder.p_search(TEXT, "url", 24))
+        self.assertEqual(Finder.p_search("12"), None)
+        self.assertEqual(Finder.p_search("12", "number"), (0, 2, "12"))
+
+    def test_lazy(self):
+        matches = Finder.p_finditer("1 2 x", "number")
+        self.assertEqual(next(matches), (0, 1, "1"))
+        self.assertEqual(next(matches), (2, 3, "2"))
+        self.assertRaises(StopIteration, next, matches)
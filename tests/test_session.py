@@ -0,0 +1,151 @@
+import random
+from unittest import TestCase
+
+from fastidious import Parser, ParseSession, ParseFailure
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+from fastidious.compilers.sanitize import LeftRecursion
+
+
+CALLS = []
+
+GRAMMAR = r"""
+    list <- _ "[" _ items:(item (_ "," _ item)*)? _ "]" _ {on_list}
+    item <- number / list
+    number <- ~"[0-9]+" {on_number}
+    _ <- [ \n]*
+    """
+
+
+class Lists(BaseParser):
+    p_compiler = FastidiousCompiler(incremental=True)
+    __grammar__ = GRAMMAR
+
+    def on_list(self, value, items):
+        if not items:
+            return []
+        return [items[0]] + [i[3] for i in items[1]]
+
+    def on_number(self, value):
+        CALLS.append(value)
+        return int(value)
+
+
+class ParseSessionTest(TestCase):
+    def test_edits(self):
+        session = ParseSession(Lists, "[1, [2, 3], 4]")
+        self.assertEqual(session.result, [1, [2, 3], 4])
+        # replace
+        self.assertEqual(session.edit(5, 6, "22"), [1, [22, 3], 4])
+        # insert
+        self.assertEqual(session.edit(1, 1, "0, "), [0, 1, [22, 3], 4])
+        # delete
+        self.assertEqual(session.edit(7, 16, ""), [0, 1, 4])
+        self.assertEqual(session.text, "[0, 1, 4]")
+        # at the end
+        self.assertEqual(session.edit(9, 9, "\n"), [0, 1, 4])
+        self.assertEqual(session.result, [0, 1, 4])
+
+    def test_failure(self):
+        class LazyLists(Lists):
+            p_compiler = FastidiousCompiler(incremental=True,
+                                            lazy_errors=True)
+            __grammar__ = GRAMMAR
+        for parser in (Lists, LazyLists):
+            session = ParseSession(parser, "[1, 2]")
+            result = session.edit(2, 3, "")
+            self.assertIsInstance(result, ParseFailure)
+            self.assertEqual(result.pos, 3)
+            self.assertEqual(session.edit(2, 2, ",  "), [1, 2])
+
+    def test_failure_after_edit(self):
+        # the failure inside the reused entry of the inner list
+        session = ParseSession(Lists, "[1, [2, x]]")
+        result = session.edit(1, 1, "0, ")
+        expected = Lists.p_try_parse(session.text)
+        self.assertEqual(result.pos, 11)
+        self.assertEqual(result.message, expected.message)
+
+    def test_reuse(self):
+        # the regexes may examine up to the end of their line
+        text = "[%s]" % ",\n".join(str(i) for i in range(100))
+        session = ParseSession(Lists, text)
+        del CALLS[:]
+        session.edit(len(text) - 3, len(text) - 1, "100")
+        self.assertEqual(session.result, list(range(99)) + [100])
+        # only the edited number is parsed again
+        self.assertEqual(CALLS, ["100"])
+
+    def test_regex_extent(self):
+        # a regex that doesn't backtrack examined the char after its match,
+        # even across lines
+        class Words(BaseParser):
+            p_compiler = FastidiousCompiler(incremental=True)
+            __grammar__ = r"""
+                words <- item* _
+                item <- _ word:word {on_item}
+                word <- ~"[a-z]+"
+                _ <- ~"\\s*"
+                """
+
+            def on_item(self, value, word):
+                CALLS.append(word)
+                return word
+        text = "\n".join(["ab"] * 50)
+        session = ParseSession(Words, text)
+        del CALLS[:]
+        session.edit(len(text) - 1, len(text), "c")
+        self.assertEqual(CALLS, ["ac"])
+        self.assertEqual(session.result, Words.p_parse(session.text))
+
+    def test_multiline_regex(self):
+        # the regex read past its line when it failed
+        class Blocks(BaseParser):
+            p_compiler = FastidiousCompiler(incremental=True)
+            __grammar__ = r"""
+                blocks <- block*
+                block <- ~"<[^>]*>" / ~"\n"
+                """
+        session = ParseSession(Blocks, "<a\nb\n")
+        self.assertIsInstance(session.result, ParseFailure)
+        self.assertEqual(session.edit(4, 4, ">"), ["<a\nb>", "\n"])
+        self.assertEqual(session.result, Blocks.p_parse(session.text))
+
+    def test_same_as_parse(self):
+        rnd = random.Random(0)
+        session = ParseSession(Lists, "[1, [2, [3]], 4]")
+        for i in range(300):
+            text = session.text
+            start = rnd.randint(0, len(text))
+            end = min(len(text), start + rnd.choice([0, 1, 3]))
+            new = "".join(rnd.choice("[], 0123\n") for i in range(2))
+            result = session.edit(start, end, new)
+            expected = Lists.p_try_parse(session.text)
+            if isinstance(expected, ParseFailure):
+                self.assertIsInstance(result, ParseFailure)
+                self.assertEqual(result.pos, expected.pos)
+                self.assertEqual(result.message, expected.message)
+                # back to a valid text
+                session.edit(start, start + len(new), text[start:end])
+            else:
+                self.assertEqual(result, expected)
+
+    def test_errors(self):
+        class Plain(Parser):
+            __grammar__ = 'a <- "a"'
+        self.assertRaises(ValueError, ParseSession, Plain, "[]")
+        session = ParseSession(Lists, "[]")
+        self.assertRaises(ValueError, session.edit, 1, 3, "")
+        self.assertRaises(ValueError, session.edit, 2, 1, "")
+
+    def test_compiler_options(self):
+        self.assertRaises(ValueError, FastidiousCompiler, gen_code=False,
+                          incremental=True)
+        self.assertRaises(ValueError, FastidiousCompiler, memoize=False,
+                          incremental=True)
+        self.assertRaises(LeftRecursion, type, "Recursive", (BaseParser,), {
+            "p_compiler": FastidiousCompiler(incremental=True),
+            "__grammar__": """
+                expr <- expr "+" num / num
+                num <- [0-9]+
+                """})
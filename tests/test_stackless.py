@@ -0,0 +1,124 @@
+from unittest import TestCase
+
+from fastidious import ParserError, ParseLimits, ParseLimitError
+from fastidious.parser import BaseParser, parse_grammar
+from fastidious.fastidious_compiler import FastidiousCompiler, _leaf_rules
+
+from tests.variants import LAZY, each_parser, variants
+
+
+GRAMMAR = r"""
+    value <- _ (list / number) _
+    list <- "[" items:(value ("," value)*)? "]" {on_list}
+    number <- !keyword [0-9]+ {on_number}
+    keyword <- "0" list
+    _ <- [ ]*
+    """
+
+DIRECT = r"""
+    expr <- binop / num
+    binop <- l:expr op:("+" / "-") r:num {on_binop}
+    num <- [0-9]+ {on_num}
+    """
+
+
+class Actions(object):
+    def on_list(self, value, items):
+        if not items:
+            return []
+        return [items[0][1]] + [v[1][1] for v in items[1]]
+
+    def on_number(self, value):
+        return int(value[1])
+
+    def on_num(self, value):
+        return int(value)
+
+    def on_binop(self, value, l, op, r):
+        return l + r if op == "+" else l - r
+
+
+class Lists(Actions, BaseParser):
+    p_compiler = FastidiousCompiler()
+    __grammar__ = GRAMMAR
+
+
+class StacklessLists(Actions, BaseParser):
+    p_compiler = FastidiousCompiler(stackless=True)
+    __grammar__ = GRAMMAR
+
+
+class RecoveringLists(StacklessLists):
+    __recover__ = {"list": "close"}
+    __grammar__ = GRAMMAR + """
+    close <- (!"]" .)* "]"
+    """
+
+
+class StacklessLeftRecursion(Actions, BaseParser):
+    p_compiler = FastidiousCompiler(stackless=True)
+    __grammar__ = DIRECT
+
+
+def nested(depth):
+    return "[" * depth + "1" + "]" * depth
+
+
+class StacklessTest(TestCase):
+    parsers = variants(StacklessLists, LAZY)
+
+    @each_parser
+    def test_same_results(self, parser):
+        for source in ("1", "[]", "[1, [2, 3], [[]]]", "[0, 01]"):
+            self.assertEqual(parser.p_parse(source), Lists.p_parse(source))
+
+    @each_parser
+    def test_same_errors(self, parser):
+        for source in ("[1, 2", "[0[]]", "[1,,2]", "x"):
+            with self.assertRaises(ParserError) as expected:
+                Lists.p_parse(source)
+            with self.assertRaises(ParserError) as cm:
+                parser.p_parse(source)
+            self.assertEqual(str(cm.exception), str(expected.exception))
+
+    @each_parser
+    def test_deep_nesting(self, parser):
+        self.assertRaises(RuntimeError, Lists.p_parse, nested(2000))
+        result = parser.p_parse(nested(2000))[1]
+        for _ in range(2000):
+            result, = result
+        self.assertEqual(result, 1)
+
+    def test_leaves(self):
+        rules = parse_grammar(GRAMMAR)
+        self.assertEqual(_leaf_rules(rules), set(["_"]))
+        # the leaves stay plain methods
+        self.assertFalse(hasattr(StacklessLists, "_p_gen__"))
+        self.assertTrue(hasattr(StacklessLists, "_p_gen_value"))
+        self.assertTrue(hasattr(StacklessLists, "_p_gen_match_list"))
+
+    def test_left_recursion(self):
+        self.assertEqual(StacklessLeftRecursion.p_parse("10-2+3-1"), 10)
+        source = "-".join(["1"] * 3000)
+        self.assertEqual(StacklessLeftRecursion.p_parse(source), -2998)
+
+    def test_match(self):
+        self.assertEqual(StacklessLists.p_match(nested(2000)), 4001)
+        self.assertIsNone(StacklessLists.p_match("[1"))
+
+    def test_limits(self):
+        with self.assertRaises(ParseLimitError) as cm:
+            StacklessLists.p_parse(nested(100), limits=ParseLimits(steps=50))
+        self.assertEqual(cm.exception.reason, "steps")
+
+    def test_recovery(self):
+        result, errors = RecoveringLists.p_parse_recover("[1, [2 x 3], 4]")
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].pos, 7)
+        self.assertEqual(result[1][0], 1)
+        self.assertIs(result[1][1], errors[0])
+        self.assertEqual(result[1][2], 4)
+
+    def test_interpreted(self):
+        self.assertRaises(ValueError, FastidiousCompiler, gen_code=False,
+                          stackless=True)
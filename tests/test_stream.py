@@ -0,0 +1,122 @@
+import io
+from unittest import TestCase
+
+from fastidious import Parser, ParserError
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+from fastidious.parser_base import StreamBuffer
+
+
+GRAMMAR = r"""
+    records <- record*
+    record <- k:key _ "=" _ v:value _ ";" _ {on_record}
+    key <- ~"[a-z]+"
+    value <- num / str / list
+    num <- [0-9]+ {p_flatten}
+    str <- '"' (!'"' .)* '"' {p_flatten}
+    list <- "[" _ value (_ "," _ value)* _ "]" {p_flatten}
+    _ <- [ \n]*
+    """
+
+
+class Records(Parser):
+    __grammar__ = GRAMMAR
+
+    def on_record(self, value, k, v):
+        return k, v
+
+
+class BinaryRecords(Parser):
+    __binary__ = True
+    __grammar__ = r"""
+    records <- record*
+    record <- k:[a-z]* "=" v:~"[^\n]*" "\n" {on_record}
+    """
+
+    def on_record(self, value, k, v):
+        return bytes(k), bytes(v)
+
+
+SOURCE = "".join('k%s = [1, "x%s", [2, 3]];\nb = 12 ;\n' % (
+    chr(97 + i % 26), i) for i in range(200))
+
+
+class StreamTest(TestCase):
+    def test_same_results(self):
+        expected = Records.p_parse(SOURCE)
+        for chunk_size in (1, 7, 4096):
+            self.assertEqual(Records.p_parse_stream(
+                io.StringIO(SOURCE), chunk_size=chunk_size), expected)
+
+    def test_binary(self):
+        source = b"a=1\nbc=x y\n=\n"
+        for chunk_size in (1, 3, 100):
+            self.assertEqual(BinaryRecords.p_parse_stream(
+                io.BytesIO(source), chunk_size=chunk_size),
+                [(b"a", b"1"), (b"bc", b"x y"), (b"", b"")])
+
+    def test_sliding(self):
+        windows = []
+        fill = StreamBuffer.fill
+
+        def spy(buffer, end):
+            fill(buffer, end)
+            p = buffer.parser
+            windows.append((len(buffer.data), len(p._p_memoized),
+                            sum(len(f) for f in p._p_failures.values())))
+        StreamBuffer.fill = spy
+        try:
+            Records.p_parse_stream(io.StringIO(SOURCE * 5), chunk_size=64)
+        finally:
+            StreamBuffer.fill = fill
+        data, memo, failures = [max(sizes) for sizes in zip(*windows)]
+        # bounded by a record, not by the input
+        self.assertLess(data, 500)
+        self.assertLess(memo, 400)
+        # the chunks of the failure bitsets
+        self.assertLess(failures, 10)
+
+    def test_errors(self):
+        source = SOURCE + "a = [1,\n2 x];"
+        with self.assertRaises(ParserError) as cm:
+            Records.p_parse(source)
+        with self.assertRaises(ParserError) as stream_cm:
+            Records.p_parse_stream(io.StringIO(source), chunk_size=5)
+        self.assertEqual(str(stream_cm.exception), str(cm.exception))
+        self.assertEqual(stream_cm.exception.pos, cm.exception.pos)
+
+    def test_stackless(self):
+        class Stackless(Records):
+            p_compiler = FastidiousCompiler(lazy_errors=True, stackless=True)
+            __grammar__ = GRAMMAR
+        self.assertEqual(
+            Stackless.p_parse_stream(io.StringIO(SOURCE), chunk_size=7),
+            Records.p_parse(SOURCE))
+        source = SOURCE + "a = [1,\n2 x];"
+        with self.assertRaises(ParserError) as cm:
+            Records.p_parse(source)
+        with self.assertRaises(ParserError) as stream_cm:
+            Stackless.p_parse_stream(io.StringIO(source), chunk_size=5)
+        self.assertEqual(str(stream_cm.exception), str(cm.exception))
+
+    def test_partial(self):
+        stream = io.StringIO("a=1;b=2;")
+        self.assertEqual(
+            Records.p_parse_stream(stream, "record", parse_all=False,
+                                   chunk_size=1), ("a", "1"))
+
+    def test_discarded(self):
+        buffer = StreamBuffer(io.StringIO("abcdef"), chunk_size=2)
+        self.assertEqual(buffer[1:3], "bc")
+        buffer.discard(2)
+        self.assertEqual(buffer[4], "e")
+        self.assertEqual(buffer[2:], "cdef")
+        self.assertRaises(ValueError, buffer.__getitem__, 1)
+        self.assertRaises(IndexError, buffer.__getitem__, 6)
+
+    def test_interpreted(self):
+        class Interpreted(BaseParser):
+            p_compiler = FastidiousCompiler(gen_code=False)
+            __grammar__ = 'a <- "a"'
+        self.assertRaises(ValueError, Interpreted.p_parse_stream,
+                          io.StringIO("a"))
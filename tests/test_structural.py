@@ -0,0 +1,129 @@
+import io
+import os
+import subprocess
+import sys
+import unittest
+from unittest import TestCase
+
+import fastidious.parser_base
+from fastidious import Parser, ParserError, ParseSession
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+
+
+GRAMMAR = r"""
+    value <- _ (string / number / list) _
+    list <- "[" _ (value ("," value)*)? "]"
+    string <- '"' (!'"' .)* '"' {p_flatten}
+    number <- [0-9]+ {p_flatten}
+    _ <- ([ \n] / comment / line_comment)*
+    comment <- "/*" (!"*/" .)* "*/"
+    line_comment <- "#" (!"\n" .)+ "\n"
+    """
+
+
+class Scanned(Parser):
+    __grammar__ = GRAMMAR
+
+
+class Structural(Parser):
+    __structural__ = '"*\n'
+    __grammar__ = GRAMMAR
+
+
+class BinaryScanned(Parser):
+    __binary__ = True
+    __grammar__ = GRAMMAR
+
+
+class BinaryStructural(Parser):
+    __binary__ = True
+    __structural__ = '"*\n'
+    __grammar__ = GRAMMAR
+
+
+class IncrementalStructural(BaseParser):
+    p_compiler = FastidiousCompiler(incremental=True)
+    __structural__ = '"*\n'
+    __grammar__ = GRAMMAR
+
+
+TEXTS = [
+    '["a b", 1, /* x*y */ "", "c"]',
+    '[# the numbers\n 1, 22, /**/ 3]\n',
+    '["é ∑", /* ü * */ "\n"]',
+]
+
+BAD_TEXTS = ['["a, 1]', '[1, /* x ]', '[1, # x', '[1 "a"]']
+
+
+class StructuralTest(TestCase):
+    def setUp(self):
+        self.numpy = fastidious.parser_base.numpy
+
+    def tearDown(self):
+        fastidious.parser_base.numpy = self.numpy
+
+    def check(self):
+        for text in TEXTS:
+            expected = Scanned.p_parse(text)
+            self.assertEqual(Structural.p_parse(text), expected)
+            self.assertEqual(Structural.p_match(text), len(text))
+            self.assertEqual(
+                Structural.p_parse_stream(io.StringIO(text)), expected)
+            self.assertEqual(
+                ParseSession(IncrementalStructural, text).result, expected)
+            data = text.encode("utf-8")
+            expected = BinaryScanned.p_parse(data)
+            for input in (data, memoryview(data)):
+                self.assertEqual(BinaryStructural.p_parse(input), expected)
+            self.assertEqual(
+                Structural(text).p_line_col(len(text) - 1),
+                Scanned(text).p_line_col(len(text) - 1))
+        for text in BAD_TEXTS:
+            with self.assertRaises(ParserError) as expected:
+                Scanned.p_parse(text)
+            with self.assertRaises(ParserError) as cm:
+                Structural.p_parse(text)
+            self.assertEqual(str(cm.exception), str(expected.exception))
+
+    def test_skips(self):
+        self.check()
+
+    def test_without_numpy(self):
+        fastidious.parser_base.numpy = None
+        self.assertIsNone(Structural("a").p_structural_index('"'))
+        self.check()
+
+    def test_numpy_not_installed(self):
+        # NumPy can't be imported at all, not only disabled after import
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = (
+            "import sys\n"
+            "sys.modules['numpy'] = None\n"
+            "import fastidious.parser_base\n"
+            "from tests.test_structural import Structural, TEXTS\n"
+            "assert fastidious.parser_base.numpy is None\n"
+            "assert Structural('a').p_structural_index('\"') is None\n"
+            "print([Structural.p_parse(t) for t in TEXTS])\n")
+        env = dict(os.environ, PYTHONPATH=root, PYTHONIOENCODING="utf-8")
+        output = subprocess.check_output([sys.executable, "-c", script],
+                                         cwd=root, env=env)
+        self.assertEqual(output.decode("utf-8").strip(),
+                         repr([Scanned.p_parse(t) for t in TEXTS]))
+
+    @unittest.skipIf(fastidious.parser_base.numpy is None,
+                     "NumPy isn't installed")
+    def test_index(self):
+        p = Structural('"e"\n/**\n')
+        self.assertEqual(list(p.p_structural_index('"')), [0, 2])
+        self.assertEqual(list(p.p_structural_index('\n*')), [3, 5, 6, 7])
+        # no UTF-32 copy of the other text, the regex skips it
+        p = Structural('"é"\n/**\n')
+        self.assertIsNone(p.p_structural_index('"'))
+        self.assertEqual(p.p_skip_until("*", 1), 5)
+        self.assertEqual(p.p_line_col(6), Scanned('"é"\n/**\n').p_line_col(6))
+        p = BinaryStructural(b'"\xe9"\n')
+        self.assertEqual(list(p.p_structural_index('"\n')), [0, 2, 3])
+        self.assertEqual(p.p_skip_until("\n", 1), 3)
+        self.assertEqual(p.p_skip_until("*", 1), 4)
@@ -0,0 +1,184 @@
+import io
+from unittest import TestCase
+
+import six
+
+import fastidious.compilers.tokens
+from fastidious import Parser, ParserError
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+from fastidious.compilers import token_lexer
+from fastidious.compilers.sanitize import UnknownRule
+from fastidious.compilers.tokens import NotAToken
+
+
+GRAMMAR = r"""
+    value <- _ (STRING / NUMBER / list / NAME) _
+    list <- "[" _ (value ("," value)*)? "]"
+    STRING <- '"' (!'"' .)* '"'
+    NUMBER <- "-"? digits ("." digits)? {on_number}
+    digits <- [0-9]+
+    NAME <- ~"[a-z]+"i
+    _ <- WS?
+    WS <- ([ \n] / "#" (!"\n" .)*)+
+    """
+
+
+class Chars(Parser):
+    __grammar__ = GRAMMAR
+
+    def on_number(self, value):
+        return float(self.p_flatten(value))
+
+
+class Tokens(Parser):
+    __tokens__ = ("STRING", "NUMBER", "NAME", "WS")
+    __grammar__ = GRAMMAR
+
+    def on_number(self, value):
+        return float(value)
+
+
+class BinaryTokens(Tokens):
+    __binary__ = True
+    __grammar__ = GRAMMAR
+
+
+class StacklessTokens(Tokens):
+    p_compiler = FastidiousCompiler(stackless=True, lazy_errors=True)
+    __grammar__ = GRAMMAR
+
+
+class Keywords(Parser):
+    # the first token that matches wins
+    __tokens__ = ("KEYWORD", "NAME", "WS")
+    __grammar__ = r"""
+        stmt <- KEYWORD WS NAME / NAME WS NAME / "i" NAME
+        KEYWORD <- ("if" / "in") !~"[a-z]"
+        NAME <- ~"[a-z]+"
+        WS <- " "+
+        """
+
+
+TEXTS = [
+    '[1, "a b", [x, -2.5]]',
+    ' [ ]',
+    '[# the numbers\n 1,22 , "[1]"]\n',
+]
+
+BAD_TEXTS = ['[1 2]', '[1,', '[1, [x]']
+
+
+def flatten(value):
+    # the token rules return their text
+    if isinstance(value, list):
+        return "".join(flatten(v) for v in value)
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, bytes):
+        return value.decode("ascii")
+    return value
+
+
+class TokensTest(TestCase):
+    def test_results(self):
+        for text in TEXTS:
+            expected = Chars.p_parse(text)
+            for parser in (Tokens, StacklessTokens):
+                result = parser.p_parse(text)
+                self.assertEqual(flatten(result), flatten(expected))
+                self.assertEqual(parser.p_match(text), len(text))
+                self.assertEqual(
+                    parser.p_parse_stream(io.StringIO(text)), result)
+            self.assertEqual(
+                flatten(BinaryTokens.p_parse(text.encode("ascii"))),
+                flatten(result))
+
+    def test_tokenize(self):
+        starts, ends, kinds = Tokens('[1, "x"]#').p_tokenize()
+        self.assertEqual(list(starts), [1, 3, 4, 8])
+        self.assertEqual(list(ends), [2, 4, 7, 9])
+        self.assertEqual(list(kinds), [1, 3, 0, 3])
+        self.assertEqual(Keywords.p_parse("in inner"), ["in", " ", "inner"])
+        self.assertEqual(Keywords.p_parse("inn x"), ["inn", " ", "x"])
+        # "if" is a keyword, not a name
+        self.assertRaises(ParserError, Keywords.p_parse, "inn if")
+        # a token that starts within another one
+        self.assertEqual(Keywords.p_parse("inn"), ["i", "nn"])
+
+    def test_errors(self):
+        for text in BAD_TEXTS:
+            with self.assertRaises(ParserError) as expected:
+                Chars.p_parse(text)
+            for parser in (Tokens, StacklessTokens):
+                with self.assertRaises(ParserError) as cm:
+                    parser.p_parse(text)
+                self.assertEqual(
+                    (cm.exception.line, cm.exception.col),
+                    (expected.exception.line, expected.exception.col))
+        # an unterminated string isn't a token, `2.` is the token `2`
+        for text, col in (('["a]', 1), ('[1, 2.]', 5)):
+            with self.assertRaises(ParserError) as cm:
+                Tokens.p_parse(text)
+            self.assertEqual(cm.exception.col, col)
+        with self.assertRaises(ParserError) as cm:
+            Tokens.p_parse("[1,")
+        self.assertIn("expected WS or STRING or NUMBER or NAME",
+                      str(cm.exception))
+
+    def test_atomic_groups(self):
+        atomic = fastidious.compilers.tokens.ATOMIC_GROUPS
+        rules = Tokens.__rules__
+        try:
+            for emulated in (False, True):
+                fastidious.compilers.tokens.ATOMIC_GROUPS = not emulated
+                lexer, kinds = token_lexer(rules, ["NUMBER", "STRING"])
+                m = lexer.match('"a""')
+                self.assertEqual((m.end(), kinds[m.lastindex]), (3, 1))
+                m = lexer.match("-12.5.")
+                self.assertEqual((m.end(), kinds[m.lastindex]), (5, 0))
+                lexer, _ = token_lexer(rules, ["WS"])
+                self.assertEqual(lexer.match("# x\n y").end(), 5)
+                # the repetitions don't give back what they matched
+                lexer, _ = token_lexer(Keywords.__rules__, ["KEYWORD"])
+                self.assertIsNone(lexer.match("iff"))
+                self.assertEqual(lexer.match("in(").end(), 2)
+        finally:
+            fastidious.compilers.tokens.ATOMIC_GROUPS = atomic
+
+    def test_standalone(self):
+        out = six.StringIO()
+        Keywords.p_compiler.gen_py_code(Keywords, out)
+        module = {}
+        exec(compile(out.getvalue(), "standalone", "exec"), module)
+        standalone = module["Keywords"]
+        self.assertEqual(standalone.p_parse("if x"), ["if", " ", "x"])
+        self.assertRaises(module["ParserError"], standalone.p_parse, "if ")
+
+    def test_not_tokens(self):
+        with self.assertRaises(UnknownRule):
+            class Unknown(Parser):
+                __tokens__ = ("B", )
+                __grammar__ = 'a <- "a"'
+        with self.assertRaises(NotAToken):
+            class Nullable(Parser):
+                __tokens__ = ("A", )
+                __grammar__ = 'A <- "a"*'
+        with self.assertRaises(NotAToken):
+            class Recursive(Parser):
+                __tokens__ = ("A", )
+                __grammar__ = 'A <- "(" A? ")"'
+        with self.assertRaises(NotAToken):
+            class Labeled(Parser):
+                __tokens__ = ("A", )
+                __grammar__ = 'A <- x:"a" {@x}'
+        with self.assertRaises(ValueError):
+            class Interpreted(BaseParser):
+                p_compiler = FastidiousCompiler(gen_code=False)
+                __tokens__ = ("A", )
+                __grammar__ = 'A <- "a"'
+        with self.assertRaises(ValueError):
+            class Incremental(BaseParser):
+                p_compiler = FastidiousCompiler(incremental=True)
+                __tokens__ = ("A", )
+                __grammar__ = 'A <- "a"'
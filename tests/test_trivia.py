@@ -0,0 +1,182 @@
+import io
+from unittest import TestCase
+
+import six
+
+import fastidious.compilers.tokens
+from fastidious import Parser, ParserError
+from fastidious.parser import BaseParser
+from fastidious.fastidious_compiler import FastidiousCompiler
+
+
+GRAMMAR = r"""
+    list <- "[" items:(value ("," value)*)? "]" {on_list}
+    value <- NUMBER / STRING / list / "true"
+    `NUMBER <- "-"? [0-9]+ {on_number}
+    `STRING <- '"' (!'"' .)* '"' {p_flatten}
+    """
+
+EXPLICIT_GRAMMAR = r"""
+    list <- _ "[" _ items:(value (_ "," _ value)*)? _ "]" _ {on_list}
+    value <- NUMBER / STRING / list / "true"
+    NUMBER <- "-"? [0-9]+ {on_number}
+    STRING <- '"' (!'"' .)* '"' {p_flatten}
+    _ <- (~"\\s+" / "/*" (!"*/" .)* "*/")*
+    """
+
+
+class ListActions(object):
+    def on_list(self, value, items):
+        if not items:
+            return []
+        return [items[0]] + [i[-1] for i in items[1]]
+
+    def on_number(self, value):
+        return int(self.p_flatten(value))
+
+
+class Explicit(Parser, ListActions):
+    __grammar__ = EXPLICIT_GRAMMAR
+
+
+class Trivia(Parser, ListActions):
+    __trivia__ = r"\s+|/\*(?s:.)*?\*/"
+    __grammar__ = GRAMMAR
+
+
+class BinaryTrivia(Parser, ListActions):
+    __binary__ = True
+    __trivia__ = r"\s+|/\*(?s:.)*?\*/"
+    __grammar__ = GRAMMAR
+
+    def on_number(self, value):
+        return int(bytes(self.p_flatten(value)))
+
+
+class StacklessTrivia(Trivia):
+    p_compiler = FastidiousCompiler(stackless=True, lazy_errors=True,
+                                    memoize=False)
+    __grammar__ = GRAMMAR
+
+
+class TokenTrivia(Parser, ListActions):
+    __trivia__ = r"\s+|/\*(?s:.)*?\*/"
+    __tokens__ = ("NUMBER", "STRING")
+    __grammar__ = GRAMMAR
+
+    def on_number(self, value):
+        return int(value)
+
+
+class Calculator(Parser):
+    __trivia__ = r"[ \t]+"
+    __grammar__ = r"""
+    eval <- :expr EOF {@expr}
+    expr <- first:term rest:(add_op term)* {on_expr}
+    term <- first:factor rest:(mult_op factor)* {on_expr}
+    add_op <- "+" / "-"
+    mult_op <- "*" / "/"
+    factor <- paren / integer
+    paren <- "(" :expr ")" {@expr}
+    `integer "INT" <- "-"? [0-9]+ {on_integer}
+    EOF <- !.
+    """
+
+    def on_expr(self, value, first, rest):
+        for op, operand in rest:
+            if op == "+":
+                first += operand
+            elif op == "-":
+                first -= operand
+            elif op == "*":
+                first *= operand
+            else:
+                first /= operand
+        return first
+
+    def on_integer(self, value):
+        return int(self.p_flatten(value))
+
+
+TEXTS = [
+    '[1,"a b",[-2, true]]',
+    ' [ 1 , /* x */ "/* y */" ,\n[ ] ] \n',
+    '[/**/]/* end */',
+]
+
+BAD_TEXTS = ['[1 2]', '[1,\n  ]', '[- 1]']
+
+
+class TriviaTest(TestCase):
+    def test_results(self):
+        for text in TEXTS:
+            expected = Explicit.p_parse(text)
+            for parser in (Trivia, StacklessTrivia, TokenTrivia):
+                self.assertEqual(parser.p_parse(text), expected)
+                self.assertEqual(
+                    parser.p_parse_stream(io.StringIO(text)), expected)
+            data = text.encode("ascii")
+            self.assertEqual(BinaryTrivia.p_parse(memoryview(data)),
+                             BinaryTrivia.p_parse(data))
+        self.assertEqual(BinaryTrivia.p_parse(b' [1, "x"] '), [1, b'"x"'])
+        self.assertEqual(Calculator.p_parse(" 1 + 2 * (3 -1) "), 5)
+
+    def test_match_and_iter(self):
+        # the trailing trivia are skipped by p_parse only
+        self.assertEqual(Trivia.p_match(" [1] /**/ "), 4)
+        records = list(Trivia.p_iter("[1] [2,\n3]\n\n [] "))
+        self.assertEqual(records, [[1], [2, 3], []])
+
+    def test_lexical_rules(self):
+        # no trivia within the rules marked with a backtick
+        self.assertRaises(ParserError, Trivia.p_parse, "[- 1]")
+        self.assertRaises(ParserError, Calculator.p_parse, "1 + - 2")
+        self.assertEqual(Trivia.p_parse('[" a "]'), ['" a "'])
+
+    def test_errors(self):
+        for text in BAD_TEXTS:
+            with self.assertRaises(ParserError) as expected:
+                Explicit.p_parse(text)
+            for parser in (Trivia, StacklessTrivia):
+                with self.assertRaises(ParserError) as cm:
+                    parser.p_parse(text)
+                self.assertEqual(
+                    (cm.exception.line, cm.exception.col),
+                    (expected.exception.line, expected.exception.col))
+        with self.assertRaises(ParserError) as cm:
+            Calculator.p_parse("1 +  ")
+        self.assertEqual(cm.exception.col, 5)
+        self.assertIn("INT", str(cm.exception))
+
+    def test_atomic_groups(self):
+        atomic = fastidious.compilers.tokens.ATOMIC_GROUPS
+        fastidious.compilers.tokens.ATOMIC_GROUPS = False
+        try:
+            class Emulated(Parser, ListActions):
+                __trivia__ = r"\s+|/\*(?s:.)*?\*/"
+                __grammar__ = GRAMMAR
+        finally:
+            fastidious.compilers.tokens.ATOMIC_GROUPS = atomic
+        for text in TEXTS:
+            self.assertEqual(Emulated.p_parse(text), Trivia.p_parse(text))
+
+    def test_standalone(self):
+        out = six.StringIO()
+        Calculator.p_compiler.gen_py_code(Calculator, out)
+        module = {}
+        exec(compile(out.getvalue(), "standalone", "exec"), module)
+        standalone = module["Calculator"]
+        self.assertEqual(standalone.p_parse(" 2 * 3 "), 6)
+        self.assertRaises(module["ParserError"], standalone.p_parse, "2 3")
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            class Interpreted(BaseParser):
+                p_compiler = FastidiousCompiler(gen_code=False)
+                __trivia__ = r"\s+"
+                __grammar__ = 'a <- "a"'
+        with self.assertRaises(ValueError):
+            class Incremental(BaseParser):
+                p_compiler = FastidiousCompiler(incremental=True)
+                __trivia__ = r"\s+"
+                __grammar__ = 'a <- "a"'
@@ -0,0 +1,69 @@
+"""
+The variants of the test parsers: the same grammar and actions, compiled
+with other options of the compiler
+"""
+from fastidious.parser import parse_grammar
+from fastidious.parser_base import ParserMeta
+from fastidious.fastidious_compiler import FastidiousCompiler
+
+
+LAZY = {"lazy_errors": True}
+INTERPRETED = {"gen_code": False}
+
+# the attributes of a parser class its compiler sets
+COMPILED = ("__rules__", "__dict__", "__weakref__")
+
+
+def _unpack(parser, bases, attrs, rules):
+    """
+    Collect the bases of the class `parser` that no compiler compiled, and
+    the attributes and the rules of those some compiler did
+    """
+    for base in parser.__bases__:
+        if "p_compiler" in vars(base) or "__grammar__" in vars(base):
+            _unpack(base, bases, attrs, rules)
+        elif base not in bases:
+            bases.append(base)
+    names = set(r.name for r in parser.__rules__)
+    for name, value in vars(parser).items():
+        if not (name in names or name in COMPILED or name.startswith("_p_")):
+            attrs[name] = value
+    # the compiler rewrites the rules, each variant parses them again
+    if "__grammar__" in vars(parser):
+        rules[:] = ParserMeta.merge_rules(
+            rules, parse_grammar(parser.__grammar__))
+
+
+def compiled_with(parser, **options):
+    """
+    Return a parser of the grammar and the actions of `parser`, compiled
+    with the options of its compiler updated by `options`. It doesn't
+    inherit from `parser`, nor from its methods generated by the compiler
+    """
+    bases, attrs, rules = [], {}, []
+    _unpack(parser, bases, attrs, rules)
+    settings = dict(vars(parser.p_compiler))
+    settings.update(options)
+    attrs.update(p_compiler=FastidiousCompiler(**settings), __rules__=rules)
+    name = "%s[%s]" % (parser.__name__, ", ".join(
+        "%s=%r" % option for option in sorted(options.items())))
+    return type(parser)(name, tuple(bases), attrs)
+
+
+def variants(parser, *options):
+    "Return `parser` and its variants compiled with each of `options`"
+    return (parser, ) + tuple(compiled_with(parser, **o) for o in options)
+
+
+def each_parser(test):
+    "Run the `test(self, parser)` method with each of `self.parsers`"
+    def run(self):
+        for parser in self.parsers:
+            if hasattr(self, "subTest"):
+                with self.subTest(parser=parser.__name__):
+                    test(self, parser)
+            else:
+                test(self, parser)
+    run.__name__ = test.__name__
+    run.__doc__ = test.__doc__
+    return run